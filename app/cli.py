@@ -0,0 +1,355 @@
+"""Chạy pipeline CT không cần giao diện cho cả thư mục ảnh, DICOM và sinogram.
+
+Ảnh 2D và DICOM đi qua ``process_gray_image`` (khử nhiễu → sinogram → tái
+tạo), sinogram (``.npy``, hoặc mọi ảnh khi ``--mode sinogram``) đi qua
+``process_sinogram_array``. Các tệp chạy song song trên nhiều tiến trình,
+mỗi tiến trình tự đọc và ghi kết quả nên tiến trình chính không phải chép
+mảng ảnh. Cây thư mục đầu vào được giữ nguyên trong thư mục đầu ra; tên
+kết quả giữ cả phần mở rộng của tệp gốc (``a.png`` → ``a.png.npz``,
+``a.png_reconstruction.png``) để ``a.png`` và ``a.dcm`` không ghi đè nhau.
+
+Chạy từ thư mục gốc dự án:
+
+    python -m app.cli data/ct_scans -o out --format npz --workers 4 --resume
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import cv2
+import numpy as np
+import pydicom
+
+from app.services.data_loader import load_dicom_image, load_sinogram_image, load_standard_image, to_uint8
+from app.services.denoise import DEFAULT_DENOISE, DENOISE_BACKENDS
+from app.services.env import single_threaded_worker_init
+from app.services.executor import map_pool, spawn_pool
+from app.services.filters import FILTERS
+from app.services.image_processing import RECONSTRUCTION_METHODS, SINOGRAM_MAX_SIZE
+from app.services.pipeline import ProcessedImage, process_gray_image, process_sinogram_array
+from app.services.stages import StageCache
+
+IMAGE_EXTENSIONS: tuple[str, ...] = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+DICOM_EXTENSIONS: tuple[str, ...] = (".dcm", ".dicom")
+SINOGRAM_EXTENSIONS: tuple[str, ...] = (".npy",)
+OUTPUT_FORMATS: tuple[str, ...] = ("png", "npy", "npz")
+MODES: tuple[str, ...] = ("auto", "image", "sinogram")
+
+# Ước lượng thô bộ nhớ đỉnh khi xử lý một ảnh: các bản float32 trung gian
+# (cân bằng histogram, khử nhiễu) cỡ vài chục byte mỗi điểm ảnh gốc, cộng
+# phần cố định của mỗi tiến trình (Python, NumPy, OpenCV, skimage).
+_BYTES_PER_PIXEL = 48
+_WORKER_OVERHEAD = 160 * 1024 * 1024
+_OUTPUTS = {
+    "image": ("denoised", "sinogram", "reconstruction"),
+    "dicom": ("denoised", "sinogram", "reconstruction"),
+    "sinogram": ("sinogram", "reconstruction"),
+}
+
+
+@dataclass(frozen=True)
+class FileTask:
+    """Một tệp đầu vào: loại pipeline, nơi ghi kết quả và bộ nhớ ước tính."""
+
+    path: Path
+    kind: str
+    output_base: Path
+    nbytes: int
+    memory: int
+
+
+def _classify(path: Path, mode: str) -> Optional[str]:
+    suffix = path.suffix.lower()
+    if suffix in DICOM_EXTENSIONS:
+        return None if mode == "sinogram" else "dicom"
+    if suffix in SINOGRAM_EXTENSIONS:
+        return None if mode == "image" else "sinogram"
+    if suffix in IMAGE_EXTENSIONS:
+        return "sinogram" if mode == "sinogram" else "image"
+    return None
+
+
+def _pixel_count(path: Path, kind: str) -> Optional[int]:
+    """Số điểm ảnh đọc từ phần đầu tệp, không giải mã dữ liệu ảnh."""
+
+    try:
+        if kind == "dicom":
+            dataset = pydicom.dcmread(path, stop_before_pixels=True)
+            return int(dataset.Rows) * int(dataset.Columns)
+        if path.suffix.lower() == ".npy":
+            return int(np.prod(np.load(path, mmap_mode="r").shape))
+        from PIL import Image  # Đi kèm Streamlit; chỉ đọc phần đầu tệp.
+
+        with Image.open(path) as image:
+            width, height = image.size
+        return width * height
+    except Exception:
+        return None
+
+
+def _estimate_memory(path: Path, kind: str, nbytes: int) -> int:
+    pixels = _pixel_count(path, kind)
+    if pixels is None:
+        pixels = nbytes * 4  # Ảnh nén: giả định tỉ lệ nén ~4.
+    return pixels * _BYTES_PER_PIXEL
+
+
+def output_paths(base: Path, kind: str, fmt: str) -> List[Path]:
+    """Các tệp kết quả của một đầu vào; ``--resume`` bỏ qua đầu vào khi đã có đủ.
+
+    ``base`` giữ nguyên tên tệp gốc kể cả phần mở rộng, ví dụ ``out/a.png``.
+    """
+
+    if fmt == "npz":
+        return [base.with_name(base.name + ".npz")]
+    return [base.with_name(f"{base.name}_{part}.{fmt}") for part in _OUTPUTS[kind]]
+
+
+def discover(inputs: Sequence[Path], output_dir: Path, mode: str = "auto") -> Iterator[FileTask]:
+    """Duyệt (đệ quy) các thư mục/tệp đầu vào theo thứ tự tên, bỏ qua tệp không nhận dạng được."""
+
+    for root in inputs:
+        if root.is_file():
+            paths: Iterable[Path] = [root]
+            base_dir = root.parent
+        else:
+            paths = sorted(path for path in root.rglob("*") if path.is_file())
+            base_dir = root
+        for path in paths:
+            kind = _classify(path, mode)
+            if kind is None:
+                continue
+            relative = path.relative_to(base_dir)
+            nbytes = path.stat().st_size
+            yield FileTask(
+                path=path,
+                kind=kind,
+                output_base=output_dir / relative,
+                nbytes=nbytes,
+                memory=_estimate_memory(path, kind, nbytes),
+            )
+
+
+def find_collisions(tasks: Sequence[FileTask]) -> Dict[Path, List[Path]]:
+    """Các đầu vào cùng ghi vào một chỗ (ví dụ hai thư mục đầu vào có tệp trùng đường dẫn tương đối)."""
+
+    owners: Dict[Path, List[Path]] = {}
+    for task in tasks:
+        owners.setdefault(task.output_base, []).append(task.path)
+    return {base: paths for base, paths in owners.items() if len(paths) > 1}
+
+
+def _result_arrays(result: Any, fmt: str) -> Dict[str, np.ndarray]:
+    arrays: Dict[str, np.ndarray] = {}
+    if isinstance(result, ProcessedImage):
+        arrays["denoised"] = result.denoised
+    arrays["sinogram"] = result.sinogram.display if fmt == "png" else result.sinogram.raw
+    arrays["reconstruction"] = result.reconstruction
+    if fmt == "npz":
+        arrays["theta"] = result.sinogram.theta
+    return arrays
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    # Ghi vào tệp tạm rồi đổi tên: lần chạy bị ngắt không để lại kết quả dở
+    # mà ``--resume`` tưởng là đã xong.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + f".{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def save_outputs(result: Any, base: Path, kind: str, fmt: str) -> int:
+    """Ghi kết quả theo ``fmt``, trả về tổng số byte đã ghi."""
+
+    arrays = _result_arrays(result, fmt)
+    if fmt == "npz":
+        buffer = BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        _write_atomic(output_paths(base, kind, fmt)[0], buffer.getvalue())
+        return buffer.tell()
+
+    written = 0
+    for part, path in zip(_OUTPUTS[kind], output_paths(base, kind, fmt)):
+        array = arrays[part]
+        if fmt == "png":
+            ok, encoded = cv2.imencode(".png", array if array.dtype == np.uint8 else to_uint8(array))
+            if not ok:
+                raise ValueError(f"Không thể mã hóa PNG cho {path.name}.")
+            data = encoded.tobytes()
+        else:
+            buffer = BytesIO()
+            np.save(buffer, array)
+            data = buffer.getvalue()
+        _write_atomic(path, data)
+        written += len(data)
+    return written
+
+
+def process_file(task: FileTask, options: Dict[str, Any], fmt: str) -> tuple[float, int]:
+    """Xử lý một tệp trong tiến trình con và ghi kết quả; trả về (thời gian, số byte đã ghi)."""
+
+    started = time.perf_counter()
+    # Mỗi tệp chỉ đi qua đồ thị một lần: cache bước chỉ tốn bộ nhớ.
+    stage_cache = StageCache(0)
+    name = task.path.name
+    if task.kind == "sinogram":
+        result = process_sinogram_array(
+            load_sinogram_image(task.path),
+            name=name,
+            target_size=options["target_size"],
+            method=options["method"],
+            filter_name=options["filter_name"],
+            stage_cache=stage_cache,
+        )
+    else:
+        if task.kind == "dicom":
+            gray, rgb = load_dicom_image(task.path, bit_depth=16), None
+        else:
+            rgb, gray = load_standard_image(task.path)
+        result = process_gray_image(
+            gray,
+            name=name,
+            rgb=rgb,
+            max_size=options["max_size"],
+            denoise_backend=options["denoise_backend"],
+            adaptive_denoise=options["adaptive_denoise"],
+            stage_cache=stage_cache,
+        )
+    written = save_outputs(result, task.output_base, task.kind, fmt)
+    return time.perf_counter() - started, written
+
+
+@dataclass
+class RunSummary:
+    processed: int = 0
+    skipped: int = 0
+    failed: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    elapsed: float = 0.0
+
+    def describe(self) -> str:
+        seconds = max(self.elapsed, 1e-9)
+        return (
+            f"Xong {self.processed} tệp, bỏ qua {self.skipped}, lỗi {self.failed} trong {self.elapsed:.1f} s · "
+            f"{self.processed / seconds:.2f} ảnh/s · {self.bytes_in / seconds / 1e6:.2f} MB/s đọc · "
+            f"{self.bytes_out / seconds / 1e6:.2f} MB/s ghi"
+        )
+
+
+def run(
+    tasks: Sequence[FileTask],
+    options: Dict[str, Any],
+    *,
+    fmt: str = "png",
+    workers: int = 1,
+    max_memory: Optional[int] = None,
+    resume: bool = False,
+    log=print,
+) -> RunSummary:
+    """Chạy cả lô; ``max_memory`` (byte) giới hạn tổng bộ nhớ ước tính của các tệp đang xử lý.
+
+    Luôn cho phép ít nhất một tệp chạy, kể cả khi riêng nó vượt giới hạn.
+    """
+
+    summary = RunSummary()
+    queue: List[FileTask] = []
+    for task in tasks:
+        if resume and all(path.exists() for path in output_paths(task.output_base, task.kind, fmt)):
+            summary.skipped += 1
+        else:
+            queue.append(task)
+    total = len(queue)
+    budget = None
+    if max_memory is not None:
+        workers = max(1, min(workers, max_memory // _WORKER_OVERHEAD))
+        budget = max_memory - workers * _WORKER_OVERHEAD
+    workers = max(1, min(workers, total or 1))
+    log(f"{total} tệp cần xử lý ({summary.skipped} đã có kết quả), {workers} tiến trình")
+
+    started = time.perf_counter()
+    with spawn_pool(workers, single_threaded_worker_init) as executor:
+        outcomes = map_pool(
+            executor,
+            process_file,
+            queue,
+            args=(options, fmt),
+            max_in_flight=workers,
+            ordered=False,
+            cost=lambda task: task.memory,
+            max_cost=budget,
+        )
+        for done_count, outcome in enumerate(outcomes, start=1):
+            task = outcome.item
+            if not outcome.ok:
+                summary.failed += 1
+                log(f"[{done_count}/{total}] LỖI {task.path}: {outcome.error}")
+                continue
+            elapsed, written = outcome.value
+            summary.processed += 1
+            summary.bytes_in += task.nbytes
+            summary.bytes_out += written
+            log(f"[{done_count}/{total}] {task.path} · {elapsed:.2f} s")
+    summary.elapsed = time.perf_counter() - started
+    return summary
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    # Như giao diện: chỉ liệt kê thuật toán có đủ gói phụ thuộc (wavelet cần pywt).
+    denoise_choices = sorted(name for name, backend in DENOISE_BACKENDS.items() if backend.available)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("inputs", nargs="+", type=Path, help="Thư mục hoặc tệp đầu vào")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="Thư mục ghi kết quả")
+    parser.add_argument("--mode", default="auto", choices=MODES, help="auto: .npy là sinogram, ảnh/DICOM qua pipeline")
+    parser.add_argument("--format", default="png", choices=OUTPUT_FORMATS)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) - 1))
+    parser.add_argument("--resume", action="store_true", help="Bỏ qua tệp đã có đủ kết quả")
+    parser.add_argument("--max-memory", type=float, default=None, help="Giới hạn bộ nhớ ước tính (MB)")
+    parser.add_argument("--max-size", type=int, default=SINOGRAM_MAX_SIZE, help="Giới hạn cạnh ảnh khi tạo sinogram")
+    parser.add_argument("--denoise", default=DEFAULT_DENOISE, choices=denoise_choices)
+    parser.add_argument("--adaptive", action="store_true", help="Bật khử nhiễu thích nghi theo mức nhiễu ước tính")
+    parser.add_argument("--target-size", type=int, default=256, help="Kích thước ảnh tái tạo từ sinogram")
+    parser.add_argument("--method", default="fbp", choices=RECONSTRUCTION_METHODS)
+    parser.add_argument("--filter", default="hann", choices=sorted(FILTERS))
+    args = parser.parse_args(argv)
+
+    tasks = list(discover(args.inputs, args.output, args.mode))
+    if not tasks:
+        print("Không tìm thấy tệp đầu vào nào.", file=sys.stderr)
+        return 1
+    collisions = find_collisions(tasks)
+    if collisions:
+        for base, paths in collisions.items():
+            print(f"Trùng đầu ra {base}: {', '.join(str(path) for path in paths)}", file=sys.stderr)
+        return 2
+    options = {
+        "max_size": args.max_size,
+        "denoise_backend": args.denoise,
+        "adaptive_denoise": args.adaptive,
+        "target_size": args.target_size,
+        "method": args.method,
+        "filter_name": args.filter,
+    }
+    summary = run(
+        tasks,
+        options,
+        fmt=args.format,
+        workers=args.workers,
+        max_memory=int(args.max_memory * 1024 * 1024) if args.max_memory else None,
+        resume=args.resume,
+    )
+    print(summary.describe())
+    return 1 if summary.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from io import BytesIO
+from typing import Callable, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from .data_loader import to_uint8
+from .env import env_mb
+
+PREVIEW_FORMATS: tuple[str, ...] = ("JPEG", "PNG")
+
+_DEFAULT_MAX_MB = 64
+_DEFAULT_PREVIEW_SIZE = 512
+_DEFAULT_PREVIEW_FORMAT = "JPEG"
+_JPEG_QUALITY = 85
+# Cạnh dài nhất của ảnh nhỏ trong chế độ lưới.
+THUMBNAIL_SIZE = 192
+
+AssetKey = Tuple[str, str, str]
+
+
+class AssetCache:
+    """Cache ảnh đã mã hóa theo (id ảnh, biến thể, định dạng), LRU giới hạn theo dung lượng.
+
+    Dùng chung cho mọi phiên: cùng một kết quả hiển thị ở tab mới nhất, tab
+    lịch sử hay ở phiên khác chỉ được thu nhỏ và mã hóa một lần.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = int(max_bytes)
+        self._entries: "OrderedDict[AssetKey, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_encode(self, key: AssetKey, encode: Callable[[], bytes]) -> bytes:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+        data = encode()
+        with self._lock:
+            if len(data) <= self.max_bytes and key not in self._entries:
+                self._entries[key] = data
+                self._bytes += len(data)
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= len(evicted)
+        return data
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Băm của các mảng chỉ đọc được nhớ theo đối tượng mảng để mỗi lượt chạy lại
+# không phải băm lại toàn bộ điểm ảnh; mục tự xóa khi mảng bị thu hồi.
+_ARRAY_IDS: Dict[int, Tuple["weakref.ref[np.ndarray]", str]] = {}
+_ARRAY_IDS_LOCK = threading.Lock()
+
+
+def _forget_array(address: int) -> None:
+    with _ARRAY_IDS_LOCK:
+        _ARRAY_IDS.pop(address, None)
+
+
+def asset_id(array: np.ndarray) -> str:
+    """Id nội dung của ảnh (BLAKE2 của hình dạng, kiểu và điểm ảnh).
+
+    Ổn định qua các lượt chạy lại và khi kết quả lịch sử được nạp lại từ
+    tầng nén hay đĩa, nên dùng làm khóa thay cho id đối tượng kết quả.
+    """
+
+    address = id(array)
+    if not array.flags.writeable:
+        with _ARRAY_IDS_LOCK:
+            known = _ARRAY_IDS.get(address)
+        if known is not None and known[0]() is array:
+            return known[1]
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{array.shape}|{array.dtype.str}".encode("ascii"))
+    digest.update(np.ascontiguousarray(array).data)
+    value = digest.hexdigest()
+    if not array.flags.writeable:
+        with _ARRAY_IDS_LOCK:
+            _ARRAY_IDS[address] = (weakref.ref(array, lambda _, address=address: _forget_array(address)), value)
+    return value
+
+
+def encode_image(array: np.ndarray, image_format: str = "PNG", *, max_side: Optional[int] = None) -> bytes:
+    """Mã hóa ảnh xám/RGB thành PNG hoặc JPEG; thu nhỏ (INTER_AREA) để cạnh dài nhất ≤ ``max_side``."""
+
+    image_format = image_format.upper()
+    if image_format not in PREVIEW_FORMATS:
+        raise ValueError(f"Định dạng ảnh không hỗ trợ: {image_format}.")
+    image = array if array.dtype == np.uint8 else to_uint8(array)
+    if max_side is not None and max(image.shape[:2]) > max_side:
+        scale = max_side / max(image.shape[:2])
+        size = (max(1, round(image.shape[1] * scale)), max(1, round(image.shape[0] * scale)))
+        image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    buffer = BytesIO()
+    options = {"quality": _JPEG_QUALITY} if image_format == "JPEG" else {"compress_level": 1}
+    Image.fromarray(image).save(buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+
+def preview_bytes(
+    array: np.ndarray,
+    *,
+    max_side: Optional[int] = None,
+    image_format: Optional[str] = None,
+    cache: Optional[AssetCache] = None,
+) -> bytes:
+    """Ảnh xem trước đã thu nhỏ, lấy từ cache nếu đã mã hóa trước đó."""
+
+    max_side = max_side or default_preview_size()
+    image_format = (image_format or default_preview_format()).upper()
+    if cache is None:
+        cache = default_asset_cache()
+    key = (asset_id(array), f"preview{max_side}", image_format)
+    return cache.get_or_encode(key, lambda: encode_image(array, image_format, max_side=max_side))
+
+
+def thumbnail_bytes(array: np.ndarray, *, cache: Optional[AssetCache] = None) -> bytes:
+    """Ảnh nhỏ JPEG (cạnh dài ``THUMBNAIL_SIZE``) cho chế độ lưới."""
+
+    return preview_bytes(array, max_side=THUMBNAIL_SIZE, image_format="JPEG", cache=cache)
+
+
+def full_png(array: np.ndarray, *, cache: Optional[AssetCache] = None) -> bytes:
+    """PNG đủ độ phân giải để tải xuống; chỉ mã hóa khi người dùng thực sự tải."""
+
+    if cache is None:
+        cache = default_asset_cache()
+    return cache.get_or_encode((asset_id(array), "full", "PNG"), lambda: encode_image(array, "PNG"))
+
+
+_DEFAULT_CACHE: Optional[AssetCache] = None
+
+
+def default_preview_size() -> int:
+    """Cạnh dài nhất của ảnh xem trước (``CT_PREVIEW_SIZE``, mặc định 512 px)."""
+
+    try:
+        return max(16, int(os.environ.get("CT_PREVIEW_SIZE", _DEFAULT_PREVIEW_SIZE)))
+    except ValueError:
+        return _DEFAULT_PREVIEW_SIZE
+
+
+def default_preview_format() -> str:
+    """Định dạng ảnh xem trước (``CT_PREVIEW_FORMAT``: ``jpeg`` hoặc ``png``, mặc định JPEG)."""
+
+    image_format = os.environ.get("CT_PREVIEW_FORMAT", _DEFAULT_PREVIEW_FORMAT).strip().upper()
+    if image_format == "JPG":
+        image_format = "JPEG"
+    return image_format if image_format in PREVIEW_FORMATS else _DEFAULT_PREVIEW_FORMAT
+
+
+def default_asset_cache() -> AssetCache:
+    """Cache ảnh mã hóa dùng chung trong tiến trình; ``CT_ASSET_CACHE_MB`` đặt giới hạn (mặc định 64 MB)."""
+
+    global _DEFAULT_CACHE
+    if _DEFAULT_CACHE is None:
+        _DEFAULT_CACHE = AssetCache(env_mb("CT_ASSET_CACHE_MB", _DEFAULT_MAX_MB))
+    return _DEFAULT_CACHE
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import atexit
+import dataclasses
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Any, Callable, Dict, Iterable, Iterator, Mapping, Optional
+
+from .data_loader import load_dicom_image, load_standard_image
+from .pipeline import ProcessedImage, process_gray_image
+from .result_cache import ResultCache, default_result_cache, result_key
+from .env import single_threaded_worker_init
+from .executor import TaskOutcome, map_pool, spawn_pool
+from .stages import StageCache
+
+BATCH_KINDS: tuple[str, ...] = ("image", "dicom")
+
+
+@dataclass(frozen=True)
+class BatchJob:
+    """Một tệp tải lên cần chạy qua ``process_gray_image``."""
+
+    name: str
+    kind: str
+    payload: bytes
+
+
+@dataclass
+class BatchOutcome:
+    """Kết quả (hoặc lỗi) của một tệp trong lô, kèm vị trí trong danh sách gốc."""
+
+    index: int
+    name: str
+    result: Optional[ProcessedImage] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def default_batch_workers() -> int:
+    """Số tiến trình xử lý lô, đặt qua ``CT_BATCH_WORKERS`` (mặc định số CPU − 1)."""
+
+    try:
+        return max(1, int(os.environ.get("CT_BATCH_WORKERS", (os.cpu_count() or 1) - 1)))
+    except ValueError:
+        return max(1, (os.cpu_count() or 1) - 1)
+
+
+def process_upload(job: BatchJob, params: Mapping[str, Any], progress_callback=None) -> ProcessedImage:
+    """Giải mã một tệp tải lên và chạy pipeline với ``params`` (tham số của ``process_gray_image``)."""
+
+    if job.kind not in BATCH_KINDS:
+        raise ValueError(f"Loại tệp không được hỗ trợ: {job.kind}")
+    source = BytesIO(job.payload)
+    if job.kind == "dicom":
+        gray, rgb = load_dicom_image(source, bit_depth=16), None
+    else:
+        rgb, gray = load_standard_image(source)
+    return process_gray_image(gray, name=job.name, rgb=rgb, progress_callback=progress_callback, **params)
+
+
+def _run_job(job: BatchJob, params: Dict[str, Any]) -> tuple[float, ProcessedImage]:
+    started = time.perf_counter()
+    # Mỗi tệp chỉ đi qua đồ thị một lần trong tiến trình con: cache bước
+    # riêng của tiến trình chỉ tốn bộ nhớ mà gần như không được dùng lại.
+    result = process_upload(job, dict(params, stage_cache=StageCache(0)))
+    return time.perf_counter() - started, result
+
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_WORKERS = 0
+
+
+def _batch_pool(workers: int) -> ProcessPoolExecutor:
+    """Pool dùng lại giữa các lô (và các phiên) để không khởi động lại tiến trình mỗi lần bấm xử lý."""
+
+    global _POOL, _POOL_WORKERS
+    if _POOL is None or _POOL_WORKERS != workers:
+        if _POOL is not None:
+            _POOL.shutdown(cancel_futures=True)
+        _POOL = spawn_pool(workers, single_threaded_worker_init)
+        _POOL_WORKERS = workers
+    return _POOL
+
+
+def _discard_pool() -> None:
+    global _POOL
+    if _POOL is not None:
+        _POOL.shutdown(wait=False, cancel_futures=True)
+        _POOL = None
+
+
+@atexit.register
+def _shutdown_pool() -> None:
+    if _POOL is not None:
+        _POOL.shutdown(cancel_futures=True)
+
+
+def _outcome(outcome: TaskOutcome) -> BatchOutcome:
+    job: BatchJob = outcome.item
+    if isinstance(outcome.error, BrokenProcessPool):
+        _discard_pool()
+        return BatchOutcome(outcome.index, job.name, error="Tiến trình xử lý bị dừng đột ngột.")
+    if outcome.error is not None:
+        return BatchOutcome(outcome.index, job.name, error=str(outcome.error) or type(outcome.error).__name__)
+    elapsed, result = outcome.value
+    return BatchOutcome(outcome.index, job.name, result=result, elapsed=elapsed)
+
+
+def _file_progress(
+    progress_callback: Optional[Callable[[float, str], None]], index: int, total: int, name: str
+) -> Optional[Callable[[float, str], None]]:
+    if progress_callback is None:
+        return None
+
+    def _update(value: float, text: str) -> None:
+        progress_callback((index + value) / total, f"{name} · {index + 1}/{total} · {text}")
+
+    return _update
+
+
+def run_batch(
+    jobs: Iterable[BatchJob],
+    params: Mapping[str, Any],
+    *,
+    workers: Optional[int] = None,
+    ordered: bool = True,
+    progress_callback: Optional[Callable[[float, str], None]] = None,
+) -> Iterator[BatchOutcome]:
+    """Chạy ``process_gray_image`` cho cả lô và trả từng kết quả ngay khi xong.
+
+    Mỗi tệp chạy trong một tiến trình của pool (``workers`` tiến trình, tối
+    đa 2 × ``workers`` tệp đã gửi mà chưa trả về) và lỗi của một tệp chỉ
+    nằm trong ``BatchOutcome`` của tệp đó. ``ordered``
+    trả kết quả theo đúng thứ tự tải lên (giữ lại các tệp xong sớm cho tới
+    lượt), ngược lại trả theo thứ tự hoàn thành. ``workers=1`` chạy tuần tự
+    ngay trong tiến trình hiện tại; khi đó ``progress_callback`` nhận tiến
+    độ từng bước của mỗi tệp, còn với pool thì nhận tiến độ theo số tệp xong.
+    """
+
+    jobs = list(jobs)
+    params = dict(params)
+    workers = max(1, min(int(workers or default_batch_workers()), len(jobs) or 1))
+
+    total = len(jobs)
+    if workers == 1:
+        for index, job in enumerate(jobs):
+            started = time.perf_counter()
+            progress = _file_progress(progress_callback, index, total, job.name)
+            try:
+                result = process_upload(job, params, progress_callback=progress)
+            except Exception as exc:
+                yield BatchOutcome(index, job.name, error=str(exc) or type(exc).__name__)
+                continue
+            yield BatchOutcome(index, job.name, result=result, elapsed=time.perf_counter() - started)
+        return
+
+    outcomes = map_pool(
+        _batch_pool(workers),
+        _run_job,
+        jobs,
+        args=(params,),
+        max_in_flight=workers * 2,
+        ordered=ordered,
+        shared=True,
+    )
+    try:
+        for done, outcome in enumerate(outcomes, start=1):
+            if progress_callback is not None:
+                progress_callback(done / total, f"Đã xử lý {done}/{total} tệp")
+            yield _outcome(outcome)
+    finally:
+        # Người gọi dừng giữa chừng: bỏ các tệp chưa chạy, dọn shared memory
+        # của các tệp đang chạy khi chúng xong.
+        outcomes.close()
+
+
+def process_uploads(
+    jobs: Iterable[BatchJob],
+    params: Mapping[str, Any],
+    *,
+    cache: Optional[ResultCache] = None,
+    workers: Optional[int] = None,
+    progress_callback: Optional[Callable[[float, str], None]] = None,
+) -> Iterator[BatchOutcome]:
+    """``run_batch`` có cache kết quả: tệp đã xử lý (cùng nội dung, cùng tham số) trả về ngay.
+
+    Các tệp trúng cache được trả trước (``cached=True``), phần còn lại theo
+    thứ tự tải lên khi xong; ``BatchOutcome.index`` luôn là vị trí trong
+    danh sách gốc. Kết quả mới được lưu vào cache.
+    """
+
+    jobs = list(jobs)
+    cache = cache if cache is not None else default_result_cache()
+    keys = [result_key(job.kind, job.payload, params) for job in jobs]
+    pending: list[int] = []
+    for index, (job, key) in enumerate(zip(jobs, keys)):
+        cached = cache.get(key)
+        if cached is None:
+            pending.append(index)
+            continue
+        yield BatchOutcome(index, job.name, result=dataclasses.replace(cached, name=job.name, info=dict(cached.info)), cached=True)
+
+    for outcome in run_batch(
+        [jobs[index] for index in pending],
+        params,
+        workers=workers,
+        progress_callback=progress_callback,
+    ):
+        outcome.index = pending[outcome.index]
+        if outcome.ok:
+            cache.put(keys[outcome.index], outcome.result)
+        yield outcome
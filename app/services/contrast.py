@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import threading
+
+import cv2
+import numpy as np
+from skimage import exposure
+
+EQUALIZATION_BACKENDS: tuple[str, ...] = ("opencv", "skimage")
+DEFAULT_EQUALIZATION = "opencv"
+
+# Tham số CLAHE gốc của ứng dụng (theo quy ước skimage) và lưới ô tương ứng:
+# skimage mặc định chia ảnh thành 8 × 8 vùng ngữ cảnh.
+CLIP_LIMIT = 0.02
+TILE_GRID = (8, 8)
+
+# skimage tính ngưỡng cắt là clip_limit × số điểm ảnh mỗi ô trên histogram
+# 256 bin, OpenCV tính theo bội số của số đếm trung bình mỗi bin. Về lý
+# thuyết hệ số quy đổi là 256; hiệu chỉnh trên ảnh thử (camera, moon, coins,
+# text, phantom có nhiễu) cho sai lệch trung bình nhỏ nhất (~3/255) ở
+# ~0.88 × 256, do skimage chỉ dùng ~252 bin hiệu dụng và phân phối lại phần
+# bị cắt hơi khác.
+_HISTOGRAM_BINS = 256
+_CLIP_SCALE = 0.88
+
+_local = threading.local()
+
+
+def opencv_clip_limit(clip_limit: float = CLIP_LIMIT) -> float:
+    """Quy đổi ``clip_limit`` chuẩn hóa của skimage sang ``clipLimit`` của OpenCV."""
+
+    return float(clip_limit) * _HISTOGRAM_BINS * _CLIP_SCALE
+
+
+def _clahe(clip_limit: float, tile_grid: tuple[int, int]) -> cv2.CLAHE:
+    """Đối tượng CLAHE dùng lại theo (clipLimit, tileGridSize).
+
+    ``CLAHE.apply`` giữ bộ đệm nội bộ nên mỗi luồng (phiên Streamlit) có
+    bộ nhớ đệm riêng.
+    """
+
+    cache = getattr(_local, "clahe", None)
+    if cache is None:
+        cache = _local.clahe = {}
+    key = (float(clip_limit), tuple(tile_grid))
+    clahe = cache.get(key)
+    if clahe is None:
+        clahe = cache[key] = cv2.createCLAHE(clipLimit=key[0], tileGridSize=key[1])
+    return clahe
+
+
+def equalize(
+    image: np.ndarray,
+    *,
+    backend: str = DEFAULT_EQUALIZATION,
+    clip_limit: float = CLIP_LIMIT,
+    dtype: np.dtype = np.float32,
+) -> np.ndarray:
+    """Cân bằng histogram thích nghi (CLAHE), trả về ảnh ``dtype`` trong [0, 1].
+
+    Nhận ảnh uint8, uint16 (ví dụ DICOM 16-bit) hoặc ảnh số thực. Như
+    skimage, cường độ được kéo giãn về toàn dải trước và sau khi cân bằng.
+
+    Cả skimage lẫn backend OpenCV đều lập histogram 256 bin: ảnh 16-bit
+    được chia bin một lần từ dữ liệu gốc, không qua bản uint8 lúc đọc file.
+    Chế độ 16-bit gốc của OpenCV (65536 bin, ngưỡng cắt làm tròn theo từng
+    bin) lệch 20–80/255 so với skimage nên không được dùng.
+    """
+
+    if backend not in EQUALIZATION_BACKENDS:
+        raise ValueError(f"Phương pháp cân bằng histogram không được hỗ trợ: {backend}")
+    if image.ndim != 2:
+        raise ValueError("Ảnh cân bằng histogram phải là ảnh 2D.")
+
+    if backend == "skimage":
+        if image.dtype == np.uint8:
+            image = image.astype(dtype) * (1.0 / 255.0)
+        return exposure.equalize_adapthist(image, clip_limit=clip_limit).astype(dtype, copy=False)
+
+    stretched = cv2.normalize(image.astype(np.float32, copy=False), None, 0, 255, cv2.NORM_MINMAX)
+    equalized = _clahe(opencv_clip_limit(clip_limit), TILE_GRID).apply(cv2.convertScaleAbs(stretched))
+    result = cv2.normalize(equalized, None, 0.0, 1.0, cv2.NORM_MINMAX, dtype=cv2.CV_32F)
+    return result.astype(dtype, copy=False)
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import os
 from io import BytesIO
-from typing import TYPE_CHECKING, Any, Tuple
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional, Sequence, Tuple, Union
 
 import cv2
 import numpy as np
@@ -13,31 +15,135 @@ else:  # pragma: no cover
     UploadedFile = Any  # type: ignore
 
 
-def _read_bytes(file: UploadedFile) -> bytes:
+# Tệp tải lên của Streamlit, đối tượng tệp nhị phân hoặc đường dẫn trên đĩa
+# (dùng cho chạy không giao diện, xem ``app.cli``).
+FileSource = Union[UploadedFile, str, os.PathLike]
+
+
+def _read_bytes(file: FileSource) -> bytes:
+    if isinstance(file, (str, os.PathLike)):
+        return Path(file).read_bytes()
     if hasattr(file, "getvalue"):
         return file.getvalue()
     return file.read()
 
 
-def load_standard_image(file: UploadedFile) -> Tuple[np.ndarray, np.ndarray]:
+def _source_name(file: FileSource) -> str:
+    if isinstance(file, (str, os.PathLike)):
+        return Path(file).name
+    return getattr(file, "name", "")
+
+
+def load_standard_image(file: FileSource) -> Tuple[Optional[np.ndarray], np.ndarray]:
+    """Giải mã ảnh chuẩn thành (RGB, ảnh xám uint8).
+
+    Bản RGB là ``None`` khi ảnh vốn là ảnh xám, kể cả ảnh xám lưu dạng 3
+    kênh giống nhau, để kết quả không giữ thêm một bản sao 3 lần ảnh xám.
+    """
+
     data = np.frombuffer(_read_bytes(file), dtype=np.uint8)
-    bgr = cv2.imdecode(data, cv2.IMREAD_COLOR)
-    if bgr is None:
+    image = cv2.imdecode(data, cv2.IMREAD_ANYCOLOR)
+    if image is None:
         raise ValueError("Không thể đọc ảnh chuẩn.")
-    gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
-    rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
-    return rgb, gray
+    if image.ndim == 2:
+        return None, image
+    if image.shape[2] == 4:
+        image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+    blue = image[..., 0]
+    if np.array_equal(blue, image[..., 1]) and np.array_equal(blue, image[..., 2]):
+        return None, np.ascontiguousarray(blue)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB), cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
 
-def load_dicom_image(file: UploadedFile) -> np.ndarray:
+def to_uint8(array: np.ndarray) -> np.ndarray:
+    """Chuẩn hóa min-max về uint8 (dùng để hiển thị)."""
+
+    normalized = cv2.normalize(array.astype(np.float32, copy=False), None, 0, 255, cv2.NORM_MINMAX)
+    return normalized.astype(np.uint8)
+
+
+def load_dicom_image(file: FileSource, *, bit_depth: int = 8) -> np.ndarray:
+    """Đọc một ảnh DICOM, chuẩn hóa min-max về uint8 hoặc uint16 (``bit_depth=16``).
+
+    Bản 16-bit giữ nguyên dải động của dữ liệu gốc cho bước cân bằng
+    histogram thay vì lượng tử hóa xuống 256 mức ngay khi đọc.
+    """
+
+    if bit_depth not in (8, 16):
+        raise ValueError("Độ sâu bit DICOM phải là 8 hoặc 16.")
     dataset = pydicom.dcmread(BytesIO(_read_bytes(file)))
     array = dataset.pixel_array.astype(np.float32)
-    normalized = cv2.normalize(array, None, 0, 255, cv2.NORM_MINMAX)
-    return normalized.astype(np.uint8)
+    if bit_depth == 8:
+        return to_uint8(array)
+    normalized = cv2.normalize(array, None, 0, 65535, cv2.NORM_MINMAX)
+    return normalized.astype(np.uint16)
+
+
+def _slice_position(dataset: Any, fallback: int) -> float:
+    """Vị trí lát cắt dọc pháp tuyến mặt cắt (ImagePositionPatient)."""
+
+    position = getattr(dataset, "ImagePositionPatient", None)
+    orientation = getattr(dataset, "ImageOrientationPatient", None)
+    if position is not None and orientation is not None and len(orientation) == 6:
+        normal = np.cross(np.asarray(orientation[:3], dtype=float), np.asarray(orientation[3:], dtype=float))
+        return float(np.dot(np.asarray(position, dtype=float), normal))
+    if position is not None:
+        return float(position[2])
+    instance = getattr(dataset, "InstanceNumber", None)
+    if instance is not None:
+        return float(instance)
+    return float(fallback)
+
+
+def normalize_volume(volume: np.ndarray, *, bit_depth: int = 8) -> np.ndarray:
+    """Chuẩn hóa min-max chung cả khối (z, y, x) về uint8 hoặc uint16 (``bit_depth=16``).
+
+    Dùng chung một dải cho mọi lát để cường độ giữa các lát so sánh được;
+    ``cv2.normalize`` không nhận khối ba chiều có nhiều hơn 512 cột.
+    """
+
+    if bit_depth not in (8, 16):
+        raise ValueError("Độ sâu bit DICOM phải là 8 hoặc 16.")
+    dtype = np.uint8 if bit_depth == 8 else np.uint16
+    volume = np.asarray(volume, dtype=np.float32)
+    low, high = float(volume.min()), float(volume.max())
+    if high <= low:
+        return np.zeros(volume.shape, dtype=dtype)
+    scaled = np.subtract(volume, low, dtype=np.float32)
+    scaled *= (255.0 if bit_depth == 8 else 65535.0) / (high - low)
+    return scaled.astype(dtype)
+
+
+def load_dicom_series(files: Sequence[FileSource], *, bit_depth: int = 8) -> Tuple[np.ndarray, np.ndarray]:
+    """Đọc chuỗi DICOM thành khối (z, y, x) uint8 hoặc uint16 sắp theo ImagePositionPatient.
+
+    Cường độ được chuẩn hóa chung cho cả khối để các lát cắt so sánh được
+    với nhau; ``bit_depth=16`` giữ dải động gốc cho bước cân bằng histogram
+    như ``load_dicom_image``. Trả về khối và vị trí (mm) của từng lát theo
+    thứ tự đã sắp.
+    """
+
+    if bit_depth not in (8, 16):
+        raise ValueError("Độ sâu bit DICOM phải là 8 hoặc 16.")
+    if not files:
+        raise ValueError("Chưa có tệp DICOM nào trong chuỗi.")
+
+    datasets = [pydicom.dcmread(BytesIO(_read_bytes(file))) for file in files]
+    positions = np.array([_slice_position(ds, index) for index, ds in enumerate(datasets)])
+    order = np.argsort(positions, kind="stable")
+
+    first_shape = datasets[order[0]].pixel_array.shape
+    volume = np.empty((len(datasets), *first_shape), dtype=np.float32)
+    for z, index in enumerate(order):
+        pixels = datasets[index].pixel_array
+        if pixels.shape != first_shape:
+            raise ValueError("Các lát cắt DICOM trong chuỗi không cùng kích thước.")
+        volume[z] = pixels
+    return normalize_volume(volume, bit_depth=bit_depth), positions[order]
 
 
-def load_sinogram_image(file: UploadedFile) -> np.ndarray:
-    name = getattr(file, "name", "").lower()
+def load_sinogram_image(file: FileSource) -> np.ndarray:
+    name = _source_name(file).lower()
     raw_bytes = _read_bytes(file)
 
     if name.endswith(".npy"):
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import os
+
+
+def env_number(name: str, default: float) -> float:
+    """Số đọc từ biến môi trường ``name``; thiếu hoặc sai định dạng thì dùng ``default``."""
+
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return float(default)
+
+
+def env_mb(name: str, default_mb: float) -> int:
+    """Giới hạn dung lượng đặt bằng MB qua biến môi trường ``name``, trả về số byte."""
+
+    return int(env_number(name, default_mb) * 1024 * 1024)
+
+
+def single_threaded_worker_init() -> None:
+    """Initializer cho pool tiến trình song song theo tệp/lát.
+
+    Song song theo tệp đã dùng hết CPU; tránh mỗi tiến trình lại mở thêm
+    luồng chiếu hoặc pool khử nhiễu theo ô.
+    """
+
+    os.environ["CT_PROJECTOR_THREADS"] = "1"
+    os.environ["CT_DENOISE_WORKERS"] = "1"
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from .shared_arrays import SharedPickle, discard_shared, dumps_shared, loads_shared
+
+_EXHAUSTED = object()
+
+
+@dataclass
+class TaskOutcome:
+    """Kết quả (hoặc lỗi) của một phần tử, kèm vị trí trong dãy đầu vào."""
+
+    index: int
+    item: Any
+    value: Any = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def spawn_pool(workers: int, initializer: Optional[Callable[[], None]] = None) -> ProcessPoolExecutor:
+    """Pool tiến trình khởi động kiểu ``spawn`` (an toàn khi tiến trình cha có luồng nền)."""
+
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=initializer,
+    )
+
+
+def run_shared(fn: Callable[..., Any], *args: Any) -> SharedPickle:
+    # Kết quả về tiến trình cha qua shared memory thay vì pickle qua pipe.
+    return dumps_shared(fn(*args))
+
+
+def _discard(future: Future) -> None:
+    if not future.cancelled() and future.exception() is None:
+        discard_shared(future.result())
+
+
+def _collect(index: int, item: Any, future: Future, shared: bool) -> TaskOutcome:
+    try:
+        value = future.result()
+        if shared:
+            value = loads_shared(value)
+    except Exception as exc:
+        return TaskOutcome(index, item, error=exc)
+    return TaskOutcome(index, item, value=value)
+
+
+def map_pool(
+    executor: Executor,
+    fn: Callable[..., Any],
+    items: Iterable[Any],
+    *,
+    args: Tuple[Any, ...] = (),
+    max_in_flight: int,
+    ordered: bool = True,
+    shared: bool = False,
+    failed: Optional[Callable[[Any], Optional[Exception]]] = None,
+    cost: Optional[Callable[[Any], int]] = None,
+    max_cost: Optional[int] = None,
+) -> Iterator[TaskOutcome]:
+    """Chạy ``fn(item, *args)`` trên ``executor`` cho từng phần tử, trả từng ``TaskOutcome`` khi xong.
+
+    ``items`` được lấy lười, và chỉ tối đa ``max_in_flight`` phần tử đã gửi
+    mà chưa trả về (kể cả phần tử xong sớm đang chờ tới lượt khi
+    ``ordered``), nên bộ nhớ không tăng theo cỡ lô. Với ``cost``, tổng chi
+    phí ước tính của các phần tử đang chạy không vượt ``max_cost`` (luôn cho
+    ít nhất một phần tử chạy). ``shared=True`` trả kết quả qua shared
+    memory (``run_shared``/``loads_shared``). ``failed(item)`` trả về lỗi
+    có sẵn của phần tử (ví dụ lỗi giải mã): phần tử đó không được gửi đi mà
+    trả về ngay với lỗi này. Lỗi của từng phần tử nằm trong
+    ``TaskOutcome.error``. Đóng generator giữa chừng hủy các phần tử chưa
+    chạy và dọn shared memory của phần tử đang chạy khi chúng xong.
+    """
+
+    source = enumerate(items)
+    in_flight: Dict[Future, Tuple[int, Any, int]] = {}
+    finished: Dict[int, TaskOutcome] = {}
+    held: Any = None
+    reserved = 0
+    next_index = 0
+    try:
+        while True:
+            while len(in_flight) + len(finished) < max_in_flight:
+                if held is None:
+                    held = next(source, _EXHAUSTED)
+                if held is _EXHAUSTED:
+                    break
+                index, item = held
+                error = failed(item) if failed is not None else None
+                if error is not None:
+                    finished[index] = TaskOutcome(index, item, error=error)
+                    held = None
+                    continue
+                weight = cost(item) if cost is not None else 0
+                if max_cost is not None and in_flight and reserved + weight > max_cost:
+                    break
+                held = None
+                try:
+                    future = executor.submit(run_shared, fn, item, *args) if shared else executor.submit(fn, item, *args)
+                except Exception as exc:  # Pool đã hỏng: lỗi thuộc về phần tử này.
+                    finished[index] = TaskOutcome(index, item, error=exc)
+                    continue
+                in_flight[future] = (index, item, weight)
+                reserved += weight
+            if not in_flight and not finished:
+                return
+
+            if in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, item, weight = in_flight.pop(future)
+                    reserved -= weight
+                    finished[index] = _collect(index, item, future, shared)
+            if ordered:
+                ready = []
+                while next_index in finished:
+                    ready.append(finished.pop(next_index))
+                    next_index += 1
+            else:
+                ready = list(finished.values())
+                finished.clear()
+            yield from ready
+    finally:
+        for future in in_flight:
+            if not future.cancel() and shared:
+                future.add_done_callback(_discard)
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+from scipy import sparse
+
+FAN_DETECTORS: tuple[str, ...] = ("equiangular", "equispaced")
+
+
+@dataclass(frozen=True)
+class FanBeamGeometry:
+    """Hình học chùm quạt của sinogram (hàng: đầu dò, cột: vị trí nguồn).
+
+    ``source_distance`` là khoảng cách nguồn – tâm quay (mm), ``fan_angle``
+    là độ mở toàn quạt (độ), ``scan_range`` là cung quét của nguồn (độ), tối
+    thiểu 180° + góc quạt để mọi tia song song đều có dữ liệu.
+    """
+
+    source_distance: float
+    fan_angle: float
+    detector: str = "equiangular"
+    scan_range: float = 360.0
+
+    def __post_init__(self) -> None:
+        if self.detector not in FAN_DETECTORS:
+            raise ValueError(f"Kiểu đầu dò không được hỗ trợ: {self.detector}")
+        if not 0.0 < self.fan_angle < 180.0:
+            raise ValueError("Góc quạt phải nằm trong khoảng (0°, 180°).")
+        if self.source_distance <= 0:
+            raise ValueError("Khoảng cách nguồn phải dương.")
+        if not 180.0 + self.fan_angle <= self.scan_range <= 360.0:
+            # Quét ngắn hơn 180° + góc quạt để lại các tia song song không có dữ liệu.
+            raise ValueError("Cung quét phải từ 180° + góc quạt đến 360°.")
+
+    @property
+    def half_fan(self) -> float:
+        return float(np.deg2rad(self.fan_angle) / 2.0)
+
+    def pixel_size(self, n_detectors: int) -> float:
+        """Bước lấy mẫu (mm) của sinogram song song sau khi chuyển đổi."""
+
+        return self.source_distance * np.sin(self.half_fan) / ((n_detectors - 1) / 2.0)
+
+    def parallel_angle_count(self, n_projections: int) -> int:
+        return max(1, int(round(n_projections * 180.0 / self.scan_range)))
+
+    def _detector_position(self, gamma: np.ndarray, n_detectors: int) -> np.ndarray:
+        """Chỉ số đầu dò (thực) ứng với góc tia ``gamma`` trong quạt."""
+
+        centre = (n_detectors - 1) / 2.0
+        if self.detector == "equiangular":
+            return gamma / (2.0 * self.half_fan / (n_detectors - 1)) + centre
+        return np.tan(gamma) / (2.0 * np.tan(self.half_fan) / (n_detectors - 1)) + centre
+
+
+@lru_cache(maxsize=16)
+def _rebinning_operator(
+    geometry: FanBeamGeometry,
+    n_detectors: int,
+    n_projections: int,
+) -> tuple[sparse.csr_matrix, np.ndarray]:
+    """Ma trận nội suy song tuyến tính quạt → song song, dựng một lần cho mỗi hình học."""
+
+    n_theta = geometry.parallel_angle_count(n_projections)
+    theta = np.arange(n_theta) * (np.pi / n_theta)
+    scan = np.deg2rad(geometry.scan_range)
+    full_scan = np.isclose(geometry.scan_range, 360.0)
+    beta_step = scan / n_projections if full_scan else scan / max(n_projections - 1, 1)
+
+    # Tia song song (θ, s) là tia quạt (β = θ − γ, γ = arcsin(s / D)).
+    s_norm = (np.arange(n_detectors) - (n_detectors - 1) / 2.0) * (
+        np.sin(geometry.half_fan) / ((n_detectors - 1) / 2.0)
+    )
+    gamma = np.broadcast_to(np.arcsin(np.clip(s_norm, -1.0, 1.0))[:, None], (n_detectors, n_theta))
+    beta = theta[None, :] - gamma
+
+    if full_scan:
+        beta = np.mod(beta, 2.0 * np.pi)
+    else:
+        # Quét ngắn: tia nào nằm ngoài cung quét thì dùng tia liên hợp (θ + π, −s).
+        beta = np.mod(beta, 2.0 * np.pi)
+        conjugate_beta = np.mod(theta[None, :] + np.pi + gamma, 2.0 * np.pi)
+        use_conjugate = beta > scan
+        beta = np.where(use_conjugate, conjugate_beta, beta)
+        gamma = np.where(use_conjugate, -gamma, gamma)
+
+    detector = geometry._detector_position(gamma, n_detectors)
+    projection = beta / beta_step
+
+    k0 = np.floor(detector)
+    fk = detector - k0
+    b0 = np.floor(projection)
+    fb = projection - b0
+    k0 = k0.astype(np.int64)
+    b0 = b0.astype(np.int64)
+    k1 = k0 + 1
+    b1 = b0 + 1
+    if full_scan:
+        b0 %= n_projections
+        b1 %= n_projections
+
+    taps = []
+    for k, wk in ((k0, 1.0 - fk), (k1, fk)):
+        for b, wb in ((b0, 1.0 - fb), (b1, fb)):
+            valid = (k >= 0) & (k < n_detectors) & (b >= 0) & (b < n_projections)
+            index = np.clip(k, 0, n_detectors - 1) * n_projections + np.clip(b, 0, n_projections - 1)
+            taps.append((index, np.where(valid, wk * wb, 0.0)))
+
+    indices = np.stack([index.ravel() for index, _ in taps], axis=1)
+    weights = np.stack([weight.ravel() for _, weight in taps], axis=1)
+    n_rays = n_detectors * n_theta
+    matrix = sparse.csr_matrix(
+        (weights.ravel().astype(np.float32), indices.ravel(), np.arange(n_rays + 1) * 4),
+        shape=(n_rays, n_detectors * n_projections),
+    )
+    matrix.eliminate_zeros()
+    return matrix, np.rad2deg(theta)
+
+
+def rebin_to_parallel(
+    sinogram: np.ndarray,
+    geometry: FanBeamGeometry,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Chuyển sinogram quạt (đầu dò × nguồn) sang song song (đầu dò × θ ∈ [0°, 180°)).
+
+    Toàn bộ tia được nội suy trong một phép nhân ma trận thưa; ma trận được
+    lưu lại theo (hình học, số đầu dò, số vị trí nguồn) nên các sinogram cùng
+    máy quét không phải tính lại bản đồ nội suy.
+    """
+
+    n_detectors, n_projections = sinogram.shape
+    if n_detectors < 2 or n_projections < 2:
+        raise ValueError("Sinogram quạt cần ít nhất 2 đầu dò và 2 vị trí nguồn.")
+
+    matrix, theta = _rebinning_operator(geometry, n_detectors, n_projections)
+    values = matrix @ np.ascontiguousarray(sinogram, dtype=np.float32).ravel()
+    return values.reshape(n_detectors, len(theta)), theta
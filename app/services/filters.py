@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Callable, Dict
+
+import numpy as np
+
+# Hàm cửa sổ nhận tần số chuẩn hóa u = |f| / (cutoff · Nyquist) ∈ [0, 1]
+# và trả về hệ số nhân lên bộ lọc ramp; ngoài u > 1 đáp ứng bằng 0.
+Window = Callable[[np.ndarray], np.ndarray]
+
+FILTERS: Dict[str, Window] = {
+    "ramp": lambda u: np.ones_like(u),
+    "shepp-logan": lambda u: np.sinc(u / 2.0),
+    "cosine": lambda u: np.cos(np.pi * u / 2.0),
+    "hamming": lambda u: 0.54 + 0.46 * np.cos(np.pi * u),
+    "hann": lambda u: 0.5 + 0.5 * np.cos(np.pi * u),
+}
+
+
+def register_filter(name: str, window: Window) -> None:
+    """Thêm (hoặc thay) một cửa sổ lọc tùy chỉnh vào bảng bộ lọc FBP."""
+
+    FILTERS[name] = window
+    frequency_response.cache_clear()
+
+
+def validate_filter(filter_name: str, cutoff: float = 1.0) -> None:
+    if filter_name not in FILTERS:
+        raise ValueError(f"Bộ lọc không được hỗ trợ: {filter_name}")
+    if not 0.0 < cutoff <= 1.0:
+        raise ValueError("Tần số cắt phải nằm trong khoảng (0, 1].")
+
+
+def _ramp_response(size: int) -> np.ndarray:
+    n = np.concatenate(
+        (
+            np.arange(1, size / 2 + 1, 2, dtype=int),
+            np.arange(size / 2 - 1, 0, -2, dtype=int),
+        )
+    )
+    kernel = np.zeros(size)
+    kernel[0] = 0.25
+    kernel[1::2] = -1 / (np.pi * n) ** 2
+    return 2 * np.real(np.fft.fft(kernel))
+
+
+@lru_cache(maxsize=64)
+def frequency_response(size: int, filter_name: str = "hann", cutoff: float = 1.0) -> np.ndarray:
+    """Đáp ứng tần số một nửa (cho rfft) của bộ lọc FBP, lưu theo (độ dài đệm, bộ lọc, cutoff).
+
+    Mảng trả về dùng chung giữa các lần gọi nên được khóa chỉ đọc.
+    """
+
+    validate_filter(filter_name, cutoff)
+    u = np.abs(np.fft.fftfreq(size)) / (0.5 * cutoff)
+    window = np.where(u <= 1.0, FILTERS[filter_name](np.minimum(u, 1.0)), 0.0)
+    response = _ramp_response(size) * window
+
+    # Phần thực của ifft(F·H) với F hermit chỉ phụ thuộc phần đối xứng của H,
+    # nên đối xứng hóa để rfft cho kết quả trùng với skimage.iradon.
+    symmetric = 0.5 * (response + np.roll(response[::-1], 1))
+    half = np.ascontiguousarray(symmetric[: size // 2 + 1])
+    half.flags.writeable = False
+    return half
@@ -0,0 +1,377 @@
+from __future__ import annotations
+
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .assets import THUMBNAIL_SIZE, encode_image
+from .env import env_mb
+from .stages import freeze_arrays, iter_arrays, payload_nbytes
+
+HISTORY_TIERS: tuple[str, ...] = ("ram", "compressed", "disk")
+
+_DEFAULT_RAM_MB = 128
+_DEFAULT_COMPRESSED_MB = 128
+_DEFAULT_DISK_MB = 2048
+_DEFAULT_TOTAL_MB = 1024
+# zlib mức 1: nén nhanh, ảnh uint8 và sinogram vẫn giảm đáng kể.
+_COMPRESS_LEVEL = 1
+
+
+@dataclass(eq=False)
+class HistoryEntry:
+    """Một kết quả trong lịch sử phiên, nằm ở một trong ba tầng lưu trữ.
+
+    ``name``, ``kind``, ``nbytes`` và ảnh nhỏ ``thumbnail`` (JPEG của lát
+    tái tạo) luôn có sẵn để hiển thị danh sách hoặc lưới mà không cần nạp
+    lại kết quả; bản thân kết quả lấy qua ``HistoryStore.load``.
+    """
+
+    id: str
+    kind: str
+    name: str
+    nbytes: int
+    tier: str = "ram"
+    stored_bytes: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+    thumbnail: Optional[bytes] = field(default=None, repr=False)
+    _value: Any = field(default=None, repr=False)
+    _blob: Optional[bytes] = field(default=None, repr=False)
+    _path: Optional[Path] = field(default=None, repr=False)
+    # Tham chiếu yếu tới các mảng của kết quả đã bị hạ khỏi RAM: nếu nơi
+    # khác (cache kết quả dùng chung) vẫn giữ chúng, bộ nhớ chưa được nhả.
+    _shared: Tuple["weakref.ref[np.ndarray]", ...] = field(default=(), repr=False)
+
+
+class HistoryStore:
+    """Lịch sử kết quả của một phiên, chia ba tầng theo thời điểm dùng gần nhất.
+
+    Kết quả mới nằm nguyên trong RAM (``max_ram_bytes``); kết quả cũ hơn
+    được pickle và nén zlib trong bộ nhớ (``max_compressed_bytes``); cũ hơn
+    nữa được ghi xuống ``directory`` (``max_disk_bytes``, vượt thì bỏ kết
+    quả cũ nhất). ``load`` nạp lại kết quả về RAM khi người dùng mở thẻ.
+    Thư mục tràn đĩa là riêng của phiên và bị xóa khi kho bị thu hồi.
+
+    Kho là nơi duy nhất của phiên giữ kết quả: giao diện chỉ giữ các mục
+    (xem ``view``) nên hạ bậc thực sự nhả bộ nhớ. Mảng của kết quả đã hạ bậc
+    mà vẫn còn sống ở nơi khác (ví dụ tầng RAM của cache kết quả) được tính
+    vào ``memory_bytes`` như bộ nhớ dùng chung cho tới khi được thu hồi.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_ram_bytes: int = _DEFAULT_RAM_MB * 1024 * 1024,
+        max_compressed_bytes: int = _DEFAULT_COMPRESSED_MB * 1024 * 1024,
+        max_disk_bytes: int = _DEFAULT_DISK_MB * 1024 * 1024,
+        directory: Optional[Path] = None,
+        budget: Optional["HistoryBudget"] = None,
+    ) -> None:
+        self.max_ram_bytes = int(max_ram_bytes)
+        self.max_compressed_bytes = int(max_compressed_bytes)
+        self.max_disk_bytes = int(max_disk_bytes)
+        root = Path(directory) if directory else Path(tempfile.gettempdir()) / "ct-history"
+        self.directory = root / uuid.uuid4().hex
+        self.dropped = 0
+        self._entries: List[HistoryEntry] = []
+        self._tier_bytes = {tier: 0 for tier in HISTORY_TIERS}
+        self._lock = threading.RLock()
+        self._budget = budget
+        weakref.finalize(self, shutil.rmtree, str(self.directory), True)
+        if budget is not None:
+            budget.register(self)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, entry: object) -> bool:
+        with self._lock:
+            return any(item is entry for item in self._entries)
+
+    def entries(self, kind: Optional[str] = None) -> List[HistoryEntry]:
+        """Các mục theo thứ tự thêm vào (cũ trước), lọc theo loại nếu có."""
+
+        with self._lock:
+            return [entry for entry in self._entries if kind is None or entry.kind == kind]
+
+    def count(self, kind: Optional[str] = None) -> int:
+        return len(self.entries(kind))
+
+    def add(self, kind: str, results: Iterable[Any]) -> List[HistoryEntry]:
+        added = []
+        with self._lock:
+            for result in results:
+                freeze_arrays(result)
+                nbytes = payload_nbytes(result)
+                entry = HistoryEntry(
+                    id=uuid.uuid4().hex[:12],
+                    kind=kind,
+                    name=getattr(result, "name", ""),
+                    nbytes=nbytes,
+                    stored_bytes=nbytes,
+                    thumbnail=_thumbnail(result),
+                    _value=result,
+                )
+                self._entries.append(entry)
+                self._tier_bytes["ram"] += nbytes
+                added.append(entry)
+            self._enforce(keep=added[-1] if added else None)
+        self._enforce_budget()
+        return added
+
+    def load(self, entry: HistoryEntry) -> Any:
+        """Trả về kết quả của ``entry``, giải nén hoặc đọc từ đĩa về RAM nếu cần."""
+
+        with self._lock:
+            entry.last_used = time.monotonic()
+            if entry.tier == "ram":
+                return entry._value
+            if entry.tier == "disk":
+                if entry._path is None:
+                    raise ValueError("Mục lịch sử đã bị loại khỏi kho.")
+                blob = entry._path.read_bytes()
+                entry._path.unlink(missing_ok=True)
+                entry._path = None
+            else:
+                blob = entry._blob
+                entry._blob = None
+            value = pickle.loads(zlib.decompress(blob))
+            freeze_arrays(value)
+            self._move(entry, "ram", entry.nbytes)
+            entry._value = value
+            entry._shared = ()
+            self._enforce(keep=entry)
+        self._enforce_budget()
+        return value
+
+    def remove(self, kind: Optional[str] = None) -> None:
+        """Xóa các mục (của một loại, hoặc tất cả) cùng tệp tràn đĩa của chúng."""
+
+        with self._lock:
+            kept = []
+            for entry in self._entries:
+                if kind is not None and entry.kind != kind:
+                    kept.append(entry)
+                    continue
+                self._tier_bytes[entry.tier] -= entry.stored_bytes
+                if entry._path is not None:
+                    entry._path.unlink(missing_ok=True)
+                entry._value = entry._blob = entry._path = None
+                entry._shared = ()
+            self._entries = kept
+
+    def view(self, entries: Sequence[HistoryEntry]) -> "HistoryView":
+        """Dãy kết quả của ``entries`` (bỏ mục đã bị loại), nạp lại từng kết quả khi được truy cập."""
+
+        return HistoryView(self, [entry for entry in entries if entry in self])
+
+    def memory_bytes(self) -> int:
+        """Dung lượng đang chiếm trong bộ nhớ: tầng RAM, tầng nén và mảng dùng chung còn sống."""
+
+        with self._lock:
+            return self._tier_bytes["ram"] + self._tier_bytes["compressed"] + self._shared_bytes()
+
+    def _shared_bytes(self) -> int:
+        alive: Dict[int, int] = {}
+        for entry in self._entries:
+            for ref in entry._shared:
+                array = ref()
+                if array is not None:
+                    alive[id(array)] = int(array.nbytes)
+        return sum(alive.values())
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            stats = {"entries": len(self._entries), "dropped": self.dropped, "shared_bytes": self._shared_bytes()}
+            for tier in HISTORY_TIERS:
+                stats[f"{tier}_entries"] = sum(1 for entry in self._entries if entry.tier == tier)
+                stats[f"{tier}_bytes"] = self._tier_bytes[tier]
+            stats["max_ram_bytes"] = self.max_ram_bytes
+            stats["max_compressed_bytes"] = self.max_compressed_bytes
+            stats["max_disk_bytes"] = self.max_disk_bytes
+            return stats
+
+    def demote_oldest(self) -> bool:
+        """Hạ một bậc mục ít dùng nhất còn trong bộ nhớ; dùng cho giới hạn chung mọi phiên."""
+
+        with self._lock:
+            entry = self._oldest(("ram", "compressed"))
+            if entry is None:
+                return False
+            self._demote(entry)
+            self._enforce()
+            return True
+
+    def oldest_in_memory(self) -> Optional[float]:
+        with self._lock:
+            entry = self._oldest(("ram", "compressed"))
+            return None if entry is None else entry.last_used
+
+    def _oldest(self, tiers: Tuple[str, ...], keep: Optional[HistoryEntry] = None) -> Optional[HistoryEntry]:
+        candidates = [entry for entry in self._entries if entry.tier in tiers and entry is not keep]
+        return min(candidates, key=lambda entry: entry.last_used, default=None)
+
+    def _move(self, entry: HistoryEntry, tier: str, stored_bytes: int) -> None:
+        self._tier_bytes[entry.tier] -= entry.stored_bytes
+        self._tier_bytes[tier] += stored_bytes
+        entry.tier = tier
+        entry.stored_bytes = stored_bytes
+
+    def _demote(self, entry: HistoryEntry) -> None:
+        if entry.tier == "ram":
+            entry._blob = zlib.compress(pickle.dumps(entry._value, protocol=pickle.HIGHEST_PROTOCOL), _COMPRESS_LEVEL)
+            arrays = {id(array): array for array in iter_arrays(entry._value)}
+            entry._shared = tuple(weakref.ref(array) for array in arrays.values())
+            entry._value = None
+            self._move(entry, "compressed", len(entry._blob))
+        elif entry.tier == "compressed":
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                path = self.directory / f"{entry.id}.bin"
+                path.write_bytes(entry._blob)
+            except OSError:
+                # Không ghi được xuống đĩa thì bỏ mục thay vì vượt giới hạn bộ nhớ.
+                self._drop(entry)
+                return
+            entry._path = path
+            entry._blob = None
+            self._move(entry, "disk", entry.stored_bytes)
+
+    def _drop(self, entry: HistoryEntry) -> None:
+        self._tier_bytes[entry.tier] -= entry.stored_bytes
+        if entry._path is not None:
+            entry._path.unlink(missing_ok=True)
+        entry._value = entry._blob = entry._path = None
+        entry._shared = ()
+        self._entries.remove(entry)
+        self.dropped += 1
+
+    def _enforce(self, keep: Optional[HistoryEntry] = None) -> None:
+        # ``keep`` (mục vừa thêm/vừa mở) không bị hạ bậc dù một mình vượt giới hạn.
+        limits = (("ram", self.max_ram_bytes), ("compressed", self.max_compressed_bytes))
+        for tier, limit in limits:
+            while self._tier_bytes[tier] > limit:
+                entry = self._oldest((tier,), keep)
+                if entry is None:
+                    break
+                self._demote(entry)
+        while self._tier_bytes["disk"] > self.max_disk_bytes:
+            entry = self._oldest(("disk",), keep)
+            if entry is None:
+                break
+            self._drop(entry)
+
+    def _enforce_budget(self) -> None:
+        # Gọi sau khi đã nhả khóa của kho để hai phiên không chờ khóa của nhau.
+        if self._budget is not None:
+            self._budget.enforce()
+
+
+class HistoryView(Sequence[Any]):
+    """Dãy chỉ đọc các kết quả của một nhóm mục lịch sử, nạp qua ``HistoryStore.load``.
+
+    Giao diện giữ dãy này thay cho chính các kết quả, nên chỉ những kết quả
+    đang được hiển thị mới phải nằm trong RAM.
+    """
+
+    def __init__(self, store: HistoryStore, entries: List[HistoryEntry]) -> None:
+        self._store = store
+        self._entries = entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [self._store.load(entry) for entry in self._entries[index]]
+        return self._store.load(self._entries[index])
+
+
+def _thumbnail(result: Any) -> Optional[bytes]:
+    reconstruction = getattr(result, "reconstruction", None)
+    if not isinstance(reconstruction, np.ndarray) or reconstruction.ndim not in (2, 3):
+        return None
+    return encode_image(reconstruction, "JPEG", max_side=THUMBNAIL_SIZE)
+
+
+class HistoryBudget:
+    """Giới hạn chung bộ nhớ lịch sử của mọi phiên Streamlit trong tiến trình.
+
+    Khi tổng ``memory_bytes`` của các kho (tầng RAM, tầng nén và mảng dùng
+    chung còn sống) vượt ``max_bytes``, mục ít dùng nhất trong toàn bộ các
+    phiên bị hạ một bậc, cho tới khi không còn mục nào trong bộ nhớ để hạ.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = int(max_bytes)
+        self._stores: "weakref.WeakSet[HistoryStore]" = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def register(self, store: HistoryStore) -> None:
+        with self._lock:
+            self._stores.add(store)
+
+    def stores(self) -> List[HistoryStore]:
+        with self._lock:
+            return list(self._stores)
+
+    def memory_bytes(self) -> int:
+        return sum(store.memory_bytes() for store in self.stores())
+
+    def enforce(self) -> None:
+        with self._lock:
+            while True:
+                stores = list(self._stores)
+                if sum(store.memory_bytes() for store in stores) <= self.max_bytes:
+                    return
+                ages: Dict[HistoryStore, float] = {}
+                for store in stores:
+                    oldest = store.oldest_in_memory()
+                    if oldest is not None:
+                        ages[store] = oldest
+                if not ages or not min(ages, key=ages.__getitem__).demote_oldest():
+                    return
+
+
+_DEFAULT_BUDGET: Optional[HistoryBudget] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_history_budget() -> HistoryBudget:
+    """Giới hạn chung cho cả tiến trình; ``CT_HISTORY_TOTAL_MB`` (mặc định 1024 MB)."""
+
+    global _DEFAULT_BUDGET
+    with _DEFAULT_LOCK:
+        if _DEFAULT_BUDGET is None:
+            _DEFAULT_BUDGET = HistoryBudget(env_mb("CT_HISTORY_TOTAL_MB", _DEFAULT_TOTAL_MB))
+        return _DEFAULT_BUDGET
+
+
+def new_history_store() -> HistoryStore:
+    """Kho lịch sử cho một phiên mới, cấu hình qua biến môi trường.
+
+    ``CT_HISTORY_MB`` giới hạn tầng RAM (mặc định 128 MB),
+    ``CT_HISTORY_COMPRESSED_MB`` tầng nén (mặc định 128 MB),
+    ``CT_HISTORY_DISK_MB`` tầng đĩa (mặc định 2048 MB) và ``CT_HISTORY_DIR``
+    đặt thư mục tràn đĩa (mặc định thư mục tạm của hệ thống).
+    """
+
+    directory = os.environ.get("CT_HISTORY_DIR", "").strip() or None
+    return HistoryStore(
+        max_ram_bytes=env_mb("CT_HISTORY_MB", _DEFAULT_RAM_MB),
+        max_compressed_bytes=env_mb("CT_HISTORY_COMPRESSED_MB", _DEFAULT_COMPRESSED_MB),
+        max_disk_bytes=env_mb("CT_HISTORY_DISK_MB", _DEFAULT_DISK_MB),
+        directory=Path(directory) if directory else None,
+        budget=default_history_budget(),
+    )
@@ -1,85 +1,165 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Callable, Optional, Tuple
+import os
+from dataclasses import dataclass, field
+from typing import Callable, Optional, Sequence, Tuple
 
 import cv2
 import numpy as np
-from skimage import exposure, restoration
-from skimage.transform import iradon, radon
+
+from .contrast import DEFAULT_EQUALIZATION, equalize
+from .denoise import DEFAULT_DENOISE, denoise, denoise_adaptive, get_backend
+from .fanbeam import FanBeamGeometry, rebin_to_parallel
+from .fbp import RegionOfInterest, default_output_size, fbp_progressive, fbp_reconstruct
+from .filters import validate_filter
+from .iterative import ITERATIVE_METHODS, IterativeSettings, iterative_reconstruct
+from .operator_cache import OperatorCache, default_operator_cache
+from .projector import forward_project
+from .sparse_view import SparseViewSettings, angular_error, decimate_angles
 
 ProgressCallback = Optional[Callable[[float, str], None]]
+PreviewCallback = Optional[Callable[[np.ndarray, str], None]]
+
+# Kiểu số thực dùng cho toàn bộ chuỗi tính toán; float32 giảm một nửa
+# băng thông bộ nhớ và bộ nhớ đỉnh so với float64 mà sai số không đáng kể.
+COMPUTE_DTYPE = np.float32
+
+# Ngân sách hiệu năng: cạnh dài tối đa của ảnh đưa vào phép chiếu Radon
+# (cũng là kích thước ảnh tái tạo). Đổi qua ``CT_SINOGRAM_MAX_SIZE``.
+SINOGRAM_MAX_SIZE = int(os.environ.get("CT_SINOGRAM_MAX_SIZE", "256"))
+
+# Kích thước các ảnh xem trước khi tái tạo lũy tiến (thô → mịn).
+PREVIEW_LEVELS: Tuple[int, ...] = (64, 128)
+
+RECONSTRUCTION_METHODS: Tuple[str, ...] = ("fbp",) + ITERATIVE_METHODS
 
+_STOP_REASONS = {
+    "tolerance": "Đạt ngưỡng sai số",
+    "time_budget": "Hết thời gian cho phép",
+    "max_iterations": "Đủ số vòng lặp",
+}
 
-@dataclass
+
+@dataclass(slots=True)
 class SinogramResult:
-    """Gói dữ liệu sinogram để sử dụng cho hiển thị và tái tạo."""
+    """Gói dữ liệu sinogram để sử dụng cho hiển thị và tái tạo.
+
+    ``raw`` là sinogram float32 dùng để tái tạo. Ảnh hiển thị uint8 chỉ được
+    tạo từ ``raw`` khi cần lần đầu rồi giữ lại; ``source_image`` là ảnh tải
+    lên khi nó khác ``raw`` (sinogram chùm quạt trước khi đổi sang song song).
+    """
 
     raw: np.ndarray
     theta: np.ndarray
-    display: np.ndarray
     original_shape: tuple[int, int]
+    circle: bool = False
+    source_image: Optional[np.ndarray] = None
+    _display: Optional[np.ndarray] = field(default=None, init=False, repr=False, compare=False)
 
     @property
-    def image(self) -> np.ndarray:
+    def display(self) -> np.ndarray:
         """Ảnh sinogram đã chuẩn hóa để hiển thị."""
-        return self.display
+        if self.source_image is not None:
+            return self.source_image
+        if self._display is None:
+            self._display = _to_uint8(self.raw)
+        return self._display
 
+    @property
+    def image(self) -> np.ndarray:
+        return self.display
 
-def preprocess_and_denoise(img_gray: np.ndarray, progress_callback: ProgressCallback = None) -> np.ndarray:
-    """Tiền xử lý và khử nhiễu ảnh grayscale (uint8)."""
 
+def preprocess_and_denoise(
+    img_gray: np.ndarray,
+    progress_callback: ProgressCallback = None,
+    *,
+    dtype: np.dtype = COMPUTE_DTYPE,
+    denoise_backend: str = DEFAULT_DENOISE,
+    equalization: str = DEFAULT_EQUALIZATION,
+    adaptive: bool = False,
+    report: Optional[dict[str, str]] = None,
+) -> np.ndarray:
+    """Tiền xử lý và khử nhiễu ảnh grayscale bằng backend ``denoise_backend``.
+
+    Ảnh vào là uint8 hoặc uint16 (DICOM 16-bit được cân bằng histogram ở
+    đúng độ sâu gốc); ảnh trả về luôn là uint8. ``adaptive`` (mặc định tắt,
+    giữ tham số cố định của backend) ước lượng nhiễu trước để bỏ qua ảnh
+    sạch hoặc tinh chỉnh tham số, quyết định được ghi vào ``report``.
+    """
+
+    get_backend(denoise_backend)
     if progress_callback:
         progress_callback(0.1, "Đang chuẩn bị ảnh...")
 
-    img = img_gray.astype(np.float32) / 255.0
-
     if progress_callback:
         progress_callback(0.3, "Đang cân bằng histogram...")
 
-    eq = exposure.equalize_adapthist(img, clip_limit=0.02)
+    eq = equalize(img_gray, backend=equalization, dtype=dtype)
 
     if progress_callback:
         progress_callback(0.5, "Đang khử nhiễu ảnh...")
 
-    denoised = restoration.denoise_nl_means(
-        eq,
-        patch_size=3,
-        patch_distance=4,
-        h=0.05,
-        channel_axis=None,
-    )
+    if adaptive:
+        denoised = denoise_adaptive(eq, denoise_backend, report=report)
+    else:
+        denoised = denoise(eq, denoise_backend)
 
     if progress_callback:
         progress_callback(0.8, "Hoàn tất xử lý...")
 
-    return (denoised * 255).astype(np.uint8)
+    return cv2.convertScaleAbs(denoised, alpha=255.0)
 
 
-def create_sinogram(img_gray: np.ndarray, progress_callback: ProgressCallback = None) -> SinogramResult:
-    """Tạo sinogram từ ảnh grayscale đã xử lý."""
+def sinogram_input_shape(shape: Tuple[int, int], max_size: Optional[int] = None) -> Tuple[int, int]:
+    """Kích thước ảnh đưa vào phép chiếu Radon (cũng là kích thước ảnh tái tạo)."""
+
+    h, w = shape
+    max_size = max_size or SINOGRAM_MAX_SIZE
+    scale = min(max_size / h, max_size / w, 1.0)
+    if scale == 1.0:
+        return (h, w)
+    return (int(h * scale), int(w * scale))
+
+
+def create_sinogram(
+    img_gray: np.ndarray,
+    progress_callback: ProgressCallback = None,
+    *,
+    dtype: np.dtype = COMPUTE_DTYPE,
+    max_size: Optional[int] = None,
+    circle: bool = False,
+    workers: Optional[int] = None,
+    operator_cache: Optional[OperatorCache] = None,
+) -> SinogramResult:
+    """Tạo sinogram từ ảnh grayscale đã xử lý.
+
+    Ảnh được thu nhỏ để cạnh dài không vượt ``max_size`` (mặc định
+    ``SINOGRAM_MAX_SIZE``). ``circle=True`` coi vật nằm trong vòng tròn nội
+    tiếp nên sinogram chỉ rộng bằng cạnh ảnh thay vì đường chéo.
+    """
 
     if progress_callback:
         progress_callback(0.85, "Đang tạo sinogram...")
 
-    max_size = 256
     h, w = img_gray.shape
-    scale = min(max_size / h, max_size / w, 1.0)
-    resized = img_gray if scale == 1.0 else cv2.resize(
+    out_h, out_w = sinogram_input_shape(img_gray.shape, max_size)
+    resized = img_gray if (out_h, out_w) == (h, w) else cv2.resize(
         img_gray,
-        (int(w * scale), int(h * scale)),
+        (out_w, out_h),
         interpolation=cv2.INTER_AREA,
     )
 
-    img = resized.astype(np.float32) / 255.0
+    img = resized.astype(dtype)
+    img *= 1.0 / 255.0
     theta = np.linspace(0.0, 180.0, max(img.shape), endpoint=False)
-    sino_raw = radon(img, theta=theta, circle=False)
-
-    # Chuẩn hóa để hiển thị
-    sino_display = sino_raw - np.min(sino_raw)
-    if np.max(sino_display) > 0:
-        sino_display = sino_display / np.max(sino_display)
-    sino_display = (sino_display * 255).astype(np.uint8)
+    sino_raw = forward_project(
+        img,
+        theta,
+        circle=circle,
+        workers=workers,
+        operator_cache=operator_cache,
+    ).astype(dtype, copy=False)
 
     if progress_callback:
         progress_callback(0.95, "Hoàn thành sinogram")
@@ -87,8 +167,8 @@ def create_sinogram(img_gray: np.ndarray, progress_callback: ProgressCallback =
     return SinogramResult(
         raw=sino_raw,
         theta=theta,
-        display=sino_display,
         original_shape=resized.shape,
+        circle=circle,
     )
 
 
@@ -96,48 +176,170 @@ def sinogram_from_image_array(
     sinogram_img: np.ndarray,
     *,
     target_shape: Optional[Tuple[int, int]] = None,
+    geometry: Optional[FanBeamGeometry] = None,
 ) -> SinogramResult:
-    sinogram_float = sinogram_img.astype(np.float32)
+    """Đóng gói sinogram tải lên; sinogram chùm quạt được chuyển sang song song."""
+
+    sinogram_float = sinogram_img.astype(COMPUTE_DTYPE)
     if sinogram_float.max() > 1.0:
         sinogram_float /= 255.0
 
-    angles = np.linspace(0.0, 180.0, sinogram_float.shape[1], endpoint=False)
+    if geometry is not None:
+        sinogram_float, angles = rebin_to_parallel(sinogram_float, geometry)
+    else:
+        angles = np.linspace(0.0, 180.0, sinogram_float.shape[1], endpoint=False)
     if target_shape is None:
         side = int(sinogram_float.shape[0])
         target_shape = (side, side)
 
-    display = sinogram_img.astype(np.uint8)
-
     return SinogramResult(
         raw=sinogram_float,
         theta=angles,
-        display=display,
         original_shape=target_shape,
+        # Sinogram chùm quạt hiển thị đúng ảnh đã tải lên; sinogram song song
+        # hiển thị lại từ ``raw`` nên không cần giữ thêm bản uint8.
+        source_image=np.asarray(sinogram_img, dtype=np.uint8) if geometry is not None else None,
     )
 
 
-def reconstruct_image(sinogram: SinogramResult, progress_callback: ProgressCallback = None) -> np.ndarray:
-    """Tái tạo ảnh từ sinogram bằng chiếu ngược có lọc (Filtered Back Projection)."""
+def _scaled_progress(progress_callback: ProgressCallback, start: float, end: float) -> ProgressCallback:
+    if progress_callback is None:
+        return None
 
-    if progress_callback:
-        progress_callback(0.97, "Đang tái tạo ảnh CT...")
+    def _update(value: float, text: str) -> None:
+        progress_callback(start + (end - start) * value, text)
 
-    reconstruction = iradon(
-        sinogram.raw,
-        theta=sinogram.theta,
-        filter_name="hann",
-        circle=False,
-    )
+    return _update
+
+
+def _to_uint8(image: np.ndarray) -> np.ndarray:
+    """Chuẩn hóa min-max về thang 0-255 và lượng tử hóa trong cùng một lượt.
+
+    Một lượt ``minMaxLoc`` lấy biên, một lượt ``convertScaleAbs`` vừa co giãn
+    vừa làm tròn bão hòa về uint8, không cấp phát mảng số thực trung gian.
+    """
+
+    low, high, _, _ = cv2.minMaxLoc(image)
+    scale = 255.0 / (high - low) if high > low else 0.0
+    return cv2.convertScaleAbs(image, alpha=scale, beta=-low * scale)
+
+
+def reconstruct_image(
+    sinogram: SinogramResult,
+    progress_callback: ProgressCallback = None,
+    *,
+    method: str = "fbp",
+    filter_name: str = "hann",
+    filter_cutoff: float = 1.0,
+    interpolation: str = "linear",
+    iterative: Optional[IterativeSettings] = None,
+    sparse_view: Optional[SparseViewSettings] = None,
+    roi: Optional[RegionOfInterest] = None,
+    dtype: np.dtype = COMPUTE_DTYPE,
+    operator_cache: Optional[OperatorCache] = None,
+    progress_range: Tuple[float, float] = (0.97, 1.0),
+    report: Optional[dict[str, str]] = None,
+    preview_callback: PreviewCallback = None,
+    preview_levels: Sequence[int] = PREVIEW_LEVELS,
+) -> np.ndarray:
+    """Tái tạo ảnh từ sinogram bằng FBP hoặc thuật toán lặp (SIRT/SART/OS-SART).
+
+    Mặc định dùng bộ nhớ đệm toán tử chung của tiến trình: thuật toán lặp
+    dùng lại ma trận chiếu đã dựng, FBP dùng lại kế hoạch gather (chỉ số và
+    trọng số nội suy) của hình học lặp lại, hoặc ma trận CSR nếu bật qua
+    ``CT_OPERATOR_MATRIX_MB``. Nếu truyền ``report``,
+    các thông số tái tạo được ghi thêm vào dict đó. Khi có
+    ``preview_callback``, ảnh xem trước FBP cỡ ``preview_levels`` (uint8)
+    được gửi ra ngay khi xong, trước ảnh đầy đủ. ``sparse_view`` bật chế độ
+    nhanh chỉ tái tạo từ một phần góc chiếu. Với ``roi`` (chỉ FBP), ảnh trả
+    về là vùng quan tâm ở độ phân giải yêu cầu thay vì toàn ảnh.
+    """
+
+    if method not in RECONSTRUCTION_METHODS:
+        raise ValueError(f"Phương pháp tái tạo không được hỗ trợ: {method}")
+    if roi is not None and method != "fbp":
+        raise ValueError("Tái tạo vùng quan tâm chỉ hỗ trợ FBP.")
+    validate_filter(filter_name, filter_cutoff)
+
+    start, end = progress_range
+    if progress_callback:
+        progress_callback(start, "Đang tái tạo ảnh CT...")
+
+    cache = operator_cache if operator_cache is not None else default_operator_cache()
+    raw, theta = sinogram.raw.astype(dtype, copy=False), sinogram.theta
+    if sparse_view is not None:
+        raw, theta = decimate_angles(raw, theta, sparse_view)
+        if report is not None:
+            n_angles = len(sinogram.theta)
+            report["Góc chiếu"] = f"{len(theta)}/{n_angles}"
+            report["Tăng tốc ước tính"] = f"×{n_angles / len(theta):.1f}"
+            report["Sai số góc"] = f"{angular_error(sinogram.raw, sinogram.theta, sparse_view):.2%}"
+    # Sinogram vòng tròn nội tiếp phủ đúng lưới cạnh bằng số đầu dò.
+    output_size = raw.shape[0] if sinogram.circle else default_output_size(raw.shape[0])
+    reconstruction: Optional[np.ndarray] = None
+    if preview_callback is not None and roi is None:
+        # Các mức thô dùng chung phép lọc với ảnh FBP đầy đủ (mức cuối).
+        for level, image in fbp_progressive(
+            raw,
+            theta,
+            preview_levels,
+            filter_name=filter_name,
+            cutoff=filter_cutoff,
+            interpolation=interpolation,
+            output_size=output_size,
+            operator_cache=cache,
+            include_final=method == "fbp",
+        ):
+            if level == output_size:
+                reconstruction = image
+                continue
+            preview_callback(_to_uint8(image), f"Xem trước {level}×{level}")
+
+    if method == "fbp":
+        grid = None
+        if roi is not None:
+            grid = roi.grid(sinogram.original_shape, output_size)
+        if reconstruction is None:
+            reconstruction = fbp_reconstruct(
+                raw,
+                theta,
+                filter_name=filter_name,
+                cutoff=filter_cutoff,
+                interpolation=interpolation,
+                output_size=output_size,
+                grid=grid,
+                operator_cache=cache,
+            )
+        if report is not None:
+            report["Thuật toán"] = "FBP"
+            if roi is not None:
+                report["Vùng quan tâm"] = f"{roi.width}×{roi.height} tại ({roi.left}, {roi.top})"
+            report["Bộ lọc"] = filter_name if filter_cutoff >= 1.0 else f"{filter_name} · cắt {filter_cutoff:.2f}"
+    else:
+        reconstruction, stats = iterative_reconstruct(
+            raw,
+            theta,
+            method=method,
+            settings=iterative,
+            output_size=output_size,
+            operator_cache=cache,
+            progress_callback=_scaled_progress(progress_callback, start, end),
+        )
+        if report is not None:
+            report.update(
+                {
+                    "Thuật toán": method.upper(),
+                    "Số vòng lặp": str(stats.iterations),
+                    "Sai số sinogram": f"{stats.residual:.4f}",
+                    "Điều kiện dừng": _STOP_REASONS[stats.stop_reason],
+                }
+            )
 
     # Chuẩn hóa về thang 0-255
-    reconstruction -= reconstruction.min()
-    max_val = reconstruction.max()
-    if max_val > 0:
-        reconstruction /= max_val
-    reconstruction_uint8 = (reconstruction * 255).astype(np.uint8)
+    reconstruction_uint8 = _to_uint8(reconstruction)
 
     target_shape = sinogram.original_shape
-    if reconstruction_uint8.shape != target_shape:
+    if roi is None and reconstruction_uint8.shape != target_shape:
         reconstruction_uint8 = cv2.resize(
             reconstruction_uint8,
             (target_shape[1], target_shape[0]),
@@ -145,7 +347,7 @@ def reconstruct_image(sinogram: SinogramResult, progress_callback: ProgressCallb
         )
 
     if progress_callback:
-        progress_callback(1.0, "Hoàn tất tái tạo")
+        progress_callback(end, "Hoàn tất tái tạo")
 
     return reconstruction_uint8
 
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+from scipy import sparse
+
+from .fbp import Grid, backprojection_matrix, default_output_size
+from .operator_cache import GeometryKey, OperatorCache
+
+ITERATIVE_METHODS: tuple[str, ...] = ("sirt", "sart", "os-sart")
+
+_EPS = 1e-8
+
+
+@dataclass(frozen=True)
+class IterativeSettings:
+    """Tham số chung cho các thuật toán tái tạo lặp."""
+
+    max_iterations: int = 20
+    subsets: int = 10
+    relaxation: float = 1.0
+    tolerance: float = 1e-3
+    time_budget: Optional[float] = None
+    nonnegative: bool = True
+
+
+@dataclass
+class IterativeReport:
+    method: str
+    iterations: int
+    residual: float
+    elapsed: float
+    stop_reason: str
+
+
+def subset_count(method: str, n_angles: int, settings: IterativeSettings) -> int:
+    """Số tập con góc: SIRT dùng một tập, SART mỗi góc một tập."""
+
+    if method == "sirt":
+        return 1
+    if method == "sart":
+        return n_angles
+    if method == "os-sart":
+        return max(1, min(int(settings.subsets), n_angles))
+    raise ValueError(f"Thuật toán lặp không được hỗ trợ: {method}")
+
+
+def _ordered_angles(n_angles: int, n_subsets: int) -> np.ndarray:
+    """Sắp xếp góc sao cho mỗi tập con (xen kẽ đều 0–180°) nằm liền nhau."""
+
+    return np.concatenate([np.arange(s, n_angles, n_subsets) for s in range(n_subsets)])
+
+
+def projection_matrix(
+    n_detectors: int,
+    theta: np.ndarray,
+    grid: Grid,
+    *,
+    operator_cache: Optional[OperatorCache] = None,
+) -> sparse.csr_matrix:
+    """Ma trận chiếu thuận CSR (góc × đầu dò, điểm ảnh), chuyển vị của ma trận chiếu ngược."""
+
+    def _build() -> sparse.csr_matrix:
+        return backprojection_matrix(n_detectors, theta, grid).T.tocsr()
+
+    if operator_cache is None:
+        return _build()
+    key = GeometryKey.build(n_detectors, theta, grid.as_key(), "linear", kind="projection")
+    return operator_cache.get_or_build(
+        key,
+        _build,
+        estimated_bytes=grid.height * grid.width * len(theta) * 16,
+        eager=True,
+    )
+
+
+def _row_block(matrix: sparse.csr_matrix, start: int, stop: int) -> sparse.csr_matrix:
+    """Khối hàng liền nhau của ma trận CSR, dùng chung dữ liệu (không sao chép)."""
+
+    begin, end = matrix.indptr[start], matrix.indptr[stop]
+    return sparse.csr_matrix(
+        (matrix.data[begin:end], matrix.indices[begin:end], matrix.indptr[start : stop + 1] - begin),
+        shape=(stop - start, matrix.shape[1]),
+    )
+
+
+def _safe_inverse(values: np.ndarray) -> np.ndarray:
+    inverse = np.zeros_like(values)
+    np.divide(1.0, values, out=inverse, where=values > _EPS)
+    return inverse
+
+
+def iterative_reconstruct(
+    sinogram: np.ndarray,
+    theta: np.ndarray,
+    *,
+    method: str = "os-sart",
+    settings: Optional[IterativeSettings] = None,
+    output_size: Optional[int] = None,
+    operator_cache: Optional[OperatorCache] = None,
+    progress_callback: Optional[Callable[[float, str], None]] = None,
+) -> tuple[np.ndarray, IterativeReport]:
+    """Tái tạo lặp SIRT/SART/OS-SART bằng phép chiếu thuận/ngược dạng ma trận thưa.
+
+    Mỗi vòng lặp duyệt lần lượt các tập con góc (ordered subsets); dừng khi
+    sai số tương đối của sinogram dưới ``tolerance``, khi hết ``time_budget``
+    giây hoặc khi đạt ``max_iterations``.
+    """
+
+    settings = settings or IterativeSettings()
+    if sinogram.ndim != 2 or sinogram.shape[1] != len(theta):
+        raise ValueError("Sinogram phải có dạng (số đầu dò, số góc) khớp với theta.")
+
+    started = time.perf_counter()
+    n_detectors, n_angles = sinogram.shape
+    if output_size is None:
+        output_size = default_output_size(n_detectors)
+    grid = Grid.square(output_size)
+
+    n_subsets = subset_count(method, n_angles, settings)
+    order = _ordered_angles(n_angles, n_subsets)
+    theta = np.asarray(theta, dtype=np.float64)[order]
+    projections = np.ascontiguousarray(sinogram.T[order], dtype=np.float32).ravel()
+
+    forward = projection_matrix(n_detectors, theta, grid, operator_cache=operator_cache)
+
+    # Chuẩn bị sẵn khối ma trận, trọng số hàng (tia) và cột (điểm ảnh) cho từng tập con.
+    subsets = []
+    start = 0
+    for index in range(n_subsets):
+        count = len(range(index, n_angles, n_subsets))
+        rows = slice(start * n_detectors, (start + count) * n_detectors)
+        block = _row_block(forward, rows.start, rows.stop)
+        ones_pixels = np.ones(block.shape[1], dtype=np.float32)
+        ones_rays = np.ones(block.shape[0], dtype=np.float32)
+        row_weight = _safe_inverse(block @ ones_pixels)
+        col_weight = _safe_inverse(block.T @ ones_rays) * np.float32(settings.relaxation)
+        subsets.append((block, projections[rows], row_weight, col_weight))
+        start += count
+
+    estimate = np.zeros(grid.height * grid.width, dtype=np.float32)
+    norm = float(np.linalg.norm(projections)) or 1.0
+    residual = float("inf")
+    stop_reason = "max_iterations"
+    iteration = 0
+
+    for iteration in range(1, settings.max_iterations + 1):
+        residual_sq = 0.0
+        for block, measured, row_weight, col_weight in subsets:
+            difference = measured - block @ estimate
+            residual_sq += float(difference @ difference)
+            difference *= row_weight
+            estimate += col_weight * (block.T @ difference)
+            if settings.nonnegative:
+                np.maximum(estimate, 0.0, out=estimate)
+
+        residual = np.sqrt(residual_sq) / norm
+        elapsed = time.perf_counter() - started
+        if progress_callback:
+            progress_callback(
+                iteration / settings.max_iterations,
+                f"{method.upper()} vòng {iteration}/{settings.max_iterations} · sai số {residual:.4f}",
+            )
+        if residual <= settings.tolerance:
+            stop_reason = "tolerance"
+            break
+        if settings.time_budget is not None and elapsed >= settings.time_budget:
+            stop_reason = "time_budget"
+            break
+
+    report = IterativeReport(
+        method=method,
+        iterations=iteration,
+        residual=float(residual),
+        elapsed=time.perf_counter() - started,
+        stop_reason=stop_reason,
+    )
+    return estimate.reshape(grid.shape), report
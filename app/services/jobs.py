@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .env import env_number
+
+JOB_STATES: tuple[str, ...] = ("queued", "running", "done", "failed", "cancelled")
+ACTIVE_STATES: tuple[str, ...] = ("queued", "running")
+
+_DEFAULT_WORKERS = 4
+_DEFAULT_PER_OWNER = 1
+_DEFAULT_TTL = 3600.0
+
+
+class JobCancelled(BaseException):
+    """Công việc bị người dùng hủy; phát ra tại ranh giới bước xử lý kế tiếp.
+
+    Kế thừa ``BaseException`` (như ``asyncio.CancelledError``) để các khối
+    ``except Exception`` cô lập lỗi từng tệp không nuốt mất yêu cầu hủy.
+    """
+
+
+@dataclass
+class Job:
+    """Trạng thái một công việc nền, đọc được từ luồng giao diện trong lúc chạy.
+
+    Hàm xử lý nhận chính ``Job`` và báo tiến độ qua ``report`` (cùng chữ ký
+    với ``progress_callback`` của pipeline), nên truyền thẳng ``job.report``
+    vào pipeline là có tiến độ theo bước và điểm dừng khi bị hủy.
+    """
+
+    id: str
+    kind: str
+    label: str
+    signature: str = ""
+    owner: str = ""
+    state: str = "queued"
+    progress: float = 0.0
+    stage: str = ""
+    result: Any = None
+    error: Optional[str] = None
+    warnings: List[str] = field(default_factory=list)
+    items: List[Tuple[str, str]] = field(default_factory=list)
+    preview: Optional[Tuple[np.ndarray, str]] = None
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def active(self) -> bool:
+        return self.state in ACTIVE_STATES
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def check_cancelled(self) -> None:
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+
+    def report(self, value: float, text: str) -> None:
+        """Cập nhật tiến độ (0–1) và tên bước hiện tại; dừng công việc nếu đã bị hủy."""
+
+        self.check_cancelled()
+        self.progress = min(max(float(value), 0.0), 1.0)
+        self.stage = text
+
+    def file_progress(self, index: int, total: int, name: str) -> Callable[[float, str], None]:
+        """Callback tiến độ cho tệp thứ ``index`` trong ``total`` tệp, quy về tiến độ chung."""
+
+        def _update(value: float, text: str) -> None:
+            self.report((index + value) / total, f"{name} · {index + 1}/{total} · {text}")
+
+        return _update
+
+    def set_item(self, index: int, status: str) -> None:
+        name, _ = self.items[index]
+        self.items[index] = (name, status)
+
+    def show_preview(self, image: np.ndarray, label: str) -> None:
+        self.preview = (image, label)
+
+
+class JobManager:
+    """Hàng đợi công việc nền chạy trên luồng riêng, tách khỏi lượt chạy script Streamlit.
+
+    Tương tác với widget chỉ làm script chạy lại, không ngắt công việc; giao
+    diện đọc trạng thái theo ``id`` ở mỗi lượt và nhận kết quả khi xong.
+
+    Mỗi công việc thuộc về một ``owner`` (phiên Streamlit). Một chủ chỉ chạy
+    tối đa ``per_owner`` công việc cùng lúc, phần còn lại chờ trong hàng đợi
+    riêng của chủ đó, nên lô dài của một phiên không chiếm hết luồng của các
+    phiên khác. Công việc đã kết thúc được giữ đến khi chủ nhận kết quả
+    (``forget``) hoặc quá ``finished_ttl`` giây.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = _DEFAULT_WORKERS,
+        *,
+        per_owner: int = _DEFAULT_PER_OWNER,
+        finished_ttl: float = _DEFAULT_TTL,
+    ) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self.per_owner = max(1, int(per_owner))
+        self.finished_ttl = float(finished_ttl)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ct-job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._futures: Dict[str, Future] = {}
+        self._pending: Dict[str, Deque[Tuple[Job, Callable[[Job], Any]]]] = {}
+        self._running: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        kind: str,
+        label: str,
+        run: Callable[[Job], Any],
+        *,
+        signature: str = "",
+        owner: str = "",
+    ) -> Job:
+        """Xếp hàng ``run(job)`` cho ``owner``; giá trị trả về thành ``job.result``."""
+
+        job = Job(id=uuid.uuid4().hex[:12], kind=kind, label=label, signature=signature, owner=owner)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+            self._pending.setdefault(owner, deque()).append((job, run))
+            self._dispatch(owner)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, job_ids: Optional[Iterable[str]] = None, *, owner: Optional[str] = None) -> List[Job]:
+        with self._lock:
+            if job_ids is None:
+                jobs = list(self._jobs.values())
+            else:
+                jobs = [self._jobs[job_id] for job_id in job_ids if job_id in self._jobs]
+            return [job for job in jobs if owner is None or job.owner == owner]
+
+    def cancel(self, job_id: str) -> bool:
+        """Yêu cầu hủy; công việc đang chờ bị hủy ngay, công việc đang chạy dừng ở bước kế tiếp."""
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not job.active:
+                return False
+            job._cancel.set()
+            queue = self._pending.get(job.owner, deque())
+            for item in queue:
+                if item[0] is job:
+                    queue.remove(item)
+                    self._finish(job, "cancelled")
+                    return True
+            future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            self._finish(job, "cancelled")
+            self._release(job)
+        return True
+
+    def forget(self, job_id: str) -> None:
+        """Bỏ công việc đã kết thúc khỏi danh sách (sau khi giao diện đã nhận kết quả)."""
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and not job.active:
+                del self._jobs[job_id]
+                self._futures.pop(job_id, None)
+
+    def stats(self, owner: Optional[str] = None) -> dict[str, int]:
+        with self._lock:
+            counts = {state: 0 for state in JOB_STATES}
+            for job in self._jobs.values():
+                if owner is None or job.owner == owner:
+                    counts[job.state] += 1
+            return counts
+
+    def _dispatch(self, owner: str) -> None:
+        # Gọi khi đang giữ khóa: chuyển công việc đang chờ của ``owner`` sang luồng chạy.
+        queue = self._pending.get(owner)
+        while queue and self._running.get(owner, 0) < self.per_owner:
+            job, run = queue.popleft()
+            self._running[owner] = self._running.get(owner, 0) + 1
+            self._futures[job.id] = self._executor.submit(self._execute, job, run)
+        if not queue:
+            self._pending.pop(owner, None)
+
+    def _release(self, job: Job) -> None:
+        with self._lock:
+            running = self._running.get(job.owner, 0) - 1
+            if running > 0:
+                self._running[job.owner] = running
+            else:
+                self._running.pop(job.owner, None)
+            self._dispatch(job.owner)
+
+    def _execute(self, job: Job, run: Callable[[Job], Any]) -> None:
+        try:
+            if job.cancel_requested:
+                self._finish(job, "cancelled")
+                return
+            job.state = "running"
+            job.started = time.time()
+            try:
+                job.result = run(job)
+            except JobCancelled:
+                self._finish(job, "cancelled")
+            except Exception as exc:
+                job.error = str(exc) or type(exc).__name__
+                self._finish(job, "failed")
+            else:
+                job.progress = 1.0
+                self._finish(job, "done")
+        finally:
+            self._release(job)
+
+    @staticmethod
+    def _finish(job: Job, state: str) -> None:
+        job.finished = time.time()
+        job.preview = None
+        job.state = state
+
+    def _prune(self) -> None:
+        # Chỉ bỏ công việc đã kết thúc mà chủ không đến nhận trong ``finished_ttl`` giây
+        # (phiên đã đóng); công việc chưa nhận của phiên đang mở không bị mất.
+        expired = time.time() - self.finished_ttl
+        stale = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if not job.active and job.finished is not None and job.finished < expired
+        ]
+        for job_id in stale:
+            del self._jobs[job_id]
+            self._futures.pop(job_id, None)
+
+
+_DEFAULT_MANAGER: Optional[JobManager] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_job_manager() -> JobManager:
+    """Hàng đợi dùng chung cho mọi phiên, cấu hình qua biến môi trường.
+
+    ``CT_JOB_WORKERS`` đặt tổng số công việc chạy đồng thời (mặc định 4),
+    ``CT_JOB_PER_SESSION`` số công việc chạy cùng lúc của một phiên (mặc
+    định 1) và ``CT_JOB_TTL`` số giây giữ công việc đã xong chưa được nhận
+    (mặc định 3600). Mỗi công việc tự song song hóa bên trong (pool tiến
+    trình xử lý lô, luồng chiếu), nên giới hạn theo phiên giữ CPU cho các
+    phiên khác thay vì để một phiên xếp nhiều công việc chạy cùng lúc.
+    """
+
+    global _DEFAULT_MANAGER
+    with _DEFAULT_LOCK:
+        if _DEFAULT_MANAGER is None:
+            _DEFAULT_MANAGER = JobManager(
+                env_number("CT_JOB_WORKERS", _DEFAULT_WORKERS),
+                per_owner=env_number("CT_JOB_PER_SESSION", _DEFAULT_PER_OWNER),
+                finished_ttl=env_number("CT_JOB_TTL", _DEFAULT_TTL),
+            )
+        return _DEFAULT_MANAGER
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+from scipy import sparse
+
+from .env import env_mb
+
+_DEFAULT_MAX_MB = 512
+# Ma trận tùy chọn (FBP, chiếu thuận) mặc định không dựng trong tiến trình dùng chung:
+# ở 256 px ma trận chiếu ngược ~268 MB, dựng mất ~0,7 s, lâu hơn phép gather trực tiếp.
+# FBP vẫn giữ kế hoạch gather (chỉ số int32 + trọng số float32, ~90 MB ở 256 px, 180 góc).
+_DEFAULT_MATRIX_MB = 0
+_SEEN_LIMIT = 256
+
+
+@dataclass(frozen=True)
+class GeometryKey:
+    """Khóa hình học của toán tử chiếu ngược: đầu dò, góc chiếu và lưới đầu ra."""
+
+    n_detectors: int
+    theta_digest: str
+    grid: tuple[float, ...]
+    interpolation: str
+    kind: str = "backprojection"
+
+    @classmethod
+    def build(
+        cls,
+        n_detectors: int,
+        theta: np.ndarray,
+        grid: tuple[float, ...],
+        interpolation: str,
+        *,
+        kind: str = "backprojection",
+    ) -> "GeometryKey":
+        theta_bytes = np.ascontiguousarray(theta, dtype=np.float64).tobytes()
+        digest = hashlib.sha1(theta_bytes).hexdigest()
+        return cls(int(n_detectors), digest, tuple(float(v) for v in grid), interpolation, kind)
+
+    def filename(self) -> str:
+        return hashlib.sha1(repr(self).encode("utf-8")).hexdigest() + ".npz"
+
+
+def _operator_nbytes(operator: Any) -> int:
+    if sparse.issparse(operator):
+        return int(operator.data.nbytes + operator.indices.nbytes + operator.indptr.nbytes)
+    return int(operator.nbytes)
+
+
+class OperatorCache:
+    """Bộ nhớ đệm LRU theo dung lượng cho toán tử theo hình học: ma trận CSR
+    hoặc đối tượng có ``nbytes`` (ví dụ ``fbp.GatherPlan``).
+
+    Một hình học chỉ được dựng toán tử từ lần gặp thứ ``min_uses`` trở đi:
+    ca tái tạo đơn lẻ không phải trả chi phí dựng, còn lô sinogram cùng
+    hình học chỉ dựng một lần. Ma trận tùy chọn ước tính lớn hơn
+    ``max_matrix_bytes`` không được dựng (nơi gọi dùng phép gather trực
+    tiếp). Khi có ``directory``, ma trận CSR được ghi ra đĩa dạng ``.npz``
+    để các phiên sau nạp lại ngay.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        *,
+        directory: Optional[Path] = None,
+        min_uses: int = 2,
+        max_matrix_bytes: Optional[int] = None,
+    ) -> None:
+        self.max_bytes = int(max_bytes)
+        self.max_matrix_bytes = None if max_matrix_bytes is None else int(max_matrix_bytes)
+        self.directory = Path(directory) if directory else None
+        self.min_uses = max(1, int(min_uses))
+        self._entries: "OrderedDict[GeometryKey, Any]" = OrderedDict()
+        self._seen: "OrderedDict[GeometryKey, int]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.builds = 0
+        self.evictions = 0
+
+    @property
+    def current_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: GeometryKey) -> Optional[Any]:
+        with self._lock:
+            matrix = self._entries.get(key)
+            if matrix is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return matrix
+
+        matrix = self._load(key)
+        if matrix is not None:
+            with self._lock:
+                self.hits += 1
+                self._insert(key, matrix)
+        return matrix
+
+    def get_or_build(
+        self,
+        key: GeometryKey,
+        builder: Callable[[], Any],
+        *,
+        estimated_bytes: int,
+        eager: bool = False,
+        capped: bool = True,
+    ) -> Optional[Any]:
+        """Trả về toán tử đã lưu hoặc dựng mới; ``None`` nếu chưa đáng dựng.
+
+        ``eager=True`` dành cho nơi bắt buộc cần ma trận (thuật toán lặp):
+        luôn dựng, chỉ bỏ qua việc lưu nếu vượt giới hạn dung lượng.
+        ``capped=False`` bỏ qua ``max_matrix_bytes`` cho toán tử gọn không
+        phải ma trận tùy chọn (kế hoạch gather của FBP).
+        """
+
+        matrix = self.get(key)
+        if matrix is not None:
+            return matrix
+
+        with self._lock:
+            self.misses += 1
+            if not eager and (
+                estimated_bytes > self.max_bytes
+                or (capped and self.max_matrix_bytes is not None and estimated_bytes > self.max_matrix_bytes)
+            ):
+                return None
+            uses = self._seen.pop(key, 0) + 1
+            if uses < self.min_uses and not eager:
+                self._seen[key] = uses
+                while len(self._seen) > _SEEN_LIMIT:
+                    self._seen.popitem(last=False)
+                return None
+
+        matrix = builder()
+        with self._lock:
+            self.builds += 1
+            self._insert(key, matrix)
+        self._store(key, matrix)
+        return matrix
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._seen.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "builds": self.builds,
+                "evictions": self.evictions,
+            }
+
+    def _insert(self, key: GeometryKey, matrix: Any) -> None:
+        nbytes = _operator_nbytes(matrix)
+        if nbytes > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= _operator_nbytes(previous)
+        self._entries[key] = matrix
+        self._bytes += nbytes
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= _operator_nbytes(evicted)
+            self.evictions += 1
+
+    def _load(self, key: GeometryKey) -> Optional[sparse.csr_matrix]:
+        if self.directory is None:
+            return None
+        path = self.directory / key.filename()
+        if not path.exists():
+            return None
+        try:
+            return sparse.load_npz(path).tocsr()
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, key: GeometryKey, matrix: Any) -> None:
+        if self.directory is None or not sparse.issparse(matrix):
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / key.filename()
+            # Ghi vào tệp tạm rồi đổi tên để tiến trình khác không đọc tệp dở.
+            tmp_path = path.with_name(path.name + f".{os.getpid()}.tmp.npz")
+            sparse.save_npz(tmp_path, matrix, compressed=False)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+
+_DEFAULT_CACHE: Optional[OperatorCache] = None
+
+
+def default_operator_cache() -> OperatorCache:
+    """Bộ nhớ đệm dùng chung trong tiến trình, cấu hình qua biến môi trường.
+
+    ``CT_OPERATOR_CACHE_MB`` đặt giới hạn dung lượng (mặc định 512 MB),
+    ``CT_OPERATOR_CACHE_DIR`` bật lưu ma trận xuống đĩa. Thuật toán lặp luôn
+    dựng ma trận cần thiết; FBP và phép chiếu thuận chỉ dùng ma trận khi
+    ``CT_OPERATOR_MATRIX_MB`` đặt kích thước ma trận tối đa (mặc định 0).
+    Không có ma trận, FBP giữ kế hoạch gather gọn của từng hình học lặp lại.
+    """
+
+    global _DEFAULT_CACHE
+    if _DEFAULT_CACHE is None:
+        directory = os.environ.get("CT_OPERATOR_CACHE_DIR", "").strip() or None
+        _DEFAULT_CACHE = OperatorCache(
+            env_mb("CT_OPERATOR_CACHE_MB", _DEFAULT_MAX_MB),
+            directory=Path(directory) if directory else None,
+            max_matrix_bytes=env_mb("CT_OPERATOR_MATRIX_MB", _DEFAULT_MATRIX_MB),
+        )
+    return _DEFAULT_CACHE
@@ -1,23 +1,43 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Optional
+import os
+import queue
+import threading
+import time
+from concurrent.futures import as_completed
+from dataclasses import dataclass, field
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence, Tuple, Union
 
+import cv2
 import numpy as np
 
+from .data_loader import load_dicom_image, load_sinogram_image, load_standard_image, normalize_volume, to_uint8
+from .denoise import DEFAULT_DENOISE, DENOISE_BACKENDS, get_backend
 from .image_processing import (
+    FanBeamGeometry,
+    IterativeSettings,
+    RegionOfInterest,
     SinogramResult,
+    SparseViewSettings,
     create_sinogram,
     get_image_info,
     preprocess_and_denoise,
     reconstruct_image,
     sinogram_from_image_array,
+    sinogram_input_shape,
 )
+from .env import single_threaded_worker_init
+from .executor import map_pool, spawn_pool
+from .shared_arrays import SharedArray, SharedArraySpec, attach
+from .stages import Stage, StageCache, StageGraph, payload_nbytes
 
 
-@dataclass
+@dataclass(slots=True)
 class ProcessedImage:
     name: str
+    # Chỉ có khi ảnh nguồn thực sự là ảnh màu (ảnh xám, DICOM: ``None``).
     original_rgb: Optional[np.ndarray]
     original_gray: np.ndarray
     denoised: np.ndarray
@@ -27,32 +47,150 @@ class ProcessedImage:
 
     @property
     def original_display(self) -> np.ndarray:
-        if self.original_rgb is not None:
-            return self.original_rgb
-        return np.stack([self.original_gray] * 3, axis=-1)
+        """Ảnh gốc để hiển thị: bản màu nếu có, không thì chính ảnh xám (không chồng thành 3 kênh)."""
+        return self.original_rgb if self.original_rgb is not None else self.original_gray
+
+    @property
+    def nbytes(self) -> int:
+        return payload_nbytes(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class ReconstructionResult:
     name: str
     sinogram: SinogramResult
     reconstruction: np.ndarray
     info: dict[str, str]
 
+    @property
+    def nbytes(self) -> int:
+        return payload_nbytes(self)
+
+
+@dataclass(slots=True)
+class VolumeResult:
+    """Khối 3D (z, y, x) đã xử lý từ một chuỗi DICOM."""
+
+    name: str
+    original: np.ndarray
+    denoised: np.ndarray
+    reconstruction: np.ndarray
+    slice_positions: np.ndarray
+    info: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def depth(self) -> int:
+        return int(self.original.shape[0])
+
+
+def _denoise_stage(gray: np.ndarray, *, report: dict[str, str], progress_callback=None, **options) -> np.ndarray:
+    return preprocess_and_denoise(gray, progress_callback, report=report, **options)
+
+
+def _sinogram_stage(
+    denoised: np.ndarray,
+    *,
+    report: dict[str, str],
+    progress_callback=None,
+    **options,
+) -> SinogramResult:
+    return create_sinogram(denoised, progress_callback, **options)
+
+
+def _rebin_stage(
+    sinogram_img: np.ndarray,
+    *,
+    report: dict[str, str],
+    target_size: int,
+    geometry: Optional[FanBeamGeometry] = None,
+) -> SinogramResult:
+    shape = (int(target_size), int(target_size))
+    if geometry is not None:
+        report["Hình học"] = f"Quạt {geometry.fan_angle:.1f}° ({geometry.detector})"
+        report["Bước lấy mẫu"] = f"{geometry.pixel_size(sinogram_img.shape[0]):.3f} mm"
+    return sinogram_from_image_array(sinogram_img, target_shape=shape, geometry=geometry)
+
+
+def _reconstruct_stage(
+    sinogram: SinogramResult,
+    *,
+    report: dict[str, str],
+    progress_callback=None,
+    **options,
+) -> np.ndarray:
+    return reconstruct_image(sinogram, progress_callback, report=report, **options)
+
+
+# Pipeline Studio: ảnh → khử nhiễu → sinogram → tái tạo. Mỗi bước được lưu
+# theo băm (nội dung đầu vào + tham số) nên chỉ đổi tham số tái tạo sẽ dùng
+# lại ảnh khử nhiễu và sinogram đã tính.
+IMAGE_PIPELINE = StageGraph(
+    [
+        Stage("denoise", _denoise_stage),
+        Stage("sinogram", _sinogram_stage, ("denoise",)),
+        Stage("reconstruct", _reconstruct_stage, ("sinogram",)),
+    ]
+)
+
+# Sinogram Lab: ảnh sinogram → chuẩn hóa/đổi hình học → tái tạo.
+SINOGRAM_PIPELINE = StageGraph(
+    [
+        Stage("rebin", _rebin_stage),
+        Stage("reconstruct", _reconstruct_stage, ("rebin",)),
+    ]
+)
+
+
+def format_nbytes(nbytes: int) -> str:
+    """Dung lượng dạng dễ đọc (KB/MB) cho báo cáo bộ nhớ."""
+
+    if nbytes < 1024 * 1024:
+        return f"{nbytes / 1024:.0f} KB"
+    return f"{nbytes / (1024 * 1024):.1f} MB"
+
 
 def process_gray_image(
     gray: np.ndarray,
     *,
     name: str,
     rgb: Optional[np.ndarray] = None,
+    sparse_view: Optional[SparseViewSettings] = None,
+    max_size: Optional[int] = None,
+    denoise_backend: str = DEFAULT_DENOISE,
+    adaptive_denoise: bool = False,
+    filter_name: str = "hann",
+    filter_cutoff: float = 1.0,
+    stage_cache: Optional[StageCache] = None,
     progress_callback=None,
 ) -> ProcessedImage:
-    denoised = preprocess_and_denoise(gray, progress_callback)
-    sinogram = create_sinogram(denoised, progress_callback)
-    reconstruction = reconstruct_image(sinogram, progress_callback)
+    """Chuỗi khử nhiễu → sinogram → tái tạo cho một ảnh xám uint8 hoặc uint16.
+
+    Chạy qua ``IMAGE_PIPELINE``: bước nào có cùng đầu vào và tham số với một
+    lần chạy trước thì lấy lại từ ``stage_cache`` (mặc định cache dùng chung).
+    """
+
+    reports: dict[str, dict[str, str]] = {}
+    outputs = IMAGE_PIPELINE.run(
+        gray,
+        {
+            "denoise": {"denoise_backend": denoise_backend, "adaptive": adaptive_denoise},
+            "sinogram": {"max_size": max_size},
+            "reconstruct": {"sparse_view": sparse_view, "filter_name": filter_name, "filter_cutoff": filter_cutoff},
+        },
+        context={stage: {"progress_callback": progress_callback} for stage in ("denoise", "sinogram", "reconstruct")},
+        cache=stage_cache,
+        reports=reports,
+    )
+    denoised, sinogram, reconstruction = outputs["denoise"], outputs["sinogram"], outputs["reconstruct"]
     info = get_image_info(gray)
+    if gray.dtype != np.uint8:
+        gray = to_uint8(gray)
+    info["Khử nhiễu"] = DENOISE_BACKENDS[denoise_backend].label
+    info.update(reports["denoise"])
+    if sparse_view is not None or filter_name != "hann" or filter_cutoff != 1.0:
+        info.update(reports["reconstruct"])
 
-    return ProcessedImage(
+    result = ProcessedImage(
         name=name,
         original_rgb=rgb,
         original_gray=gray,
@@ -61,6 +199,8 @@ def process_gray_image(
         reconstruction=reconstruction,
         info=info,
     )
+    info["Bộ nhớ kết quả"] = format_nbytes(result.nbytes)
+    return result
 
 
 def process_sinogram_array(
@@ -68,16 +208,479 @@ def process_sinogram_array(
     *,
     name: str,
     target_size: int,
+    method: str = "fbp",
+    filter_name: str = "hann",
+    filter_cutoff: float = 1.0,
+    iterative: Optional[IterativeSettings] = None,
+    sparse_view: Optional[SparseViewSettings] = None,
+    roi: Optional[RegionOfInterest] = None,
+    geometry: Optional[FanBeamGeometry] = None,
+    stage_cache: Optional[StageCache] = None,
     progress_callback=None,
+    preview_callback=None,
 ) -> ReconstructionResult:
-    shape = (int(target_size), int(target_size))
-    sinogram = sinogram_from_image_array(sinogram_img, target_shape=shape)
-    reconstruction = reconstruct_image(sinogram, progress_callback)
+    reports: dict[str, dict[str, str]] = {}
+    outputs = SINOGRAM_PIPELINE.run(
+        sinogram_img,
+        {
+            "rebin": {"target_size": int(target_size), "geometry": geometry},
+            "reconstruct": {
+                "method": method,
+                "filter_name": filter_name,
+                "filter_cutoff": filter_cutoff,
+                "iterative": iterative,
+                "sparse_view": sparse_view,
+                "roi": roi,
+            },
+        },
+        context={
+            # Sinogram Lab chỉ có bước tái tạo nên dành gần trọn thanh tiến trình cho nó.
+            "reconstruct": {
+                "progress_callback": progress_callback,
+                "progress_range": (0.05, 1.0),
+                "preview_callback": preview_callback,
+            },
+        },
+        cache=stage_cache,
+        reports=reports,
+    )
+    sinogram, reconstruction = outputs["rebin"], outputs["reconstruct"]
     info = get_image_info(reconstruction)
+    info.update(reports["rebin"])
+    info.update(reports["reconstruct"])
 
-    return ReconstructionResult(
+    result = ReconstructionResult(
         name=name,
         sinogram=sinogram,
         reconstruction=reconstruction,
         info=info,
     )
+    info["Bộ nhớ kết quả"] = format_nbytes(result.nbytes)
+    return result
+
+
+def _process_volume_range(
+    source: np.ndarray,
+    denoised: np.ndarray,
+    reconstruction: np.ndarray,
+    start: int,
+    stop: int,
+    max_size: Optional[int] = None,
+    denoise_backend: str = DEFAULT_DENOISE,
+    adaptive_denoise: bool = False,
+) -> int:
+    # Mỗi lát chỉ xử lý một lần: không lưu kết quả trung gian vào cache bước.
+    no_cache = StageCache(0)
+    for index in range(start, stop):
+        result = process_gray_image(
+            source[index],
+            name=f"slice-{index}",
+            max_size=max_size,
+            denoise_backend=denoise_backend,
+            adaptive_denoise=adaptive_denoise,
+            stage_cache=no_cache,
+        )
+        denoised[index] = result.denoised
+        reconstruction[index] = result.reconstruction
+    return stop - start
+
+
+def _process_volume_chunk(
+    source: SharedArraySpec,
+    denoised: SharedArraySpec,
+    reconstruction: SharedArraySpec,
+    start: int,
+    stop: int,
+    max_size: Optional[int] = None,
+    denoise_backend: str = DEFAULT_DENOISE,
+    adaptive_denoise: bool = False,
+) -> int:
+    """Xử lý các lát [start, stop) trong tiến trình con, đọc/ghi qua bộ nhớ chia sẻ."""
+
+    with attach(source) as src, attach(denoised) as den, attach(reconstruction) as rec:
+        return _process_volume_range(src, den, rec, start, stop, max_size, denoise_backend, adaptive_denoise)
+
+
+def default_volume_workers() -> int:
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def _process_volume_parallel(
+    volume: np.ndarray,
+    recon_shape: tuple[int, int, int],
+    workers: int,
+    progress_callback,
+    max_size: Optional[int] = None,
+    denoise_backend: str = DEFAULT_DENOISE,
+    adaptive_denoise: bool = False,
+) -> tuple[np.ndarray, np.ndarray]:
+    depth = volume.shape[0]
+    with SharedArray.from_array(volume) as source, SharedArray(volume.shape, np.uint8) as denoised, SharedArray(
+        recon_shape, np.uint8
+    ) as reconstruction:
+        # Vài khối mỗi tiến trình để cân tải khi thời gian từng lát chênh nhau.
+        chunk = max(1, depth // (workers * 4))
+        done = 0
+        with spawn_pool(workers, single_threaded_worker_init) as executor:
+            futures = [
+                executor.submit(
+                    _process_volume_chunk,
+                    source.spec,
+                    denoised.spec,
+                    reconstruction.spec,
+                    start,
+                    min(start + chunk, depth),
+                    max_size,
+                    denoise_backend,
+                    adaptive_denoise,
+                )
+                for start in range(0, depth, chunk)
+            ]
+            try:
+                for future in as_completed(futures):
+                    done += future.result()
+                    if progress_callback:
+                        progress_callback(done / depth, f"Đã xử lý {done}/{depth} lát cắt")
+            except BaseException:
+                # Lỗi hoặc bị hủy giữa chừng: bỏ các khối chưa chạy thay vì chờ hết.
+                for future in futures:
+                    future.cancel()
+                raise
+
+        # Chép ra bộ nhớ thường trước khi giải phóng vùng nhớ chia sẻ.
+        return denoised.array.copy(), reconstruction.array.copy()
+
+
+def process_volume(
+    volume: np.ndarray,
+    *,
+    name: str,
+    slice_positions: Optional[Sequence[float]] = None,
+    workers: Optional[int] = None,
+    max_size: Optional[int] = None,
+    denoise_backend: str = DEFAULT_DENOISE,
+    adaptive_denoise: bool = False,
+    progress_callback=None,
+) -> VolumeResult:
+    """Chạy ``process_gray_image`` cho từng lát của khối (z, y, x) uint8 hoặc uint16.
+
+    Khối 16-bit (``load_dicom_series(..., bit_depth=16)``) đi qua bước cân
+    bằng histogram ở đúng độ sâu gốc như ảnh DICOM đơn lẻ; khối kiểu khác
+    được chuẩn hóa chung về uint16 trước. ``original`` của kết quả là bản
+    uint8 chuẩn hóa chung cả khối để hiển thị.
+    Các lát được chia thành khối liên tiếp và gửi tới ``ProcessPoolExecutor``;
+    khối đầu vào và các khối kết quả nằm trên shared memory nên tiến trình
+    con không phải pickle mảng ảnh. ``workers=1`` xử lý tuần tự tại chỗ.
+    """
+
+    if volume.ndim != 3:
+        raise ValueError("Khối DICOM phải có dạng (z, y, x).")
+    get_backend(denoise_backend)
+
+    started = time.perf_counter()
+    if volume.dtype not in (np.uint8, np.uint16):
+        volume = normalize_volume(volume, bit_depth=16)
+    volume = np.ascontiguousarray(volume)
+    depth = volume.shape[0]
+    workers = max(1, min(int(workers or default_volume_workers()), depth))
+    recon_shape = (depth, *sinogram_input_shape(volume.shape[1:], max_size))
+
+    if workers == 1:
+        denoised = np.empty(volume.shape, dtype=np.uint8)
+        reconstruction = np.empty(recon_shape, dtype=np.uint8)
+        for index in range(depth):
+            _process_volume_range(
+                volume, denoised, reconstruction, index, index + 1, max_size, denoise_backend, adaptive_denoise
+            )
+            if progress_callback:
+                progress_callback((index + 1) / depth, f"Đã xử lý {index + 1}/{depth} lát cắt")
+    else:
+        denoised, reconstruction = _process_volume_parallel(
+            volume, recon_shape, workers, progress_callback, max_size, denoise_backend, adaptive_denoise
+        )
+
+    elapsed = time.perf_counter() - started
+    positions = np.asarray(
+        slice_positions if slice_positions is not None else np.arange(depth),
+        dtype=np.float64,
+    )
+    info = {
+        "Kích thước khối": f"{volume.shape[2]} x {volume.shape[1]} x {depth}",
+        "Khối tái tạo": f"{recon_shape[2]} x {recon_shape[1]} x {depth}",
+        "Khử nhiễu": DENOISE_BACKENDS[denoise_backend].label
+        + (" (thích nghi)" if adaptive_denoise else ""),
+        "Tiến trình": str(workers),
+        "Thời gian": f"{elapsed:.1f} s ({depth / elapsed:.2f} lát/s)",
+    }
+
+    result = VolumeResult(
+        name=name,
+        original=volume if volume.dtype == np.uint8 else normalize_volume(volume, bit_depth=8),
+        denoised=denoised,
+        reconstruction=reconstruction,
+        slice_positions=positions,
+        info=info,
+    )
+    info["Bộ nhớ kết quả"] = format_nbytes(payload_nbytes(result))
+    return result
+
+
+# --- Xử lý theo luồng cho lô lớn -------------------------------------------
+
+# Đầu vào của ``process_many``/``reconstruct_many``: đường dẫn, nội dung tệp
+# hoặc mảng đã đọc; có thể kèm tên dạng cặp (tên, nguồn).
+StreamSource = Union[str, os.PathLike, bytes, np.ndarray]
+StreamInput = Union[StreamSource, Tuple[str, StreamSource]]
+
+_DICOM_SUFFIXES = (".dcm", ".dicom")
+_NPY_MAGIC = b"\x93NUMPY"
+_PREFETCH_DONE = object()
+
+
+@dataclass
+class _Loaded:
+    index: int
+    name: str
+    array: Optional[np.ndarray] = None
+    rgb: Optional[np.ndarray] = None
+    error: Optional[Exception] = None
+
+
+def _split_input(item: StreamInput, index: int, label: str) -> Tuple[str, StreamSource]:
+    if isinstance(item, tuple):
+        return item
+    if isinstance(item, (str, os.PathLike)):
+        return Path(item).name, item
+    return f"{label} {index + 1}", item
+
+
+def _is_dicom(source: StreamSource) -> bool:
+    if isinstance(source, (str, os.PathLike)):
+        return Path(source).suffix.lower() in _DICOM_SUFFIXES
+    return bytes(source[128:132]) == b"DICM"
+
+
+def _load_image(source: StreamSource) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Ảnh xám (uint8/uint16) và bản RGB (nếu có) từ đường dẫn, nội dung tệp hoặc mảng."""
+
+    if isinstance(source, np.ndarray):
+        if source.ndim == 3 and source.shape[2] == 3:
+            return cv2.cvtColor(to_uint8(source), cv2.COLOR_RGB2GRAY), source
+        if source.ndim != 2:
+            raise ValueError("Ảnh đầu vào phải là mảng 2D hoặc RGB (h, w, 3).")
+        if source.dtype in (np.uint8, np.uint16):
+            return source, None
+        return to_uint8(source), None
+    if _is_dicom(source):
+        return load_dicom_image(source if not isinstance(source, bytes) else BytesIO(source), bit_depth=16), None
+    rgb, gray = load_standard_image(source if not isinstance(source, bytes) else BytesIO(source))
+    return gray, rgb
+
+
+def _load_sinogram(source: StreamSource) -> np.ndarray:
+    if isinstance(source, np.ndarray):
+        return source if source.dtype == np.uint8 else to_uint8(source)
+    if isinstance(source, bytes):
+        buffer = BytesIO(source)
+        buffer.name = "sinogram.npy" if source.startswith(_NPY_MAGIC) else "sinogram"
+        return load_sinogram_image(buffer)
+    return load_sinogram_image(source)
+
+
+def _prefetch(
+    inputs: Iterable[StreamInput],
+    load: Callable[[StreamSource], Tuple[np.ndarray, Optional[np.ndarray]]],
+    depth: int,
+    label: str,
+) -> Iterator[_Loaded]:
+    """Đọc và giải mã trước tối đa ``depth`` đầu vào trên một luồng nền.
+
+    Hàng đợi có giới hạn nên luồng đọc dừng lại khi bên xử lý chậm hơn:
+    bộ nhớ chỉ giữ ``depth`` ảnh đã giải mã chưa được xử lý.
+    """
+
+    def _read(index: int, item: StreamInput) -> _Loaded:
+        name, source = _split_input(item, index, label)
+        try:
+            array, rgb = load(source)
+        except Exception as exc:
+            return _Loaded(index, name, error=exc)
+        return _Loaded(index, name, array, rgb)
+
+    if depth <= 0:
+        for index, item in enumerate(inputs):
+            yield _read(index, item)
+        return
+
+    pending: "queue.Queue[Any]" = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def _put(entry: Any) -> bool:
+        while not stop.is_set():
+            try:
+                pending.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _reader() -> None:
+        try:
+            for index, item in enumerate(inputs):
+                if not _put(_read(index, item)):
+                    return
+        except BaseException as exc:  # Lỗi của chính iterable đầu vào: chuyển sang bên đọc.
+            _put(exc)
+        _put(_PREFETCH_DONE)
+
+    thread = threading.Thread(target=_reader, name="ct-prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            entry = pending.get()
+            if entry is _PREFETCH_DONE:
+                return
+            if isinstance(entry, BaseException):
+                raise entry
+            yield entry
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _stream_item(run: Callable[..., Any], loaded: _Loaded, params: dict) -> Any:
+    if loaded.rgb is not None:
+        return run(loaded.array, name=loaded.name, rgb=loaded.rgb, **params)
+    return run(loaded.array, name=loaded.name, **params)
+
+
+def _stream_worker(loaded: _Loaded, run: Callable[..., Any], params: dict) -> Any:
+    return _stream_item(run, loaded, dict(params, stage_cache=StageCache(0)))
+
+
+def _stream(
+    inputs: Iterable[StreamInput],
+    run: Callable[..., Any],
+    load: Callable[[StreamSource], Any],
+    params: dict,
+    *,
+    label: str,
+    workers: Optional[int],
+    prefetch: int,
+    max_in_flight: Optional[int],
+    ordered: bool,
+    on_error: Optional[Callable[[str, Exception], None]],
+) -> Iterator[Any]:
+    def _failed(name: str, exc: Exception) -> None:
+        if on_error is None:
+            raise exc
+        on_error(name, exc)
+
+    loaded_inputs = _prefetch(inputs, load, prefetch, label)
+    workers = max(1, int(workers or default_volume_workers()))
+    if workers == 1:
+        # Mỗi ảnh chỉ đi qua đồ thị một lần: không giữ kết quả trung gian.
+        cache = params.get("stage_cache")
+        if cache is None:
+            cache = StageCache(0)
+        params = dict(params, stage_cache=cache)
+        try:
+            for loaded in loaded_inputs:
+                if loaded.error is not None:
+                    _failed(loaded.name, loaded.error)
+                    continue
+                try:
+                    result = _stream_item(run, loaded, params)
+                except Exception as exc:
+                    _failed(loaded.name, exc)
+                    continue
+                yield result
+        finally:
+            loaded_inputs.close()
+        return
+
+    params = {key: value for key, value in params.items() if key != "stage_cache"}
+    with spawn_pool(workers, single_threaded_worker_init) as executor:
+        outcomes = map_pool(
+            executor,
+            _stream_worker,
+            loaded_inputs,
+            args=(run, params),
+            max_in_flight=max(1, int(max_in_flight or workers * 2)),
+            ordered=ordered,
+            shared=True,
+            failed=lambda loaded: loaded.error,
+        )
+        try:
+            for outcome in outcomes:
+                if outcome.ok:
+                    yield outcome.value
+                else:
+                    _failed(outcome.item.name, outcome.error)
+        finally:
+            outcomes.close()
+            loaded_inputs.close()
+
+
+def process_many(
+    inputs: Iterable[StreamInput],
+    *,
+    workers: Optional[int] = None,
+    prefetch: int = 2,
+    max_in_flight: Optional[int] = None,
+    ordered: bool = False,
+    on_error: Optional[Callable[[str, Exception], None]] = None,
+    **params: Any,
+) -> Iterator[ProcessedImage]:
+    """``process_gray_image`` cho một dãy ảnh, trả từng kết quả ngay khi xong.
+
+    ``inputs`` là đường dẫn, nội dung tệp (ảnh chuẩn hoặc DICOM) hoặc mảng,
+    có thể kèm tên dạng cặp (tên, nguồn); được đọc lười, nên có thể là
+    generator của hàng nghìn tệp. Một luồng nền giải mã trước tối đa
+    ``prefetch`` ảnh; với ``workers`` > 1 các ảnh chạy trên pool tiến trình
+    và chỉ tối đa ``max_in_flight`` ảnh (mặc định 2 × ``workers``) được
+    gửi mà chưa trả về, nên bộ nhớ không tăng theo cỡ lô. ``ordered`` giữ
+    thứ tự đầu vào. Lỗi của một ảnh được chuyển cho ``on_error(tên, lỗi)``
+    rồi bỏ qua; không có ``on_error`` thì lỗi được ném ra. ``params`` là
+    tham số còn lại của ``process_gray_image``.
+    """
+
+    return _stream(
+        inputs,
+        process_gray_image,
+        _load_image,
+        params,
+        label="Ảnh",
+        workers=workers,
+        prefetch=prefetch,
+        max_in_flight=max_in_flight,
+        ordered=ordered,
+        on_error=on_error,
+    )
+
+
+def reconstruct_many(
+    inputs: Iterable[StreamInput],
+    *,
+    target_size: int,
+    workers: Optional[int] = None,
+    prefetch: int = 2,
+    max_in_flight: Optional[int] = None,
+    ordered: bool = False,
+    on_error: Optional[Callable[[str, Exception], None]] = None,
+    **params: Any,
+) -> Iterator[ReconstructionResult]:
+    """``process_sinogram_array`` cho một dãy sinogram (``.npy``, ảnh hoặc mảng), như ``process_many``."""
+
+    return _stream(
+        inputs,
+        process_sinogram_array,
+        lambda source: (_load_sinogram(source), None),
+        dict(params, target_size=target_size),
+        label="Sinogram",
+        workers=workers,
+        prefetch=prefetch,
+        max_in_flight=max_in_flight,
+        ordered=ordered,
+        on_error=on_error,
+    )
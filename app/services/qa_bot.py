@@ -33,7 +33,7 @@ _KB: Dict[str, QAItem] = {
             "FBP (Filtered Back Projection) là phương pháp tái tạo ảnh CT cổ điển. "
             "Quy trình: (1) có sinogram là tập phép chiếu Radon theo nhiều góc; "
             "(2) lọc tần số (ví dụ Hann) để giảm mờ; (3) chiếu ngược (back-project) các phép chiếu đã lọc về không gian ảnh; "
-            "(4) chuẩn hóa cường độ. Trong mã, bước (2)-(3) được thực hiện bằng skimage.transform.iradon(filter_name='hann')."
+            "(4) chuẩn hóa cường độ. Trong mã, bước (2)-(3) được thực hiện bằng fbp_reconstruct (app/services/fbp.py): lọc Hann bằng một lần rfft cho mọi góc rồi chiếu ngược vectơ hóa."
         ),
     ),
     "inputs": QAItem(
@@ -65,7 +65,7 @@ _KB: Dict[str, QAItem] = {
         answer=(
             "Nguyên lý: ảnh xám được biến đổi Radon để tạo sinogram (ma trận cường độ theo vị trí cảm biến và góc chiếu). "
             "Từ sinogram, dùng phép chiếu ngược có lọc (iradon) để khôi phục lát cắt CT. "
-            "Trong code: radon(img, theta) tạo sinogram; iradon(sino, theta, filter_name='hann', circle=False) tái tạo ảnh."
+            "Trong code: forward_project(img, theta) tạo sinogram (phép chiếu Joseph, tương đương radon); fbp_reconstruct(sino, theta, filter_name='hann') tái tạo ảnh (tương đương iradon với circle=False)."
         ),
     ),
     "algorithms": QAItem(
@@ -83,7 +83,7 @@ _KB: Dict[str, QAItem] = {
         ],
         answer=(
             "Thuật toán áp dụng: (1) Tiền xử lý gồm CLAHE (cân bằng histogram thích nghi) và khử nhiễu NL-Means; "
-            "(2) Tạo sinogram bằng Radon với theta đều từ 0–180°; (3) Tái tạo bằng FBP (iradon) với bộ lọc Hann."
+            "(2) Tạo sinogram bằng Radon với theta đều từ 0–180°; (3) Tái tạo bằng FBP với bộ lọc Hann mặc định; Sinogram Lab cho chọn Ramp, Shepp-Logan, Cosine, Hamming, Hann và tần số cắt."
         ),
     ),
     "outputs": QAItem(
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Mapping, Optional, Sequence, Union
+
+from .env import env_mb
+from .stages import freeze_arrays, payload_nbytes
+
+_DEFAULT_MAX_MB = 256
+_DEFAULT_DISK_MB = 2048
+# Tăng khi cấu trúc hoặc cách tính kết quả thay đổi để tầng đĩa không trả về đối tượng cũ.
+_CACHE_VERSION = 3
+
+
+def result_key(
+    kind: str,
+    payload: Union[bytes, Sequence[bytes]],
+    params: Mapping[str, Any],
+) -> str:
+    """Khóa nội dung: băm BLAKE2 của các byte tải lên cùng tham số pipeline.
+
+    Tên tệp không tham gia vào khóa, nên cùng một tệp tải lại (kể cả dưới
+    tên khác) vẫn trúng cache.
+    """
+
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{_CACHE_VERSION}|{kind}|{sorted(params.items())!r}".encode("utf-8"))
+    chunks = [payload] if isinstance(payload, (bytes, bytearray, memoryview)) else payload
+    for chunk in chunks:
+        digest.update(len(chunk).to_bytes(8, "little"))
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Cache kết quả hoàn chỉnh (ProcessedImage, ReconstructionResult, ...) theo khóa nội dung.
+
+    Tầng bộ nhớ là LRU giới hạn theo dung lượng, dùng chung cho mọi phiên
+    Streamlit trong tiến trình; kết quả được khóa chỉ đọc vì có thể được
+    nhiều phiên cùng hiển thị. Khi có ``directory``, kết quả được pickle
+    xuống đĩa (giới hạn ``max_disk_bytes``, xóa tệp cũ nhất trước) để các
+    lần khởi động sau dùng lại. Chỉ trỏ ``directory`` tới thư mục tin cậy:
+    nạp pickle có thể chạy mã tùy ý.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        *,
+        directory: Optional[Path] = None,
+        max_disk_bytes: int = _DEFAULT_DISK_MB * 1024 * 1024,
+    ) -> None:
+        self.max_bytes = int(max_bytes)
+        self.directory = Path(directory) if directory else None
+        self.max_disk_bytes = int(max_disk_bytes)
+        self._entries: "OrderedDict[str, tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        value = self._load(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._insert(key, value)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._insert(key, value)
+        self._store(key, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            stats = {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+        if self.directory is not None:
+            files = self._disk_files()
+            stats["disk_entries"] = len(files)
+            stats["disk_bytes"] = sum(size for _, size, _ in files)
+            stats["max_disk_bytes"] = self.max_disk_bytes
+        return stats
+
+    def _insert(self, key: str, value: Any) -> None:
+        nbytes = payload_nbytes(value)
+        if nbytes > self.max_bytes:
+            return
+        freeze_arrays(value)
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous[1]
+        self._entries[key] = (value, nbytes)
+        self._bytes += nbytes
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted[1]
+            self.evictions += 1
+
+    def _path(self, key: str) -> Path:
+        assert self.directory is not None
+        return self.directory / f"{key}.pkl"
+
+    def _load(self, key: str) -> Optional[Any]:
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with path.open("rb") as handle:
+                value = pickle.load(handle)
+            os.utime(path)  # Đánh dấu vừa dùng cho việc dọn theo LRU.
+            return value
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+
+    def _store(self, key: str, value: Any) -> None:
+        if self.directory is None:
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            # Ghi vào tệp tạm rồi đổi tên để tiến trình khác không đọc tệp dở.
+            tmp_path = path.with_name(path.name + f".{os.getpid()}.tmp")
+            with tmp_path.open("wb") as handle:
+                pickle.dump(value, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            self._prune_disk()
+        except OSError:
+            pass
+
+    def _disk_files(self) -> list[tuple[float, int, Path]]:
+        assert self.directory is not None
+        files = []
+        try:
+            for path in self.directory.glob("*.pkl"):
+                stat = path.stat()
+                files.append((stat.st_mtime, stat.st_size, path))
+        except OSError:
+            pass
+        return files
+
+    def _prune_disk(self) -> None:
+        files = sorted(self._disk_files())
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                pass
+
+
+_DEFAULT_CACHE: Optional[ResultCache] = None
+
+
+def default_result_cache() -> ResultCache:
+    """Cache kết quả dùng chung trong tiến trình (mọi phiên Streamlit), cấu hình qua biến môi trường.
+
+    ``CT_RESULT_CACHE_MB`` đặt giới hạn bộ nhớ (mặc định 256 MB),
+    ``CT_RESULT_CACHE_DIR`` bật tầng đĩa và ``CT_RESULT_CACHE_DISK_MB`` giới
+    hạn dung lượng của nó (mặc định 2048 MB).
+    """
+
+    global _DEFAULT_CACHE
+    if _DEFAULT_CACHE is None:
+        directory = os.environ.get("CT_RESULT_CACHE_DIR", "").strip() or None
+        _DEFAULT_CACHE = ResultCache(
+            env_mb("CT_RESULT_CACHE_MB", _DEFAULT_MAX_MB),
+            directory=Path(directory) if directory else None,
+            max_disk_bytes=env_mb("CT_RESULT_CACHE_DISK_MB", _DEFAULT_DISK_MB),
+        )
+    return _DEFAULT_CACHE
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import pickle
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Iterator
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class SharedArraySpec:
+    """Mô tả gọn (có thể pickle) để tiến trình con gắn vào một SharedArray."""
+
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+
+class SharedArray:
+    """Mảng NumPy nằm trên ``multiprocessing.shared_memory``.
+
+    Tiến trình tạo mảng sở hữu vùng nhớ và phải gọi ``close`` (hoặc dùng
+    ``with``) để giải phóng; tiến trình con chỉ gắn vào qua ``attach``.
+    """
+
+    def __init__(self, shape: tuple[int, ...], dtype: np.dtype) -> None:
+        dtype = np.dtype(dtype)
+        nbytes = max(1, int(np.prod(shape)) * dtype.itemsize)
+        self._shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self.array: np.ndarray = np.ndarray(shape, dtype=dtype, buffer=self._shm.buf)
+        self.spec = SharedArraySpec(self._shm.name, tuple(int(v) for v in shape), dtype.str)
+
+    @classmethod
+    def from_array(cls, source: np.ndarray) -> "SharedArray":
+        shared = cls(source.shape, source.dtype)
+        shared.array[...] = source
+        return shared
+
+    def close(self) -> None:
+        if self._shm is None:
+            return
+        del self.array
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self) -> "SharedArray":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+
+def _open_untracked(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python ≥ 3.13
+    except TypeError:
+        # Trước 3.13, gắn vào sẽ đăng ký lại với resource tracker; tiến trình
+        # con của multiprocessing dùng chung tracker với tiến trình cha nên
+        # việc đăng ký trùng là vô hại, và không được hủy đăng ký ở đây.
+        return shared_memory.SharedMemory(name=name)
+
+
+@contextmanager
+def attach(spec: SharedArraySpec) -> Iterator[np.ndarray]:
+    """Gắn vào mảng chia sẻ do tiến trình khác tạo (không sao chép dữ liệu)."""
+
+    shm = _open_untracked(spec.name)
+    array = np.ndarray(spec.shape, dtype=np.dtype(spec.dtype), buffer=shm.buf)
+    try:
+        yield array
+    finally:
+        del array
+        try:
+            shm.close()
+        except BufferError:
+            # Người gọi còn giữ view vào vùng nhớ; ánh xạ được thu hồi khi view bị hủy.
+            pass
+
+
+# Bộ đệm nhỏ hơn ngưỡng này đi cùng pickle: một khối shared memory cho mỗi
+# mảng nhỏ tốn hơn là chép thẳng.
+_INBAND_LIMIT = 64 * 1024
+
+
+@dataclass(frozen=True)
+class SharedPickle:
+    """Đối tượng pickle giao thức 5, các bộ đệm lớn nằm ngoài băng trên shared memory."""
+
+    header: bytes
+    buffers: tuple[tuple[str, int], ...]
+
+
+def dumps_shared(value: Any) -> SharedPickle:
+    """Đóng gói ``value`` để trả về tiến trình cha mà không pickle qua pipe các mảng lớn.
+
+    Mỗi bộ đệm ngoài băng được chép một lần vào một khối shared memory; khối
+    thuộc về bên nhận, bên nhận phải gọi ``loads_shared`` để đọc và giải phóng.
+    """
+
+    blocks: list[tuple[str, int]] = []
+
+    def _export(buffer: pickle.PickleBuffer) -> bool:
+        view = buffer.raw()
+        if view.nbytes < _INBAND_LIMIT:
+            return True
+        shm = shared_memory.SharedMemory(create=True, size=max(1, view.nbytes))
+        try:
+            shm.buf[: view.nbytes] = view
+            blocks.append((shm.name, view.nbytes))
+        finally:
+            shm.close()
+        return False
+
+    header = pickle.dumps(value, protocol=5, buffer_callback=_export)
+    return SharedPickle(header, tuple(blocks))
+
+
+def loads_shared(payload: SharedPickle) -> Any:
+    """Dựng lại đối tượng từ ``dumps_shared`` (chép ra bộ nhớ thường) và hủy các khối chia sẻ."""
+
+    buffers = []
+    for name, nbytes in payload.buffers:
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            buffers.append(bytearray(shm.buf[:nbytes]))
+        finally:
+            shm.close()
+            shm.unlink()
+    return pickle.loads(payload.header, buffers=buffers)
+
+
+def discard_shared(payload: SharedPickle) -> None:
+    """Hủy các khối chia sẻ của một kết quả ``dumps_shared`` không còn ai đọc."""
+
+    for name, _ in payload.buffers:
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            continue
+        shm.close()
+        shm.unlink()
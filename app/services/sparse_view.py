@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class SparseViewSettings:
+    """Chế độ tái tạo nhanh bằng cách chỉ giữ một phần góc chiếu.
+
+    ``factor`` giữ 1/factor số góc, ``target_angles`` (nếu có) đặt thẳng
+    số góc giữ lại. ``interpolate`` chèn thêm một góc nội suy giữa mỗi cặp
+    góc liền kề trong miền sinogram để giảm vệt sọc.
+    """
+
+    factor: int = 1
+    target_angles: Optional[int] = None
+    interpolate: bool = False
+
+    def __post_init__(self) -> None:
+        if self.factor < 1:
+            raise ValueError("Hệ số giảm góc phải ≥ 1.")
+        if self.target_angles is not None and self.target_angles < 2:
+            raise ValueError("Số góc giữ lại phải ≥ 2.")
+
+    def kept_angles(self, n_angles: int) -> int:
+        if self.target_angles is not None:
+            return max(2, min(n_angles, int(self.target_angles)))
+        return max(2, min(n_angles, int(np.ceil(n_angles / self.factor))))
+
+    def interpolates(self, n_angles: int) -> bool:
+        """Chỉ nội suy khi số góc sau khi chèn không vượt số góc gốc."""
+
+        return self.interpolate and 2 * self.kept_angles(n_angles) <= n_angles
+
+
+def _is_half_turn(theta: np.ndarray) -> bool:
+    """Góc chia đều và phủ đúng nửa vòng [0°, 180°) (góc kế tiếp là 180°)."""
+
+    if len(theta) < 2:
+        return False
+    step = np.diff(theta)
+    return bool(np.allclose(step, step[0]) and np.isclose(theta[-1] + step[0] - theta[0], 180.0))
+
+
+def _mirror_projection(projection: np.ndarray) -> np.ndarray:
+    """Phép chiếu tại θ + 180°: đảo trục đầu dò quanh tâm ``n // 2``."""
+
+    mirrored = projection[::-1]
+    if len(projection) % 2 == 0:
+        mirrored = np.roll(mirrored, 1)
+    return mirrored
+
+
+def interpolate_angles(sinogram: np.ndarray, theta: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Chèn một phép chiếu nội suy tuyến tính vào giữa mỗi cặp góc liền kề.
+
+    Nếu góc phủ nửa vòng đều nhau thì khoảng cuối (θ_cuối → 180°) cũng được
+    nội suy, dùng phép chiếu đầu tiên đã đảo đầu dò.
+    """
+
+    theta = np.asarray(theta, dtype=np.float64)
+    n_detectors, n_angles = sinogram.shape
+    wrap = _is_half_turn(theta)
+    n_gaps = n_angles if wrap else n_angles - 1
+
+    following = sinogram[:, 1:]
+    next_theta = theta[1:]
+    if wrap:
+        following = np.concatenate([following, _mirror_projection(sinogram[:, 0])[:, None]], axis=1)
+        next_theta = np.append(next_theta, theta[0] + 180.0)
+
+    result = np.empty((n_detectors, n_angles + n_gaps), dtype=sinogram.dtype)
+    result[:, 0::2] = sinogram
+    result[:, 1::2] = 0.5 * (sinogram[:, :n_gaps] + following)
+    angles = np.empty(n_angles + n_gaps, dtype=np.float64)
+    angles[0::2] = theta
+    angles[1::2] = 0.5 * (theta[:n_gaps] + next_theta)
+    return result, angles
+
+
+def _kept_indices(n_angles: int, kept: int) -> np.ndarray:
+    return np.round(np.arange(kept) * (n_angles / kept)).astype(int)
+
+
+def angular_error(sinogram: np.ndarray, theta: np.ndarray, settings: SparseViewSettings) -> float:
+    """Sai số tương đối khi dựng lại mọi góc từ đúng sinogram dùng để tái tạo.
+
+    Sinogram được giảm góc (và nội suy nếu bật) như ``decimate_angles``, rồi
+    mỗi góc gốc được nội suy tuyến tính giữa hai góc liền kề của nó; ngoài
+    khoảng góc đó dùng phép chiếu gần nhất. Chỉ tốn một phép tính trên
+    sinogram nên dùng được làm thước đo chất lượng cho từng mức giảm góc mà
+    không cần tái tạo đầy đủ để so sánh.
+    """
+
+    n_angles = sinogram.shape[1]
+    if settings.kept_angles(n_angles) >= n_angles:
+        return 0.0
+    theta = np.asarray(theta, dtype=np.float64)
+    used, used_theta = decimate_angles(sinogram, theta, settings)
+    position = np.interp(theta, used_theta, np.arange(len(used_theta)))
+    low = np.floor(position).astype(int)
+    high = np.minimum(low + 1, len(used_theta) - 1)
+    weight = position - low
+    approx = used[:, low] * (1.0 - weight) + used[:, high] * weight
+    norm = float(np.linalg.norm(sinogram)) or 1.0
+    return float(np.linalg.norm(sinogram - approx)) / norm
+
+
+def decimate_angles(
+    sinogram: np.ndarray,
+    theta: np.ndarray,
+    settings: SparseViewSettings,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Giữ lại các góc rải đều theo ``settings`` (và nội suy thêm nếu bật).
+
+    Chi phí chiếu ngược tỉ lệ thuận với số góc nên tốc độ tăng xấp xỉ
+    bằng tỉ số giữa số góc gốc và số góc trả về.
+    """
+
+    n_angles = sinogram.shape[1]
+    kept = settings.kept_angles(n_angles)
+    if kept < n_angles:
+        index = _kept_indices(n_angles, kept)
+        sinogram = sinogram[:, index]
+        theta = np.asarray(theta)[index]
+    if settings.interpolates(n_angles):
+        sinogram, theta = interpolate_angles(sinogram, theta)
+    return np.ascontiguousarray(sinogram), np.asarray(theta, dtype=np.float64)
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .env import env_mb
+
+_DEFAULT_MAX_MB = 256
+
+# Tên đầu vào gốc của đồ thị (ảnh hoặc sinogram người dùng tải lên).
+SOURCE = "source"
+
+
+def content_digest(array: np.ndarray) -> str:
+    """Băm nội dung mảng (kèm kích thước, kiểu dữ liệu) làm khóa cho đầu vào gốc."""
+
+    array = np.ascontiguousarray(array)
+    digest = hashlib.sha1(f"{array.shape}|{array.dtype.str}|".encode("utf-8"))
+    digest.update(memoryview(array).cast("B"))
+    return digest.hexdigest()
+
+
+def iter_arrays(value: Any) -> Iterator[np.ndarray]:
+    """Các mảng NumPy trong một kết quả (mảng, dataclass, tuple, dict)."""
+
+    if isinstance(value, np.ndarray):
+        yield value
+    elif dataclasses.is_dataclass(value) and not isinstance(value, type):
+        for f in dataclasses.fields(value):
+            yield from iter_arrays(getattr(value, f.name))
+    elif isinstance(value, (tuple, list)):
+        for item in value:
+            yield from iter_arrays(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from iter_arrays(item)
+
+
+def payload_nbytes(value: Any) -> int:
+    """Tổng dung lượng các mảng NumPy trong một kết quả (mảng, dataclass, tuple, dict)."""
+
+    return sum(int(array.nbytes) for array in iter_arrays(value))
+
+
+def freeze_arrays(value: Any) -> None:
+    """Khóa chỉ đọc các mảng trong kết quả đã lưu: kết quả được dùng chung giữa các lần chạy."""
+
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif dataclasses.is_dataclass(value) and not isinstance(value, type):
+        for f in dataclasses.fields(value):
+            freeze_arrays(getattr(value, f.name))
+    elif isinstance(value, (tuple, list)):
+        for item in value:
+            freeze_arrays(item)
+
+
+@dataclass(frozen=True)
+class Stage:
+    """Một bước của đồ thị xử lý.
+
+    ``run`` nhận lần lượt đầu ra của các bước trong ``inputs``, rồi các
+    tham số dạng từ khóa và ``report`` (dict ghi thông tin hiển thị, được
+    lưu cùng kết quả để phát lại khi trúng cache).
+    """
+
+    name: str
+    run: Callable[..., Any]
+    inputs: Tuple[str, ...] = (SOURCE,)
+
+
+class StageCache:
+    """Bộ nhớ đệm LRU theo dung lượng cho đầu ra của từng bước, có đếm trúng/trượt."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = int(max_bytes)
+        self._entries: "OrderedDict[str, tuple[Any, dict[str, str], int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, stage: str, key: str) -> Optional[tuple[Any, dict[str, str]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses[stage] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits[stage] += 1
+            return entry[0], entry[1]
+
+    def put(self, key: str, value: Any, report: dict[str, str]) -> None:
+        nbytes = payload_nbytes(value)
+        if nbytes > self.max_bytes:
+            return
+        freeze_arrays(value)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[key] = (value, dict(report), nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[2]
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            stats = {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": sum(self.hits.values()),
+                "misses": sum(self.misses.values()),
+                "evictions": self.evictions,
+            }
+            for stage in sorted(set(self.hits) | set(self.misses)):
+                stats[f"{stage}.hits"] = self.hits[stage]
+                stats[f"{stage}.misses"] = self.misses[stage]
+            return stats
+
+
+class StageGraph:
+    """Đồ thị có hướng không chu trình gồm các bước đặt tên, chạy tăng dần.
+
+    Khóa đầu ra của mỗi bước là băm của (tên bước, tham số, khóa các đầu
+    vào); khóa đầu vào gốc là băm nội dung. Nhờ vậy chỉ đổi tham số tái tạo
+    thì ảnh khử nhiễu và sinogram được lấy lại từ cache mà không phải băm
+    lại các mảng trung gian.
+    """
+
+    def __init__(self, stages: Sequence[Stage]) -> None:
+        known = {SOURCE}
+        for stage in stages:
+            missing = [name for name in stage.inputs if name not in known]
+            if missing:
+                raise ValueError(f"Bước {stage.name} dùng đầu vào chưa được định nghĩa: {', '.join(missing)}")
+            if stage.name in known:
+                raise ValueError(f"Tên bước bị trùng: {stage.name}")
+            known.add(stage.name)
+        self.stages = tuple(stages)
+
+    @staticmethod
+    def _key(stage: Stage, params: Mapping[str, Any], input_keys: Sequence[str]) -> str:
+        payload = repr((stage.name, sorted(params.items()), tuple(input_keys)))
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def run(
+        self,
+        source: np.ndarray,
+        params: Mapping[str, Mapping[str, Any]],
+        *,
+        context: Optional[Mapping[str, Mapping[str, Any]]] = None,
+        cache: Optional[StageCache] = None,
+        reports: Optional[dict[str, dict[str, str]]] = None,
+    ) -> dict[str, Any]:
+        """Chạy mọi bước theo thứ tự, trả về đầu ra theo tên bước.
+
+        ``params`` (theo tên bước) tham gia vào khóa cache; ``context`` là
+        tham số không ảnh hưởng kết quả (callback tiến trình, xem trước) nên
+        không được băm. Báo cáo của bước trúng cache là báo cáo đã lưu ở
+        lần tính trước.
+        """
+
+        cache = cache if cache is not None else default_stage_cache()
+        outputs: dict[str, Any] = {SOURCE: source}
+        keys: dict[str, str] = {SOURCE: content_digest(source)}
+        for stage in self.stages:
+            stage_params = dict(params.get(stage.name, {}))
+            key = self._key(stage, stage_params, [keys[name] for name in stage.inputs])
+            cached = cache.get(stage.name, key)
+            if cached is not None:
+                value, report = cached
+            else:
+                report = {}
+                value = stage.run(
+                    *(outputs[name] for name in stage.inputs),
+                    report=report,
+                    **stage_params,
+                    **(context or {}).get(stage.name, {}),
+                )
+                cache.put(key, value, report)
+            outputs[stage.name] = value
+            keys[stage.name] = key
+            if reports is not None:
+                reports[stage.name] = dict(report)
+        return outputs
+
+
+_DEFAULT_CACHE: Optional[StageCache] = None
+
+
+def default_stage_cache() -> StageCache:
+    """Cache bước dùng chung trong tiến trình; ``CT_STAGE_CACHE_MB`` đặt giới hạn (mặc định 256 MB)."""
+
+    global _DEFAULT_CACHE
+    if _DEFAULT_CACHE is None:
+        _DEFAULT_CACHE = StageCache(env_mb("CT_STAGE_CACHE_MB", _DEFAULT_MAX_MB))
+    return _DEFAULT_CACHE
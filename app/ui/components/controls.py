@@ -6,6 +6,13 @@ from typing import Dict, List, Optional
 import streamlit as st
 from streamlit.runtime.uploaded_file_manager import UploadedFile
 
+from app.services.denoise import DEFAULT_DENOISE, DENOISE_BACKENDS
+from app.services.fanbeam import FanBeamGeometry
+from app.services.fbp import RegionOfInterest
+from app.services.filters import FILTERS
+from app.services.image_processing import SINOGRAM_MAX_SIZE
+from app.services.sparse_view import SparseViewSettings
+
 
 @dataclass
 class ControlState:
@@ -13,9 +20,22 @@ class ControlState:
     source: str
     images: List[UploadedFile]
     dicoms: List[UploadedFile]
+    dicom_volume: bool
     camera_capture: Optional[UploadedFile]
     sinograms: List[UploadedFile]
     sinogram_target: int
+    sinogram_budget: int
+    denoise_backend: str
+    adaptive_denoise: bool
+    fan_geometry: Optional[FanBeamGeometry]
+    recon_method: str
+    recon_filter: str
+    filter_cutoff: float
+    max_iterations: int
+    time_budget: Optional[float]
+    progressive_preview: bool
+    sparse_view: Optional[SparseViewSettings]
+    roi: Optional[RegionOfInterest]
     show_progress: bool
     auto_process: bool
     process_requested: bool
@@ -28,6 +48,33 @@ SOURCE_OPTIONS: Dict[str, str] = {
     "Camera trực tiếp": "webcam",
 }
 
+BEAM_OPTIONS: Dict[str, Optional[str]] = {
+    "Chùm song song": None,
+    "Chùm quạt · đầu dò cung (equiangular)": "equiangular",
+    "Chùm quạt · đầu dò phẳng (equispaced)": "equispaced",
+}
+
+RECON_METHOD_OPTIONS: Dict[str, str] = {
+    "FBP (nhanh)": "fbp",
+    "OS-SART": "os-sart",
+    "SART": "sart",
+    "SIRT": "sirt",
+}
+
+FILTER_LABELS: Dict[str, str] = {
+    "ramp": "Ramp (Ram-Lak)",
+    "shepp-logan": "Shepp-Logan",
+    "cosine": "Cosine",
+    "hamming": "Hamming",
+    "hann": "Hann",
+}
+
+COST_LABELS: Dict[str, str] = {
+    "fast": "nhanh",
+    "medium": "vừa",
+    "slow": "chậm",
+}
+
 MODE_META = {
     "pipeline": {
         "name": "Pipeline Studio",
@@ -82,9 +129,22 @@ def render_controls() -> ControlState:
 
     images: List[UploadedFile] = []
     dicoms: List[UploadedFile] = []
+    dicom_volume = False
     camera_capture: Optional[UploadedFile] = None
     sinograms: List[UploadedFile] = []
     sinogram_target = 256
+    sinogram_budget = SINOGRAM_MAX_SIZE
+    denoise_backend = DEFAULT_DENOISE
+    adaptive_denoise = False
+    fan_geometry: Optional[FanBeamGeometry] = None
+    recon_method = "fbp"
+    recon_filter = "hann"
+    filter_cutoff = 1.0
+    max_iterations = 20
+    time_budget: Optional[float] = None
+    progressive_preview = False
+    sparse_view: Optional[SparseViewSettings] = None
+    roi: Optional[RegionOfInterest] = None
     auto_process = False
     process_requested = False
     reconstruct_requested = False
@@ -118,6 +178,30 @@ def render_controls() -> ControlState:
                 unsafe_allow_html=True,
             )
 
+        backend_names = [name for name, backend in DENOISE_BACKENDS.items() if backend.available]
+        denoise_backend = st.selectbox(
+            "Thuật toán khử nhiễu",
+            backend_names,
+            index=backend_names.index(DEFAULT_DENOISE),
+            format_func=lambda name: f"{DENOISE_BACKENDS[name].label} · {COST_LABELS[DENOISE_BACKENDS[name].cost]}",
+        )
+        adaptive_denoise = st.toggle(
+            "Khử nhiễu thích nghi",
+            value=False,
+            key="toggle_adaptive_denoise",
+            help=(
+                "Ước lượng mức nhiễu trước: bỏ qua ảnh sạch, tinh chỉnh tham số NL-means theo σ. "
+                "Kết quả khác với khử nhiễu tham số cố định; thời gian tiết kiệm chỉ là ước tính."
+            ),
+        )
+
+        sinogram_budget = st.select_slider(
+            "Giới hạn độ phân giải sinogram",
+            options=sorted({128, 256, 384, 512, 768, 1024, SINOGRAM_MAX_SIZE}),
+            value=SINOGRAM_MAX_SIZE,
+            help="Cạnh dài tối đa của ảnh khi chiếu Radon và tái tạo; lớn hơn thì chi tiết hơn nhưng chậm hơn.",
+        )
+
         st.divider()
 
         if source_key == "png":
@@ -136,6 +220,12 @@ def render_controls() -> ControlState:
                 accept_multiple_files=True,
                 label_visibility="collapsed",
             ) or []
+            dicom_volume = st.toggle(
+                "Chế độ khối 3D",
+                value=False,
+                key="toggle_dicom_volume",
+                help="Ghép các tệp thành một khối theo vị trí lát cắt và xử lý song song nhiều lát.",
+            )
         else:
             st.markdown("<div class='section-subtitle'><i class='ti ti-camera-bolt'></i><span>Chụp trực tiếp</span></div>", unsafe_allow_html=True)
             camera_capture = st.camera_input("Nhấn để chụp", label_visibility="collapsed")
@@ -171,6 +261,139 @@ def render_controls() -> ControlState:
             step=32,
         )
 
+        beam_label = st.selectbox(
+            "Hình học chùm tia",
+            list(BEAM_OPTIONS.keys()),
+            help="Sinogram chùm quạt: hàng là đầu dò, cột là vị trí nguồn trên cung quét.",
+        )
+        fan_detector = BEAM_OPTIONS[beam_label]
+        if fan_detector is not None:
+            col_fan, col_source, col_scan = st.columns(3)
+            with col_fan:
+                fan_angle = st.number_input("Góc quạt (°)", min_value=1.0, max_value=170.0, value=55.0, step=1.0)
+            with col_source:
+                source_distance = st.number_input(
+                    "Nguồn – tâm quay (mm)",
+                    min_value=1.0,
+                    max_value=5000.0,
+                    value=570.0,
+                    step=10.0,
+                )
+            with col_scan:
+                scan_range = st.number_input(
+                    "Cung quét (°)",
+                    min_value=180.0 + float(fan_angle),
+                    max_value=360.0,
+                    value=360.0,
+                    step=1.0,
+                )
+            fan_geometry = FanBeamGeometry(
+                source_distance=float(source_distance),
+                fan_angle=float(fan_angle),
+                detector=fan_detector,
+                scan_range=float(scan_range),
+            )
+
+        method_label = st.selectbox(
+            "Thuật toán tái tạo",
+            list(RECON_METHOD_OPTIONS.keys()),
+            help="Thuật toán lặp cho ảnh đẹp hơn với sinogram ít góc hoặc liều thấp nhưng chậm hơn FBP.",
+        )
+        recon_method = RECON_METHOD_OPTIONS[method_label]
+        if recon_method == "fbp":
+            col_filter, col_cutoff = st.columns(2)
+            with col_filter:
+                filter_names = list(FILTERS)
+                recon_filter = st.selectbox(
+                    "Bộ lọc FBP",
+                    filter_names,
+                    index=filter_names.index("hann"),
+                    format_func=lambda name: FILTER_LABELS.get(name, name),
+                )
+            with col_cutoff:
+                filter_cutoff = st.slider(
+                    "Tần số cắt (× Nyquist)",
+                    min_value=0.1,
+                    max_value=1.0,
+                    value=1.0,
+                    step=0.05,
+                    help="Giảm tần số cắt để bớt nhiễu hạt, đổi lại ảnh mềm hơn.",
+                )
+            use_roi = st.toggle(
+                "Chỉ tái tạo vùng quan tâm",
+                value=False,
+                key="toggle_roi",
+                help="Chỉ chiếu ngược lên vùng được chọn; thời gian tỉ lệ với diện tích vùng.",
+            )
+            if use_roi:
+                col_x, col_y = st.columns(2)
+                with col_x:
+                    centre_col = st.slider("Tâm vùng · cột", 0, sinogram_target - 1, sinogram_target // 2)
+                with col_y:
+                    centre_row = st.slider("Tâm vùng · hàng", 0, sinogram_target - 1, sinogram_target // 2)
+                col_size, col_res = st.columns(2)
+                with col_size:
+                    roi_size = st.slider("Cạnh vùng (px)", 16, sinogram_target, sinogram_target // 4, step=16)
+                with col_res:
+                    roi_resolution = st.select_slider(
+                        "Độ phân giải vùng",
+                        options=[64, 128, 256, 512],
+                        value=256,
+                    )
+                roi = RegionOfInterest.centred(centre_row, centre_col, roi_size, resolution=int(roi_resolution))
+        else:
+            col_iter, col_budget = st.columns(2)
+            with col_iter:
+                max_iterations = st.slider("Số vòng lặp tối đa", min_value=5, max_value=200, value=20, step=5)
+            with col_budget:
+                budget_value = st.number_input(
+                    "Giới hạn thời gian (giây)",
+                    min_value=0.0,
+                    max_value=600.0,
+                    value=0.0,
+                    step=5.0,
+                    help="0 nghĩa là không giới hạn.",
+                )
+                time_budget = float(budget_value) or None
+
+        progressive_preview = st.toggle(
+            "Xem trước lũy tiến",
+            value=True,
+            key="toggle_progressive",
+            help="Hiện ảnh xem trước 64/128 px trong lúc chờ ảnh tái tạo đầy đủ.",
+        )
+
+        fast_mode = st.toggle(
+            "Chế độ nhanh (ít góc)",
+            value=False,
+            key="toggle_sparse_view",
+            help="Chỉ tái tạo từ một phần góc chiếu để duyệt nhanh; kết quả báo tăng tốc và sai số ước tính.",
+        )
+        if fast_mode:
+            col_factor, col_target = st.columns(2)
+            with col_factor:
+                factor = st.select_slider("Giảm số góc", options=[2, 3, 4, 6, 8], value=4, format_func=lambda v: f"×{v}")
+            with col_target:
+                target_angles = st.number_input(
+                    "Số góc mục tiêu",
+                    min_value=0,
+                    max_value=1024,
+                    value=0,
+                    step=10,
+                    help="0 nghĩa là dùng hệ số giảm bên cạnh.",
+                )
+            interpolate = st.toggle(
+                "Nội suy góc trong sinogram",
+                value=True,
+                key="toggle_sparse_interp",
+                help="Chèn góc nội suy giữa các góc được giữ để giảm vệt sọc.",
+            )
+            sparse_view = SparseViewSettings(
+                factor=int(factor),
+                target_angles=int(target_angles) if target_angles >= 2 else None,
+                interpolate=interpolate,
+            )
+
         reconstruct_requested = st.button("Tái tạo sinogram", use_container_width=True)
 
     st.markdown(
@@ -192,9 +415,22 @@ def render_controls() -> ControlState:
         source=source_key,
         images=list(images),
         dicoms=list(dicoms),
+        dicom_volume=dicom_volume,
         camera_capture=camera_capture,
         sinograms=list(sinograms),
         sinogram_target=sinogram_target,
+        sinogram_budget=sinogram_budget,
+        denoise_backend=denoise_backend,
+        adaptive_denoise=adaptive_denoise,
+        fan_geometry=fan_geometry,
+        recon_method=recon_method,
+        recon_filter=recon_filter,
+        filter_cutoff=filter_cutoff,
+        max_iterations=max_iterations,
+        time_budget=time_budget,
+        progressive_preview=progressive_preview,
+        sparse_view=sparse_view,
+        roi=roi,
         show_progress=show_progress,
         auto_process=auto_process,
         process_requested=process_requested,
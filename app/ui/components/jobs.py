@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from typing import List, Sequence
+
+import streamlit as st
+
+from app.services.jobs import Job
+
+STATE_LABELS = {
+    "queued": "Đang chờ",
+    "running": "Đang chạy",
+    "done": "Hoàn tất",
+    "failed": "Lỗi",
+    "cancelled": "Đã hủy",
+}
+
+
+def render_job_panel(jobs: Sequence[Job], *, show_progress: bool = True) -> List[str]:
+    """Hiển thị các công việc nền của phiên; trả về id các công việc người dùng bấm hủy."""
+
+    cancelled: List[str] = []
+    for job in jobs:
+        with st.container(border=True):
+            cols = st.columns([5, 1])
+            state = "Đang hủy" if job.active and job.cancel_requested else STATE_LABELS[job.state]
+            cols[0].markdown(f"**{job.label}** · {state} · {job.elapsed:.0f} s")
+            if job.active and cols[1].button(
+                "Hủy",
+                key=f"cancel_job_{job.id}",
+                disabled=job.cancel_requested,
+                use_container_width=True,
+            ):
+                cancelled.append(job.id)
+            if show_progress:
+                st.progress(job.progress, text=job.stage or None)
+            if len(job.items) > 1:
+                st.table([{"Tệp": name, "Trạng thái": status} for name, status in job.items])
+            preview = job.preview
+            if preview is not None:
+                st.image(preview[0], caption=preview[1], width=256, clamp=True)
+    return cancelled
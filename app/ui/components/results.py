@@ -1,32 +1,13 @@
 from __future__ import annotations
 
-from io import BytesIO
-from typing import Iterable
+from typing import Any, Callable, Iterable, Optional, Sequence, Tuple
 
 import numpy as np
 import streamlit as st
-from PIL import Image
 
-from app.services.pipeline import ProcessedImage, ReconstructionResult
-
-
-def _image_to_bytes(img_array: np.ndarray, format: str = "PNG") -> bytes:
-    """Convert numpy array to image bytes for download."""
-    if img_array.dtype != np.uint8:
-        img_normalized = (
-            (img_array - img_array.min()) / (img_array.max() - img_array.min()) * 255
-        ).astype(np.uint8)
-    else:
-        img_normalized = img_array
-
-    if len(img_normalized.shape) == 2:
-        pil_img = Image.fromarray(img_normalized, mode="L")
-    else:
-        pil_img = Image.fromarray(img_normalized, mode="RGB")
-
-    buf = BytesIO()
-    pil_img.save(buf, format=format)
-    return buf.getvalue()
+from app.services.assets import full_png, preview_bytes, thumbnail_bytes
+from app.services.history import HistoryStore
+from app.services.pipeline import ProcessedImage, ReconstructionResult, VolumeResult, format_nbytes
 
 
 def _render_image_with_download(
@@ -35,35 +16,39 @@ def _render_image_with_download(
     filename: str,
     key_suffix: str,
 ) -> None:
-    """Render image with overlay download button."""
-    import base64
-
-    img_bytes = _image_to_bytes(img_array)
-    b64 = base64.b64encode(img_bytes).decode()
+    """Hiển thị ảnh xem trước đã cache kèm nút tải PNG đủ độ phân giải.
 
-    container_id = f"img-container-{key_suffix}"
+    PNG gốc chỉ được mã hóa khi người dùng bấm tải, nên mỗi lượt chạy lại
+    không phải mã hóa và gửi lại toàn bộ ảnh.
+    """
 
-    st.markdown(
-        f"""
-        <div class='image-container' id='{container_id}'>
-            <a href="data:image/png;base64,{b64}" download="{filename}" class='download-overlay-btn' title='Tải xuống'>
-                <i class='ti ti-download'></i>
-            </a>
-        </div>
-        """,
-        unsafe_allow_html=True,
+    st.image(preview_bytes(img_array), caption=caption, use_container_width=True)
+    st.download_button(
+        "Tải xuống",
+        data=lambda: full_png(img_array),
+        file_name=filename,
+        mime="image/png",
+        key=f"download_{key_suffix}",
+        on_click="ignore",
+        icon=":material/download:",
+        type="tertiary",
     )
-    st.image(img_array, caption=caption, use_container_width=True, clamp=True)
+
+
+_METRICS_PER_ROW = 4
 
 
 def _render_image_metrics(info: dict[str, str]) -> None:
-    cols = st.columns(len(info))
-    for (key, value), col in zip(info.items(), cols):
-        with col:
-            st.metric(key, value)
+    items = list(info.items())
+    for start in range(0, len(items), _METRICS_PER_ROW):
+        row = items[start : start + _METRICS_PER_ROW]
+        cols = st.columns(_METRICS_PER_ROW)
+        for (key, value), col in zip(row, cols):
+            with col:
+                st.metric(key, value)
 
 
-def _render_result_card(result: ProcessedImage, index: int, total: int) -> None:
+def _render_result_card(result: ProcessedImage, index: int, total: int, scope: str) -> None:
     st.markdown(
         f"""
         <div class='glass-section'>
@@ -85,13 +70,13 @@ def _render_result_card(result: ProcessedImage, index: int, total: int) -> None:
             result.original_display,
             "Ảnh gốc",
             f"{result.name}_original.png",
-            f"orig_{index}"
+            f"{scope}_orig_{index}"
         )
         _render_image_with_download(
             result.denoised,
             "Sau khử nhiễu",
             f"{result.name}_denoised.png",
-            f"denoised_{index}"
+            f"{scope}_denoised_{index}"
         )
 
     with primary_cols[1]:
@@ -99,25 +84,95 @@ def _render_result_card(result: ProcessedImage, index: int, total: int) -> None:
             result.sinogram.image,
             "Sinogram tạo mới",
             f"{result.name}_sinogram.png",
-            f"sino_{index}"
+            f"{scope}_sino_{index}"
         )
         _render_image_with_download(
             result.reconstruction,
             "Lát cắt tái tạo",
             f"{result.name}_reconstruction.png",
-            f"recon_{index}"
+            f"{scope}_recon_{index}"
         )
 
     with st.expander("Đối chiếu nhanh", expanded=False):
         compare_cols = st.columns(2)
         with compare_cols[0]:
-            st.image(result.original_display, caption="Trước xử lý", use_container_width=True, clamp=True)
+            st.image(preview_bytes(result.original_display), caption="Trước xử lý", use_container_width=True)
         with compare_cols[1]:
-            st.image(result.denoised, caption="Sau xử lý", use_container_width=True, clamp=True)
+            st.image(preview_bytes(result.denoised), caption="Sau xử lý", use_container_width=True)
+
+
+PAGE_SIZES: tuple[int, ...] = (5, 10, 20, 50)
+_DEFAULT_PAGE_SIZE = 10
+_GRID_COLUMNS = 4
+
+
+def _shift_page(page_key: str, step: int) -> None:
+    st.session_state[page_key] = max(0, st.session_state.get(page_key, 0) + step)
+
+
+def _page_window(list_key: str, total: int) -> Tuple[range, bool]:
+    """Thanh điều hướng của một danh sách kết quả; trả về khoảng chỉ số đang hiển thị và cờ chế độ lưới.
+
+    Chỉ các mục trong khoảng được dựng thành thẻ hoặc ảnh nhỏ, nên thời gian
+    mỗi lượt chạy lại không tăng theo độ dài danh sách. Danh sách ngắn hơn
+    một trang nhỏ nhất không có thanh điều hướng.
+    """
+
+    if total <= PAGE_SIZES[0]:
+        return range(total), False
+
+    page_key = f"{list_key}_page"
+    cols = st.columns([2, 2, 1, 3, 1], vertical_alignment="bottom")
+    grid = cols[0].toggle("Lưới ảnh nhỏ", key=f"{list_key}_grid")
+    page_size = cols[1].selectbox(
+        "Số mục mỗi trang",
+        PAGE_SIZES,
+        index=PAGE_SIZES.index(_DEFAULT_PAGE_SIZE),
+        key=f"{list_key}_page_size",
+    )
+    pages = -(-total // page_size)
+    page = min(st.session_state.get(page_key, 0), pages - 1)
+    st.session_state[page_key] = page
+    cols[2].button("‹", key=f"{list_key}_prev", disabled=page == 0, on_click=_shift_page, args=(page_key, -1))
+    start = page * page_size
+    stop = min(total, start + page_size)
+    cols[3].markdown(f"Trang {page + 1}/{pages} · mục {start + 1}–{stop}/{total}")
+    cols[4].button("›", key=f"{list_key}_next", disabled=page >= pages - 1, on_click=_shift_page, args=(page_key, 1))
+    return range(start, stop), grid
+
+
+def _render_thumbnail_grid(items: Sequence[Tuple[Optional[bytes], str]]) -> None:
+    for start in range(0, len(items), _GRID_COLUMNS):
+        cols = st.columns(_GRID_COLUMNS)
+        for (image, caption), col in zip(items[start : start + _GRID_COLUMNS], cols):
+            if image is not None:
+                col.image(image, caption=caption, use_container_width=True)
+            else:
+                col.caption(caption)
 
 
-def render_results(results: Iterable[ProcessedImage]) -> None:
-    results = list(results)
+def _render_window(
+    results: Sequence[Any],
+    render_card: Callable[[Any, int, int, str], None],
+    list_key: str,
+    scope: str,
+) -> None:
+    total = len(results)
+    window, grid = _page_window(list_key, total)
+    if grid:
+        _render_thumbnail_grid(
+            [(thumbnail_bytes(results[i].reconstruction), f"{i + 1}. {results[i].name}") for i in window]
+        )
+        return
+    for i in window:
+        render_card(results[i], i + 1, total, scope)
+        if i + 1 < window.stop:
+            st.divider()
+
+
+def render_results(results: Iterable[ProcessedImage], *, scope: str = "latest") -> None:
+    if not isinstance(results, Sequence):
+        results = list(results)
     if not results:
         st.markdown(
             """
@@ -130,15 +185,12 @@ def render_results(results: Iterable[ProcessedImage]) -> None:
         )
         return
 
-    total = len(results)
-    for idx, result in enumerate(results, start=1):
-        _render_result_card(result, idx, total)
-        if idx < total:
-            st.divider()
+    _render_window(results, _render_result_card, f"{scope}_pipeline", scope)
 
 
-def render_reconstruction_results(results: Iterable[ReconstructionResult]) -> None:
-    results = list(results)
+def render_reconstruction_results(results: Iterable[ReconstructionResult], *, scope: str = "latest") -> None:
+    if not isinstance(results, Sequence):
+        results = list(results)
     if not results:
         st.markdown(
             """
@@ -151,39 +203,131 @@ def render_reconstruction_results(results: Iterable[ReconstructionResult]) -> No
         )
         return
 
-    total = len(results)
-    for idx, result in enumerate(results, start=1):
-        st.markdown(
-            f"""
-            <div class='glass-section'>
-                <div style='display:flex; justify-content: space-between; align-items:center; margin-bottom: 0.5rem;'>
-                    <div class='result-badge'><i class='ti ti-wave-sine'></i>Sinogram {idx}/{total}</div>
-                    <h3 style='margin:0;'>{result.name}</h3>
-                </div>
+    _render_window(results, _render_reconstruction_card, f"{scope}_reconstruction", scope)
+
+
+def _render_reconstruction_card(result: ReconstructionResult, index: int, total: int, scope: str) -> None:
+    st.markdown(
+        f"""
+        <div class='glass-section'>
+            <div style='display:flex; justify-content: space-between; align-items:center; margin-bottom: 0.5rem;'>
+                <div class='result-badge'><i class='ti ti-wave-sine'></i>Sinogram {index}/{total}</div>
+                <h3 style='margin:0;'>{result.name}</h3>
             </div>
-            """,
-            unsafe_allow_html=True,
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    recon_cols = st.columns([1, 1], gap="medium")
+    with recon_cols[0]:
+        _render_image_with_download(
+            result.sinogram.image,
+            "Sinogram tải lên",
+            f"{result.name}_sinogram_input.png",
+            f"{scope}_sino_in_{index}"
+        )
+    with recon_cols[1]:
+        _render_image_with_download(
+            result.reconstruction,
+            "Kết quả tái tạo",
+            f"{result.name}_reconstructed.png",
+            f"{scope}_recon_out_{index}"
         )
 
-        recon_cols = st.columns([1, 1], gap="medium")
-        with recon_cols[0]:
-            _render_image_with_download(
-                result.sinogram.image,
-                "Sinogram tải lên",
-                f"{result.name}_sinogram_input.png",
-                f"sino_in_{idx}"
-            )
-        with recon_cols[1]:
-            _render_image_with_download(
-                result.reconstruction,
-                "Kết quả tái tạo",
-                f"{result.name}_reconstructed.png",
-                f"recon_out_{idx}"
-            )
+    with st.expander("Thông số tái tạo", expanded=False):
+        _render_image_metrics(result.info)
 
-        with st.expander("Thông số tái tạo", expanded=False):
-            _render_image_metrics(result.info)
 
-        if idx < total:
+_TIER_LABELS = {"ram": "RAM", "compressed": "Nén", "disk": "Đĩa"}
+
+
+def render_history(store: HistoryStore, kind: str) -> None:
+    """Danh sách lịch sử một loại kết quả theo trang; chỉ nạp lại kết quả của các thẻ đang mở.
+
+    Thẻ của kết quả còn trong RAM mở sẵn ở lần hiển thị đầu, kết quả đã nén
+    hoặc tràn đĩa chỉ được giải nén khi người dùng bật "Mở". Chế độ lưới
+    dùng ảnh nhỏ lưu sẵn trong từng mục nên không nạp lại kết quả nào.
+    """
+
+    render_card = _render_result_card if kind == "pipeline" else _render_reconstruction_card
+    entries = store.entries(kind)
+    total = len(entries)
+    window, grid = _page_window(f"history_{kind}", total)
+    if grid:
+        _render_thumbnail_grid([(entries[i].thumbnail, f"{i + 1}. {entries[i].name}") for i in window])
+        return
+    for i in window:
+        entry = entries[i]
+        cols = st.columns([5, 2, 1])
+        cols[0].markdown(f"**{i + 1}/{total} · {entry.name}**")
+        cols[1].caption(f"{_TIER_LABELS[entry.tier]} · {format_nbytes(entry.stored_bytes)}")
+        opened = cols[2].toggle("Mở", value=entry.tier == "ram", key=f"history_open_{entry.id}")
+        if opened:
+            render_card(store.load(entry), i + 1, total, f"history_{entry.id}")
+        if i + 1 < window.stop:
             st.divider()
 
+
+def render_history_stats(stats: dict[str, int]) -> None:
+    parts = [
+        f"RAM: {stats['ram_entries']} mục, {format_nbytes(stats['ram_bytes'])} / {format_nbytes(stats['max_ram_bytes'])}",
+        f"nén: {stats['compressed_entries']} mục, {format_nbytes(stats['compressed_bytes'])}"
+        f" / {format_nbytes(stats['max_compressed_bytes'])}",
+        f"đĩa: {stats['disk_entries']} mục, {format_nbytes(stats['disk_bytes'])} / {format_nbytes(stats['max_disk_bytes'])}",
+    ]
+    if stats["shared_bytes"]:
+        parts.append(f"dùng chung với cache kết quả: {format_nbytes(stats['shared_bytes'])}")
+    if stats["dropped"]:
+        parts.append(f"đã bỏ {stats['dropped']} mục cũ nhất")
+    st.caption(" · ".join(parts))
+
+
+def render_volume_results(result: VolumeResult) -> None:
+    st.markdown(
+        f"""
+        <div class='glass-section'>
+            <div style='display:flex; justify-content: space-between; align-items:center; margin-bottom: 0.5rem;'>
+                <div class='result-badge'><i class='ti ti-box'></i>Khối 3D · {result.depth} lát</div>
+                <h3 style='margin:0;'>{result.name}</h3>
+            </div>
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    _render_image_metrics(result.info)
+
+    index = 0
+    if result.depth > 1:
+        index = st.slider("Lát cắt", min_value=0, max_value=result.depth - 1, value=result.depth // 2, key="volume_slice")
+    st.caption(f"Vị trí lát: {result.slice_positions[index]:.2f}")
+
+    cols = st.columns(3, gap="medium")
+    with cols[0]:
+        st.image(preview_bytes(result.original[index]), caption="Ảnh gốc", use_container_width=True)
+    with cols[1]:
+        st.image(preview_bytes(result.denoised[index]), caption="Sau khử nhiễu", use_container_width=True)
+    with cols[2]:
+        st.image(preview_bytes(result.reconstruction[index]), caption="Lát cắt tái tạo", use_container_width=True)
+
+
+def render_cache_stats(stats: dict[str, int]) -> bool:
+    """Hiển thị thống kê cache kết quả; trả về ``True`` khi người dùng bấm xóa cache."""
+
+    with st.expander("Bộ nhớ đệm kết quả", expanded=False):
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        hit_rate = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        cols = st.columns(4)
+        cols[0].metric("Kết quả đã lưu", stats["entries"])
+        cols[1].metric("Dung lượng", format_nbytes(stats["bytes"]), help=f"Giới hạn {format_nbytes(stats['max_bytes'])}")
+        cols[2].metric("Tỉ lệ trúng", f"{hit_rate:.0%}", help=f"{lookups} lần tra cứu")
+        cols[3].metric("Đã loại bỏ", stats["evictions"])
+        caption = f"Trúng bộ nhớ: {stats['hits']} · trúng đĩa: {stats['disk_hits']} · trượt: {stats['misses']}"
+        if "disk_entries" in stats:
+            caption += (
+                f" · trên đĩa: {stats['disk_entries']} tệp, {format_nbytes(stats['disk_bytes'])}"
+                f" / {format_nbytes(stats['max_disk_bytes'])}"
+            )
+        st.caption(caption)
+        return st.button("Xóa bộ nhớ đệm", key="clear_result_cache", type="secondary")
@@ -1,28 +1,40 @@
 from __future__ import annotations
 
+import dataclasses
 import time
-from typing import Any, Dict, List
+import uuid
+from io import BytesIO
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, TypeVar, Union
 
-import numpy as np
 import streamlit as st
 
-from app.services.data_loader import (
-    load_dicom_image,
-    load_sinogram_image,
-    load_standard_image,
-)
+from app.services.batch import BatchJob, process_uploads
+from app.services.data_loader import load_dicom_series, load_sinogram_image
+from app.services.iterative import IterativeSettings
+from app.services.history import HistoryStore, new_history_store
+from app.services.jobs import Job, default_job_manager
 from app.services.pipeline import (
     ProcessedImage,
     ReconstructionResult,
-    process_gray_image,
+    VolumeResult,
+    format_nbytes,
     process_sinogram_array,
+    process_volume,
 )
+from app.services.result_cache import default_result_cache, result_key
 
 from .components.chat import render_chat_page
 from .components.controls import ControlState, render_controls
 from .components.header import render_header
-from .components.progress import progress_handler
-from .components.results import render_reconstruction_results, render_results
+from .components.jobs import render_job_panel
+from .components.results import (
+    render_cache_stats,
+    render_history,
+    render_history_stats,
+    render_reconstruction_results,
+    render_results,
+    render_volume_results,
+)
 from .components.settings import ensure_display_mode, render_display_settings
 from .components.chatbot import render_chatbot
 
@@ -31,6 +43,11 @@ SESSION_KEY = "workspace_results"
 PIPELINE_COUNT_KEY = "ui_pipeline_count"
 RECON_COUNT_KEY = "ui_recon_count"
 HISTORY_KEY = "workspace_history"
+JOBS_KEY = "workspace_jobs"
+JOB_SIGNATURES_KEY = "workspace_job_signatures"
+JOB_NOTICES_KEY = "workspace_job_notices"
+JOB_OWNER_KEY = "workspace_job_owner"
+JOB_POLL_SECONDS = 1.0
 
 
 def _init_session_state() -> None:
@@ -38,165 +55,266 @@ def _init_session_state() -> None:
         st.session_state[SESSION_KEY] = {
             "pipeline": [],
             "reconstruction": [],
+            "volume": None,
         }
     if HISTORY_KEY not in st.session_state:
-        st.session_state[HISTORY_KEY] = {
-            "pipeline": [],
-            "reconstruction": [],
-        }
+        st.session_state[HISTORY_KEY] = new_history_store()
     if PIPELINE_COUNT_KEY not in st.session_state:
         st.session_state[PIPELINE_COUNT_KEY] = 0
     if RECON_COUNT_KEY not in st.session_state:
         st.session_state[RECON_COUNT_KEY] = 0
+    if JOBS_KEY not in st.session_state:
+        st.session_state[JOBS_KEY] = []
+    if JOB_SIGNATURES_KEY not in st.session_state:
+        st.session_state[JOB_SIGNATURES_KEY] = {}
+    if JOB_NOTICES_KEY not in st.session_state:
+        st.session_state[JOB_NOTICES_KEY] = []
+    if JOB_OWNER_KEY not in st.session_state:
+        # Định danh phiên cho hàng đợi công việc dùng chung giữa các phiên.
+        st.session_state[JOB_OWNER_KEY] = uuid.uuid4().hex
     ensure_display_mode()
 
 
-def _status_slot(status_area: Any, title: str, subtitle: str) -> Any:
-    status_area.empty()
-    wrapper = status_area.container()
-    wrapper.markdown(
-        f"""
-        <div class='status-card'>
-            <span class='status-title'>{title}</span>
-            <span class='status-sub'>{subtitle}</span>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
-    return wrapper.container()
+ResultT = TypeVar("ResultT")
 
 
-def _process_standard_images(state: ControlState, status_area: Any) -> List[ProcessedImage]:
-    processed: List[ProcessedImage] = []
-    files = state.images
-    total = len(files)
-    if total == 0:
-        return processed
+def _cached_result(
+    kind: str,
+    payload: Union[bytes, List[bytes]],
+    params: Mapping[str, Any],
+    name: str,
+    compute: Callable[[], ResultT],
+) -> ResultT:
+    """Lấy kết quả đã lưu cho cùng nội dung tải lên và tham số, hoặc tính mới rồi lưu lại."""
 
-    for index, uploaded_file in enumerate(files, start=1):
-        with st.container():
-            slot = _status_slot(
-                status_area,
-                "Đang xử lý ảnh",  # title
-                f"{uploaded_file.name} · {index}/{total}",
-            )
-            try:
-                rgb, gray = load_standard_image(uploaded_file)
-                with progress_handler(
-                    state.show_progress,
-                    "Ảnh đã xử lý",
-                    holder=slot,
-                ) as progress:
-                    result = process_gray_image(
-                        gray,
-                        name=uploaded_file.name,
-                        rgb=rgb,
-                        progress_callback=progress,
-                    )
-                processed.append(result)
-            except Exception as exc:  # pragma: no cover - UI feedback only
-                status_area.error(f"Không thể xử lý {uploaded_file.name}: {exc}")
-    return processed
-
-
-def _process_dicoms(state: ControlState, status_area: Any) -> List[ProcessedImage]:
-    processed: List[ProcessedImage] = []
-    files = state.dicoms
-    total = len(files)
-    if total == 0:
-        return processed
+    cache = default_result_cache()
+    key = result_key(kind, payload, params)
+    cached = cache.get(key)
+    if cached is not None:
+        return dataclasses.replace(cached, name=name, info=dict(cached.info))
+    result = compute()
+    cache.put(key, result)
+    return result
+
+
+def _pipeline_params(state: ControlState) -> Dict[str, Any]:
+    return {
+        "max_size": state.sinogram_budget,
+        "denoise_backend": state.denoise_backend,
+        "adaptive_denoise": state.adaptive_denoise,
+    }
 
-    for index, uploaded_file in enumerate(files, start=1):
-        with st.container():
-            slot = _status_slot(
-                status_area,
-                "Đang xử lý DICOM",
-                f"{uploaded_file.name} · {index}/{total}",
-            )
-            try:
-                gray = load_dicom_image(uploaded_file)
-                rgb = np.stack([gray] * 3, axis=-1)
-                with progress_handler(
-                    state.show_progress,
-                    "DICOM đã xử lý",
-                    holder=slot,
-                ) as progress:
-                    result = process_gray_image(
-                        gray,
-                        name=uploaded_file.name,
-                        rgb=rgb,
-                        progress_callback=progress,
-                    )
-                processed.append(result)
-            except Exception as exc:  # pragma: no cover - UI feedback only
-                status_area.error(f"Không thể xử lý {uploaded_file.name}: {exc}")
-    return processed
-
-
-def _process_webcam(state: ControlState, status_area: Any) -> List[ProcessedImage]:
-    processed: List[ProcessedImage] = []
-    uploaded_file = state.camera_capture
-    if uploaded_file is None:
-        return processed
 
-    slot = _status_slot(status_area, "Đang xử lý Webcam", "Ảnh trực tiếp")
-    try:
-        rgb, gray = load_standard_image(uploaded_file)
-        with progress_handler(
-            state.show_progress,
-            "Ảnh Webcam đã xử lý",
-            holder=slot,
-        ) as progress:
-            result = process_gray_image(
-                gray,
-                name="Ảnh Webcam",
-                rgb=rgb,
-                progress_callback=progress,
+# (loại công việc, nhãn, chữ ký nội dung + tham số, hàm chạy nền)
+JobSpec = Tuple[str, str, str, Callable[[Job], Any]]
+
+
+def _upload_runner(uploads: List[BatchJob], params: Dict[str, Any]) -> Callable[[Job], List[ProcessedImage]]:
+    def _run(job: Job) -> List[ProcessedImage]:
+        job.items = [(upload.name, "Đang chờ") for upload in uploads]
+        results: List[Optional[ProcessedImage]] = [None] * len(uploads)
+        for outcome in process_uploads(uploads, params, progress_callback=job.report):
+            if outcome.ok:
+                results[outcome.index] = outcome.result
+                job.set_item(outcome.index, "Từ cache" if outcome.cached else f"Xong · {outcome.elapsed:.1f} s")
+            else:
+                job.set_item(outcome.index, "Lỗi")
+                job.warnings.append(f"Không thể xử lý {outcome.name}: {outcome.error}")
+        return [result for result in results if result is not None]
+
+    return _run
+
+
+def _pipeline_job(state: ControlState) -> Optional[JobSpec]:
+    """Chụp nội dung tệp tải lên ngay trong lượt chạy script; phần xử lý chạy nền."""
+
+    if state.source == "webcam":
+        if state.camera_capture is None:
+            return None
+        uploads = [BatchJob("Ảnh Webcam", "image", state.camera_capture.getvalue())]
+        label = "Ảnh Webcam"
+    else:
+        kind = "dicom" if state.source == "dicom" else "image"
+        files = state.dicoms if kind == "dicom" else state.images
+        if len(files) == 0:
+            return None
+        uploads = [BatchJob(uploaded_file.name, kind, uploaded_file.getvalue()) for uploaded_file in files]
+        label = f"{len(uploads)} {'tệp DICOM' if kind == 'dicom' else 'ảnh'}"
+    params = _pipeline_params(state)
+    signature = result_key(f"pipeline-{uploads[0].kind}", [upload.payload for upload in uploads], params)
+    return "pipeline", label, signature, _upload_runner(uploads, params)
+
+
+def _volume_job(state: ControlState) -> Optional[JobSpec]:
+    """Chụp byte tệp và tham số thành giá trị thường; hàm chạy nền không đọc lại ``state``."""
+
+    files = state.dicoms
+    if len(files) == 0:
+        return None
+    payloads = [uploaded_file.getvalue() for uploaded_file in files]
+    name = files[0].name
+    label = f"Khối DICOM · {len(files)} lát cắt"
+    params = _pipeline_params(state)
+
+    def _run(job: Job) -> VolumeResult:
+        def _compute() -> VolumeResult:
+            volume, positions = load_dicom_series([BytesIO(payload) for payload in payloads], bit_depth=16)
+            return process_volume(
+                volume,
+                name=name,
+                slice_positions=positions,
+                progress_callback=job.report,
+                **params,
             )
-        processed.append(result)
-    except Exception as exc:  # pragma: no cover - UI feedback only
-        status_area.error(f"Không thể xử lý ảnh Webcam: {exc}")
-    return processed
 
+        return _cached_result("dicom-volume", payloads, params, name, _compute)
 
-def _process_pipeline(state: ControlState, status_area: Any) -> List[ProcessedImage]:
-    if state.source == "png":
-        return _process_standard_images(state, status_area)
-    if state.source == "dicom":
-        return _process_dicoms(state, status_area)
-    return _process_webcam(state, status_area)
+    return "volume", label, result_key("dicom-volume", payloads, params), _run
 
 
-def _process_sinograms(state: ControlState, status_area: Any) -> List[ReconstructionResult]:
-    processed: List[ReconstructionResult] = []
+def _sinogram_job(state: ControlState) -> Optional[JobSpec]:
     files = state.sinograms
     if len(files) == 0:
+        return None
+    uploads = [(uploaded_file.name, uploaded_file.getvalue()) for uploaded_file in files]
+    iterative = IterativeSettings(
+        max_iterations=state.max_iterations,
+        time_budget=state.time_budget,
+    )
+    params = {
+        "target_size": state.sinogram_target,
+        "method": state.recon_method,
+        "filter_name": state.recon_filter,
+        "filter_cutoff": state.filter_cutoff,
+        "iterative": iterative,
+        "sparse_view": state.sparse_view,
+        "roi": state.roi,
+        "geometry": state.fan_geometry,
+    }
+    progressive_preview = state.progressive_preview
+
+    def _run(job: Job) -> List[ReconstructionResult]:
+        job.items = [(name, "Đang chờ") for name, _ in uploads]
+        processed: List[ReconstructionResult] = []
+        for index, (name, payload) in enumerate(uploads):
+            job.check_cancelled()
+            job.set_item(index, "Đang tái tạo")
+            started = time.perf_counter()
+
+            def _compute() -> ReconstructionResult:
+                source = BytesIO(payload)
+                source.name = name
+                return process_sinogram_array(
+                    load_sinogram_image(source),
+                    name=name,
+                    progress_callback=job.file_progress(index, len(uploads), name),
+                    preview_callback=job.show_preview if progressive_preview else None,
+                    **params,
+                )
+
+            try:
+                processed.append(_cached_result("sinogram", payload, params, name, _compute))
+                job.set_item(index, f"Xong · {time.perf_counter() - started:.1f} s")
+            except Exception as exc:
+                job.set_item(index, "Lỗi")
+                job.warnings.append(f"Không thể tái tạo {name}: {exc}")
+            finally:
+                job.preview = None
         return processed
 
-    total = len(files)
-    for index, uploaded_file in enumerate(files, start=1):
-        slot = _status_slot(
-            status_area,
-            "Đang tái tạo sinogram",
-            f"{uploaded_file.name} · {index}/{total}",
-        )
-        try:
-            sinogram_array = load_sinogram_image(uploaded_file)
-            with progress_handler(
-                state.show_progress,
-                "Hoàn tất tái tạo",
-                holder=slot,
-            ) as progress:
-                result = process_sinogram_array(
-                    sinogram_array,
-                    name=uploaded_file.name,
-                    target_size=state.sinogram_target,
-                    progress_callback=progress,
-                )
-            processed.append(result)
-        except Exception as exc:  # pragma: no cover - UI feedback only
-            status_area.error(f"Không thể tái tạo {uploaded_file.name}: {exc}")
-    return processed
+    signature = result_key("sinogram", [payload for _, payload in uploads], params)
+    return "reconstruction", f"{len(uploads)} sinogram", signature, _run
+
+
+def _submit_job(spec: Optional[JobSpec], *, force: bool) -> None:
+    """Đưa công việc vào hàng đợi nền của phiên.
+
+    Bỏ qua nếu công việc giống hệt (cùng tệp, cùng tham số) đang chạy, hoặc
+    — khi tự động xử lý, script chạy lại ở mỗi tương tác — đã được gửi rồi.
+    """
+
+    if spec is None:
+        return
+    kind, label, signature, run = spec
+    manager = default_job_manager()
+    submitted: Dict[str, str] = st.session_state[JOB_SIGNATURES_KEY]
+    if any(job.signature == signature and job.active for job in manager.jobs(st.session_state[JOBS_KEY])):
+        return
+    if not force and submitted.get(kind) == signature:
+        return
+    job = manager.submit(kind, label, run, signature=signature, owner=st.session_state[JOB_OWNER_KEY])
+    st.session_state[JOBS_KEY].append(job.id)
+    st.session_state[JOB_NOTICES_KEY] = []
+    submitted[kind] = signature
+
+
+def _collect_jobs(workspace_state: Dict[str, Any], status_area: Any) -> None:
+    """Gắn kết quả của các công việc nền đã xong vào không gian làm việc của phiên.
+
+    Lỗi và thông báo hủy được giữ lại (hiện ở mọi lượt chạy) cho tới khi
+    gửi công việc mới, vì công việc thường xong ở lượt người dùng không bấm gì.
+    """
+
+    manager = default_job_manager()
+    history: HistoryStore = st.session_state[HISTORY_KEY]
+    notices: List[Tuple[str, str]] = st.session_state[JOB_NOTICES_KEY]
+    remaining: List[str] = []
+    for job_id in st.session_state[JOBS_KEY]:
+        job = manager.get(job_id)
+        if job is None:
+            continue
+        if job.active:
+            remaining.append(job_id)
+            continue
+        notices.extend(("error", warning) for warning in job.warnings)
+        if job.state == "failed":
+            notices.append(("error", f"Không thể xử lý {job.label}: {job.error}"))
+        elif job.state == "cancelled":
+            notices.append(("info", f"Đã hủy xử lý {job.label}."))
+        elif job.kind == "volume":
+            workspace_state["volume"] = job.result
+            _push_notification(
+                "success",
+                "Khối 3D hoàn tất",
+                f"{job.result.depth} lát cắt đã được xử lý.",
+            )
+        elif job.kind == "pipeline" and job.result:
+            # Phiên chỉ giữ các mục lịch sử: kho lịch sử quyết định kết quả nằm ở RAM, nén hay đĩa.
+            workspace_state["pipeline"] = history.add("pipeline", job.result)
+            _push_notification(
+                "success",
+                "Pipeline hoàn tất",
+                f"{len(job.result)} ảnh đã được xử lý thành công.",
+            )
+            st.session_state[PIPELINE_COUNT_KEY] = history.count("pipeline")
+        elif job.kind == "reconstruction" and job.result:
+            workspace_state["reconstruction"] = history.add("reconstruction", job.result)
+            _push_notification(
+                "success",
+                "Tái tạo hoàn chỉnh",
+                f"{len(job.result)} sinogram đã dựng lại ảnh CT.",
+            )
+            st.session_state[RECON_COUNT_KEY] = history.count("reconstruction")
+        if job.state != "done":
+            # Cho phép gửi lại đúng công việc vừa lỗi/bị hủy.
+            st.session_state[JOB_SIGNATURES_KEY].pop(job.kind, None)
+        manager.forget(job_id)
+    st.session_state[JOBS_KEY] = remaining
+    for level, message in notices:
+        getattr(status_area, level)(message)
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def _job_monitor(show_progress: bool) -> None:
+    """Cập nhật bảng công việc nền theo chu kỳ mà không chạy lại cả trang."""
+
+    manager = default_job_manager()
+    jobs = manager.jobs(st.session_state[JOBS_KEY])
+    for job_id in render_job_panel(jobs, show_progress=show_progress):
+        manager.cancel(job_id)
+    if any(not job.active for job in jobs):
+        # Chạy lại cả trang để ``_collect_jobs`` gắn kết quả vào không gian làm việc.
+        st.rerun()
 
 
 def _push_notification(kind: str, title: str, message: str) -> None:
@@ -266,8 +384,26 @@ def render_app() -> None:
             status_area = st.container()
             results_area = st.container()
 
-    workspace_state: Dict[str, List[Any]] = st.session_state[SESSION_KEY]
-    if not workspace_state["pipeline"] and not workspace_state["reconstruction"]:
+    workspace_state: Dict[str, Any] = st.session_state[SESSION_KEY]
+    workspace_state.setdefault("volume", None)
+
+    # Xử lý chạy nền: tương tác với widget trong lúc chờ chỉ chạy lại script,
+    # công việc vẫn tiếp tục và kết quả được gắn vào khi xong.
+    if control_state.mode == "pipeline" and control_state.process_requested:
+        if control_state.source == "dicom" and control_state.dicom_volume:
+            spec = _volume_job(control_state)
+        else:
+            spec = _pipeline_job(control_state)
+        _submit_job(spec, force=not control_state.auto_process)
+    if control_state.mode == "reconstruct" and control_state.reconstruct_requested:
+        _submit_job(_sinogram_job(control_state), force=True)
+
+    _collect_jobs(workspace_state, status_area)
+
+    if st.session_state[JOBS_KEY]:
+        with status_area:
+            _job_monitor(control_state.show_progress)
+    elif not workspace_state["pipeline"] and not workspace_state["reconstruction"] and workspace_state["volume"] is None:
         status_area.markdown(
             """
             <div class='status-card idle'>
@@ -278,54 +414,24 @@ def render_app() -> None:
             unsafe_allow_html=True,
         )
 
-    if control_state.mode == "pipeline" and control_state.process_requested:
-        new_results = _process_pipeline(control_state, status_area)
-        if new_results:
-            # Add to history
-            history: Dict[str, List[Any]] = st.session_state[HISTORY_KEY]
-            history["pipeline"].extend(new_results)
-            
-            # Update current workspace
-            workspace_state["pipeline"] = new_results
-            current = len(new_results)
-            _push_notification(
-                "success",
-                "Pipeline hoàn tất",
-                f"{current} ảnh đã được xử lý thành công.",
-            )
-            st.session_state[PIPELINE_COUNT_KEY] = len(history["pipeline"])
-
-    if control_state.mode == "reconstruct" and control_state.reconstruct_requested:
-        new_results = _process_sinograms(control_state, status_area)
-        if new_results:
-            # Add to history
-            history: Dict[str, List[Any]] = st.session_state[HISTORY_KEY]
-            history["reconstruction"].extend(new_results)
-            
-            # Update current workspace
-            workspace_state["reconstruction"] = new_results
-            current = len(new_results)
-            _push_notification(
-                "success",
-                "Tái tạo hoàn chỉnh",
-                f"{current} sinogram đã dựng lại ảnh CT.",
-            )
-            st.session_state[RECON_COUNT_KEY] = len(history["reconstruction"])
-
+    history: HistoryStore = st.session_state[HISTORY_KEY]
     with results_area:
         result_tabs = st.tabs(["Kết quả mới nhất", "Tái tạo mới nhất", "Lịch sử đầy đủ"])
         
         with result_tabs[0]:
-            render_results(workspace_state["pipeline"])
+            if workspace_state.get("volume") is not None:
+                render_volume_results(workspace_state["volume"])
+                st.divider()
+            render_results(history.view(workspace_state["pipeline"]))
         
         with result_tabs[1]:
-            render_reconstruction_results(workspace_state["reconstruction"])
+            render_reconstruction_results(history.view(workspace_state["reconstruction"]))
         
         with result_tabs[2]:
             # History view
-            history: Dict[str, List[Any]] = st.session_state[HISTORY_KEY]
-            total_pipeline = len(history["pipeline"])
-            total_recon = len(history["reconstruction"])
+            total_pipeline = history.count("pipeline")
+            total_recon = history.count("reconstruction")
+            history_bytes = history.memory_bytes()
             
             st.markdown(
                 f"""
@@ -340,37 +446,47 @@ def render_app() -> None:
                             <span style='font-size: 2rem; font-weight: 700; color: var(--accent-primary);'>{total_recon}</span>
                             <p style='margin: 0; color: var(--text-muted); font-size: 0.9rem;'>Sinogram tái tạo</p>
                         </div>
+                        <div>
+                            <span style='font-size: 2rem; font-weight: 700; color: var(--accent-primary);'>{format_nbytes(history_bytes)}</span>
+                            <p style='margin: 0; color: var(--text-muted); font-size: 0.9rem;'>Bộ nhớ lịch sử</p>
+                        </div>
                     </div>
                 </div>
                 """,
                 unsafe_allow_html=True,
             )
+            render_history_stats(history.stats())
             
             if total_pipeline > 0 or total_recon > 0:
                 col1, col2 = st.columns(2)
                 with col1:
                     if st.button("🗑️ Xóa lịch sử Pipeline", use_container_width=True, type="secondary"):
-                        st.session_state[HISTORY_KEY]["pipeline"] = []
+                        history.remove("pipeline")
                         st.session_state[SESSION_KEY]["pipeline"] = []
                         st.rerun()
                 with col2:
                     if st.button("🗑️ Xóa lịch sử Reconstruction", use_container_width=True, type="secondary"):
-                        st.session_state[HISTORY_KEY]["reconstruction"] = []
+                        history.remove("reconstruction")
                         st.session_state[SESSION_KEY]["reconstruction"] = []
                         st.rerun()
             
+            result_cache = default_result_cache()
+            if render_cache_stats(result_cache.stats()):
+                result_cache.clear()
+                st.rerun()
+
             st.divider()
             
             history_tabs = st.tabs([f"Pipeline ({total_pipeline})", f"Reconstruction ({total_recon})"])
             with history_tabs[0]:
                 if total_pipeline > 0:
-                    render_results(history["pipeline"])
+                    render_history(history, "pipeline")
                 else:
                     st.info("Chưa có lịch sử xử lý pipeline")
             
             with history_tabs[1]:
                 if total_recon > 0:
-                    render_reconstruction_results(history["reconstruction"])
+                    render_history(history, "reconstruction")
                 else:
                     st.info("Chưa có lịch sử tái tạo sinogram")
 
@@ -585,38 +585,6 @@ IOS_GLASS_STYLES = """
         font-size: 0.95rem;
     }
 
-    .image-container {
-        position: relative;
-        display: inline-block;
-        width: 100%;
-    }
-
-    .download-overlay-btn {
-        position: absolute;
-        top: 0.75rem;
-        right: 0.75rem;
-        background: rgba(255, 255, 255, 0.95);
-        backdrop-filter: blur(12px);
-        border: 1px solid rgba(255, 255, 255, 0.6);
-        border-radius: 12px;
-        padding: 0.5rem 0.65rem;
-        cursor: pointer;
-        transition: all 0.2s ease;
-        box-shadow: 0 4px 12px rgba(15, 23, 42, 0.15);
-        z-index: 10;
-    }
-
-    .download-overlay-btn:hover {
-        background: rgba(255, 255, 255, 1);
-        transform: translateY(-2px);
-        box-shadow: 0 6px 16px rgba(15, 23, 42, 0.25);
-    }
-
-    .download-overlay-btn i {
-        color: var(--accent-primary);
-        font-size: 1.1rem;
-    }
-
     div[data-testid="stFileUploader"] section {
         padding: 1.1rem;
         border-radius: 18px;
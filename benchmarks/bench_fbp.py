@@ -0,0 +1,91 @@
+"""So sánh tốc độ và sai số giữa fbp_reconstruct và skimage.iradon.
+
+Cột ``cached`` đo lại FBP khi ma trận chiếu ngược đã nằm trong OperatorCache.
+
+Chạy từ thư mục gốc dự án:
+
+    python -m benchmarks.bench_fbp --sizes 256 512 1024
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Callable
+
+import numpy as np
+from skimage.data import shepp_logan_phantom
+from skimage.transform import iradon, radon, resize
+
+from app.services.fbp import fbp_reconstruct
+from app.services.operator_cache import OperatorCache
+
+
+def _best_time(fn: Callable[[], np.ndarray], repeats: int) -> tuple[float, np.ndarray]:
+    best = float("inf")
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(sizes: list[int], repeats: int, cache_bytes: int) -> None:
+    header = (
+        f"{'size':>6} {'interp':>8} {'iradon (s)':>11} {'fbp (s)':>9} {'speedup':>8} "
+        f"{'cached (s)':>11} {'speedup':>8} {'rel. error':>11}"
+    )
+    print(header)
+    print("-" * len(header))
+    for size in sizes:
+        image = resize(shepp_logan_phantom(), (size, size))
+        theta = np.linspace(0.0, 180.0, size, endpoint=False)
+        sinogram = radon(image, theta=theta, circle=False)
+
+        for interpolation in ("linear", "nearest"):
+            ref_time, reference = _best_time(
+                lambda: iradon(
+                    sinogram,
+                    theta=theta,
+                    filter_name="hann",
+                    interpolation=interpolation,
+                    circle=False,
+                ),
+                repeats,
+            )
+            fbp_time, result = _best_time(
+                lambda: fbp_reconstruct(sinogram, theta, filter_name="hann", interpolation=interpolation),
+                repeats,
+            )
+            cache = OperatorCache(cache_bytes, min_uses=1)
+            fbp_reconstruct(sinogram, theta, interpolation=interpolation, operator_cache=cache)
+            cached_time, _ = _best_time(
+                lambda: fbp_reconstruct(
+                    sinogram,
+                    theta,
+                    filter_name="hann",
+                    interpolation=interpolation,
+                    operator_cache=cache,
+                ),
+                repeats,
+            )
+            cached = f"{cached_time:>11.3f} {ref_time / cached_time:>7.2f}x" if len(cache) else f"{'-':>11} {'-':>8}"
+            error = np.abs(result - reference).max() / np.abs(reference).max()
+            print(
+                f"{size:>6} {interpolation:>8} {ref_time:>11.3f} {fbp_time:>9.3f} "
+                f"{ref_time / fbp_time:>7.2f}x {cached} {error:>11.2e}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[256, 512, 1024])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--cache-mb", type=int, default=2048, help="Giới hạn bộ nhớ đệm toán tử (MB)")
+    args = parser.parse_args()
+    run(args.sizes, args.repeats, args.cache_mb * 1024 * 1024)
+
+
+if __name__ == "__main__":
+    main()
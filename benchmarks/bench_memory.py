@@ -0,0 +1,84 @@
+"""Đo bộ nhớ đỉnh và thời gian từng bước xử lý với float64 và float32.
+
+Bộ nhớ đỉnh được đo bằng ``tracemalloc`` (NumPy báo cáo mọi cấp phát
+mảng), tính riêng cho từng bước: khử nhiễu, tạo sinogram, tái tạo.
+
+Chạy từ thư mục gốc dự án:
+
+    python -m benchmarks.bench_memory --sizes 512 1024
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+from typing import Callable
+
+import numpy as np
+from skimage.data import shepp_logan_phantom
+from skimage.transform import radon, resize
+
+from app.services.image_processing import (
+    SinogramResult,
+    create_sinogram,
+    preprocess_and_denoise,
+    reconstruct_image,
+)
+from app.services.operator_cache import OperatorCache
+
+
+def _measure(fn: Callable[[], object]) -> tuple[float, float]:
+    """Trả về (bộ nhớ đỉnh MB, thời gian giây) của một lần gọi."""
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2**20, elapsed
+
+
+def run(sizes: list[int], skip_denoise: bool) -> None:
+    header = f"{'size':>6} {'stage':>12} {'f64 MB':>9} {'f32 MB':>9} {'ratio':>6} {'f64 s':>8} {'f32 s':>8}"
+    print(header)
+    print("-" * len(header))
+    for size in sizes:
+        phantom = resize(shepp_logan_phantom(), (size, size))
+        gray = (phantom * 255).astype(np.uint8)
+        theta = np.linspace(0.0, 180.0, size, endpoint=False)
+        sinogram = radon(phantom, theta=theta, circle=False)
+
+        stages: dict[str, Callable[[np.dtype], Callable[[], object]]] = {
+            "sinogram": lambda dtype: lambda: create_sinogram(gray, dtype=dtype),
+            "reconstruct": lambda dtype: lambda: reconstruct_image(
+                SinogramResult(sinogram.astype(dtype), theta, (size, size)),
+                dtype=dtype,
+                # Bộ nhớ đệm rỗng không nhận ma trận để đo đường chiếu ngược trực tiếp.
+                operator_cache=OperatorCache(0),
+            ),
+        }
+        if not skip_denoise:
+            stages = {"denoise": lambda dtype: lambda: preprocess_and_denoise(gray, dtype=dtype), **stages}
+
+        for stage, factory in stages.items():
+            mem64, time64 = _measure(factory(np.float64))
+            mem32, time32 = _measure(factory(np.float32))
+            print(
+                f"{size:>6} {stage:>12} {mem64:>9.1f} {mem32:>9.1f} {mem64 / mem32:>5.2f}x "
+                f"{time64:>8.3f} {time32:>8.3f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[512, 1024])
+    parser.add_argument("--skip-denoise", action="store_true", help="Bỏ qua bước NL-means (chậm ở ảnh lớn)")
+    args = parser.parse_args()
+    run(args.sizes, args.skip_denoise)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""So sánh forward_project (Joseph, đa luồng) với skimage.radon.
+
+Cột ``cached`` đo lại khi ma trận chiếu thuận đã nằm trong OperatorCache.
+
+Chạy từ thư mục gốc dự án:
+
+    python -m benchmarks.bench_projector --sizes 256 512 --workers 1 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Callable
+
+import numpy as np
+from skimage.data import shepp_logan_phantom
+from skimage.transform import radon, resize
+
+from app.services.operator_cache import OperatorCache
+from app.services.projector import forward_project
+
+
+def _best_time(fn: Callable[[], np.ndarray], repeats: int) -> tuple[float, np.ndarray]:
+    best = float("inf")
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(sizes: list[int], workers: list[int], repeats: int, cache_bytes: int) -> None:
+    header = f"{'size':>6} {'circle':>6} {'radon (s)':>10} {'threads':>7} {'ours (s)':>9} {'speedup':>8} {'rel. L2':>9}"
+    print(header)
+    print("-" * len(header))
+    for size in sizes:
+        image = resize(shepp_logan_phantom(), (size, size)).astype(np.float32)
+        theta = np.linspace(0.0, 180.0, size, endpoint=False)
+        for circle in (False, True):
+            ref_time, reference = _best_time(lambda: radon(image, theta=theta, circle=circle), repeats)
+            for count in workers:
+                elapsed, result = _best_time(
+                    lambda: forward_project(image, theta, circle=circle, workers=count),
+                    repeats,
+                )
+                error = np.linalg.norm(result - reference) / np.linalg.norm(reference)
+                print(
+                    f"{size:>6} {str(circle):>6} {ref_time:>10.3f} {count:>7} {elapsed:>9.3f} "
+                    f"{ref_time / elapsed:>7.2f}x {error:>9.2e}"
+                )
+            cache = OperatorCache(cache_bytes, min_uses=1)
+            forward_project(image, theta, circle=circle, operator_cache=cache)
+            if len(cache):
+                cached_time, _ = _best_time(
+                    lambda: forward_project(image, theta, circle=circle, operator_cache=cache),
+                    repeats,
+                )
+                print(f"{size:>6} {str(circle):>6} {ref_time:>10.3f} {'cached':>7} {cached_time:>9.3f} {ref_time / cached_time:>7.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[256, 512])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--cache-mb", type=int, default=1024, help="Giới hạn bộ nhớ đệm toán tử (MB)")
+    args = parser.parse_args()
+    run(args.sizes, args.workers, args.repeats, args.cache_mb * 1024 * 1024)
+
+
+if __name__ == "__main__":
+    main()
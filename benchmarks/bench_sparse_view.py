@@ -0,0 +1,76 @@
+"""Đo tăng tốc và sai số của chế độ tái tạo ít góc (sparse-view).
+
+Mỗi dòng so sánh một mức giảm góc (có/không nội suy góc) với FBP đủ góc:
+thời gian, tăng tốc, sai số góc ước tính trên sinogram và RMSE/PSNR của
+ảnh tái tạo so với ảnh đủ góc.
+
+Chạy từ thư mục gốc dự án:
+
+    python -m benchmarks.bench_sparse_view --size 256 --factors 2 4 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+from skimage.data import shepp_logan_phantom
+from skimage.transform import radon, resize
+
+from app.services.fbp import fbp_reconstruct
+from app.services.sparse_view import SparseViewSettings, angular_error, decimate_angles
+
+
+def _best_time(fn, repeats: int) -> tuple[float, np.ndarray]:
+    best = float("inf")
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _psnr(reference: np.ndarray, image: np.ndarray) -> tuple[float, float]:
+    rmse = float(np.sqrt(np.mean((reference - image) ** 2)))
+    peak = float(reference.max() - reference.min()) or 1.0
+    return rmse, 20 * np.log10(peak / rmse) if rmse > 0 else float("inf")
+
+
+def run(size: int, factors: list[int], repeats: int) -> None:
+    image = resize(shepp_logan_phantom(), (size, size))
+    theta = np.linspace(0.0, 180.0, size, endpoint=False)
+    sinogram = radon(image, theta=theta, circle=False)
+
+    full_time, reference = _best_time(lambda: fbp_reconstruct(sinogram, theta), repeats)
+    header = (
+        f"{'factor':>6} {'interp':>6} {'angles':>7} {'time (s)':>9} {'speedup':>8} "
+        f"{'ang. err':>9} {'RMSE':>8} {'PSNR (dB)':>10}"
+    )
+    print(f"size {size}, full FBP {len(theta)} angles: {full_time:.3f} s")
+    print(header)
+    print("-" * len(header))
+    for factor in factors:
+        for interpolate in (False, True):
+            settings = SparseViewSettings(factor=factor, interpolate=interpolate)
+            sparse, sparse_theta = decimate_angles(sinogram, theta, settings)
+            elapsed, result = _best_time(lambda: fbp_reconstruct(sparse, sparse_theta), repeats)
+            rmse, psnr = _psnr(reference, result)
+            print(
+                f"{factor:>6} {'yes' if interpolate else 'no':>6} {len(sparse_theta):>7} {elapsed:>9.3f} "
+                f"{full_time / elapsed:>7.2f}x {angular_error(sinogram, theta, settings):>9.2%} {rmse:>8.4f} {psnr:>10.2f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=256)
+    parser.add_argument("--factors", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    run(args.size, args.factors, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
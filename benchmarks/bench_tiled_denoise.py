@@ -0,0 +1,64 @@
+"""Đo khử nhiễu chia ô đa tiến trình so với xử lý cả ảnh.
+
+Mỗi cấu hình số tiến trình được đo thời gian (lần chạy đầu khởi động pool
+nên bị bỏ qua), kèm sai số tuyệt đối lớn nhất và số điểm ảnh uint8 khác
+so với kết quả không chia ô.
+
+Chạy từ thư mục gốc dự án:
+
+    python -m benchmarks.bench_tiled_denoise --size 2048 --workers 1 2 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+from skimage.data import shepp_logan_phantom
+from skimage.transform import resize
+
+from app.services.denoise import DEFAULT_DENOISE, DENOISE_BACKENDS, denoise, denoise_tiled
+
+
+def run(size: int, backend: str, workers: list[int], tile_size: int, repeats: int) -> None:
+    rng = np.random.default_rng(0)
+    clean = resize(shepp_logan_phantom(), (size, size)).astype(np.float32)
+    noisy = np.clip(clean + rng.normal(0.0, 0.05, clean.shape).astype(np.float32), 0.0, 1.0)
+
+    start = time.perf_counter()
+    reference = denoise(noisy, backend, workers=1)
+    baseline = time.perf_counter() - start
+    reference_u8 = cv2.convertScaleAbs(reference, alpha=255.0)
+
+    header = f"{'workers':>8} {'time (s)':>9} {'speedup':>8} {'max |diff|':>11} {'uint8 diff':>11}"
+    print(f"{size}x{size}, {DENOISE_BACKENDS[backend].label}, ô {tile_size}px")
+    print(header)
+    print("-" * len(header))
+    print(f"{'untiled':>8} {baseline:>9.3f} {1.0:>7.2f}x {0.0:>11.2e} {0:>11}")
+    for count in workers:
+        denoise_tiled(noisy, backend, workers=count, tile_size=tile_size)  # khởi động pool
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            output = denoise_tiled(noisy, backend, workers=count, tile_size=tile_size)
+            best = min(best, time.perf_counter() - start)
+        diff = float(np.abs(output - reference).max())
+        changed = int(np.count_nonzero(cv2.convertScaleAbs(output, alpha=255.0) != reference_u8))
+        print(f"{count:>8} {best:>9.3f} {baseline / best:>7.2f}x {diff:>11.2e} {changed:>11}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=2048)
+    parser.add_argument("--backend", default=DEFAULT_DENOISE, choices=sorted(DENOISE_BACKENDS))
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--tile-size", type=int, default=512)
+    parser.add_argument("--repeats", type=int, default=2)
+    args = parser.parse_args()
+    run(args.size, args.backend, args.workers, args.tile_size, args.repeats)
+
+
+if __name__ == "__main__":
+    main()